@@ -0,0 +1,61 @@
+# benchmarks/bench_capture.py
+"""
+Cost of the always-on capture ring.
+
+    python -m benchmarks.bench_capture [--seconds 60] [--bufsize 512]
+
+- write:   CaptureBuffer.write() of one server buffer, as run from the audio
+           callback (compare with the buffer period);
+- capture: copying the last 8 bars at 120 BPM out of a full ring;
+- save:    time until save_take() returns (the WAV itself is written on a
+           background thread) and until the file is done.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from engine.capture import CaptureBuffer, save_take
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--bufsize", type=int, default=512)
+    parser.add_argument("--sr", type=int, default=44100)
+    args = parser.parse_args()
+
+    ring = CaptureBuffer(args.seconds, args.sr, 2)
+    block = np.random.default_rng(0).uniform(-0.5, 0.5, (args.bufsize, 2)).astype(np.float32)
+    bar = args.sr * 2  # 4/4 at 120 BPM
+    buffers = int(args.seconds * args.sr / args.bufsize) + 100
+    t0 = time.perf_counter()
+    for n in range(buffers):
+        if n * args.bufsize % bar < args.bufsize:
+            ring.mark()
+        ring.write(block)
+    write = (time.perf_counter() - t0) / buffers
+    period = args.bufsize / args.sr
+    print(f"ring {args.seconds:.0f}s: {ring.capacity * 2 * 4 / 2**20:.1f} MiB")
+    print(f"write     {write * 1e6:8.2f} us/buffer ({write / period:.3%} of the {period * 1e3:.1f} ms period)")
+
+    t0 = time.perf_counter()
+    take = ring.last_bars(8)
+    print(f"capture   {(time.perf_counter() - t0) * 1e3:8.2f} ms for {len(take) / args.sr:.1f}s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        future = save_take(take, os.path.join(tmp, "take.wav"), args.sr)
+        returned = time.perf_counter() - t0
+        future.result()
+        done = time.perf_counter() - t0
+        print(f"save      {returned * 1e3:8.2f} ms to return, {done * 1e3:.1f} ms until written")
+
+
+if __name__ == "__main__":
+    main()
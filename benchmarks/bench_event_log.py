@@ -0,0 +1,100 @@
+# benchmarks/bench_event_log.py
+"""
+Session event log: size on disk and replay speed.
+
+    python -m benchmarks.bench_event_log [--seconds 30] [--sr 48000]
+
+Plays a busy four-lane groove on a LiveSequencer with event_log set, driven
+buffer by buffer (audio="manual") as the sound card would, with a pad edit,
+a bass sweep and a wave switch along the way, and keeps the output it
+produced. Then replays the log with render_event_log in a temporary
+directory and prints:
+- log size against the same session as 32-bit float WAV;
+- replay time against the session length;
+- the largest sample difference from the live output (0.0: identical);
+- a re-render at --sr, for comparison.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from engine.live_sequencer import LiveSequencer, render_event_log
+from engine.track import Track
+
+BUFSIZE = 512
+
+
+def _groove() -> Track:
+    track = Track(bpm=128, steps=16)
+    track.add_pattern("kick", "X---X---X---X---")
+    track.add_pattern("snare", "----X-------X---")
+    track.add_pattern("hihat", "XXXXXXXXXXXXXXXX")
+    track.add_pattern("bass", "--X-----X--X--X-")
+    return track
+
+
+def _read_float_wav(path) -> np.ndarray:
+    with open(path, "rb") as f:
+        data = f.read()
+    pos = data.index(b"data") + 8
+    return np.frombuffer(data[pos:], dtype="<f4").reshape(-1, 2)
+
+
+def _session(log_path: str, seconds: float) -> np.ndarray:
+    track = _groove()
+    sequencer = LiveSequencer(track, audio="manual", buffersize=BUFSIZE, event_log=log_path,
+                              capture_seconds=0)
+    sr = int(sequencer.server.getSamplingRate())
+    blocks = int(seconds * sr / BUFSIZE)
+    out = np.empty((blocks * BUFSIZE, 2), dtype=np.float32)
+    sequencer.start()
+    for k in range(blocks):
+        if k == blocks // 4:
+            track.toggle_step("hihat", 3)
+        elif k == blocks // 2:
+            sequencer.update_synth("bass", "wave", "square")
+        if k % 50 == 0:
+            sequencer.update_synth("bass", "freq", 40.0 + 40.0 * k / blocks)
+        sequencer.server.process()
+        out[k * BUFSIZE:(k + 1) * BUFSIZE] = sequencer._output
+    sequencer.stop()
+    sequencer.shutdown()
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--sr", type=int, default=48000, help="sample rate of the re-render")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log_path = os.path.join(tmp, "session.evlog")
+        live = _session(log_path, args.seconds)
+        log_bytes = os.path.getsize(log_path)
+        wav_bytes = live.size * 4 + 44
+        print(f"log        {log_bytes / 1024:8.1f} KB  ({log_bytes / args.seconds:.0f} B/s)")
+        print(f"float WAV  {wav_bytes / 1024:8.1f} KB  ({wav_bytes / log_bytes:.0f}x the log)")
+
+        out = os.path.join(tmp, "replay.wav")
+        t0 = time.perf_counter()
+        render_event_log(log_path, out)
+        elapsed = time.perf_counter() - t0
+        replay = _read_float_wav(out)
+        n = min(len(live), len(replay))
+        print(f"replay     {elapsed * 1e3:8.1f} ms  ({args.seconds / elapsed:.0f}x real time)")
+        print(f"max |live - replay|: {np.abs(live[:n] - replay[:n]).max():.3g} over {n} frames")
+
+        t0 = time.perf_counter()
+        render_event_log(log_path, os.path.join(tmp, "replay_sr.wav"), sr=args.sr)
+        print(f"@{args.sr} Hz {(time.perf_counter() - t0) * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
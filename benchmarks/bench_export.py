@@ -0,0 +1,94 @@
+# benchmarks/bench_export.py
+"""
+Compare the pydub overlay exporter against the NumPy mixdown backend.
+
+    python -m benchmarks.bench_export [--steps 32] [--repeat 5]
+
+Both sides mix the same sample set (every lane from its assets/ WAV, kick
+and bass included) into one bar and write it to a WAV in a temporary
+directory: pydub overlays hit by hit (audio_exporter._export_pydub), the
+NumPy side is offline_renderer.render_patterns with no synth voices and no
+lane cache, then write_wav. The timings compare the mixdown alone.
+
+Each lane is then exported solo both ways and must match to within 16-bit
+rounding (exits non-zero otherwise), which checks every hit position. The
+full mixes differ where they clip: pydub saturates after every overlay,
+NumPy clips once at the end.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from engine import audio_exporter
+from engine.offline_renderer import decode_wav, load_samples, output_format, render_patterns, write_wav
+from engine.track import Track
+
+TOLERANCE = 2.0 / 32768  # 16-bit assets, rounded differently on the way to the output width
+LANES = ("kick", "snare", "hihat", "clap", "bass")
+
+
+def _busy_track(steps: int, lanes=LANES, bpm: int = 128) -> Track:
+    track = Track(bpm=bpm, steps=steps)
+    for name in lanes:
+        track.add_pattern(name, "X" * steps)
+    return track
+
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--steps", type=int, default=32)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    track = _busy_track(args.steps)
+    samples = load_samples(audio_exporter.SAMPLE_PATHS)
+    frame_rate, channels, sample_width = output_format(samples)
+
+    def numpy_export(track, path):
+        data = render_patterns(track.get_patterns(), track.get_bpm(), samples, steps=args.steps,
+                               frame_rate=frame_rate, channels=channels, voices=None)
+        write_wav(path, data, frame_rate=frame_rate, sample_width=sample_width)
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        pydub_path = os.path.join(tmp, "bench_pydub.wav")
+        numpy_path = os.path.join(tmp, "bench_numpy.wav")
+        t_pydub = _best(lambda: audio_exporter._export_pydub(track, pydub_path), args.repeat)
+        t_numpy = _best(lambda: numpy_export(track, numpy_path), args.repeat)
+        print(f"steps={args.steps} hits={len(LANES) * args.steps}")
+        print(f"pydub : {t_pydub * 1000:8.1f} ms")
+        print(f"numpy : {t_numpy * 1000:8.1f} ms  ({t_pydub / t_numpy:.1f}x faster)")
+
+        for name in LANES:
+            solo = _busy_track(args.steps, lanes=(name,))
+            audio_exporter._export_pydub(solo, pydub_path)
+            numpy_export(solo, numpy_path)
+            a = decode_wav(pydub_path).data
+            b = decode_wav(numpy_path).data
+            n = min(len(a), len(b))
+            max_err = float(np.max(np.abs(a[:n] - b[:n]))) if n else 0.0
+            ok = len(a) == len(b) and max_err <= TOLERANCE
+            failed |= not ok
+            print(f"{name:6s} solo: frames pydub={len(a)} numpy={len(b)}  max abs diff={max_err:.2e}"
+                  f"{'' if ok else '  MISMATCH'}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# benchmarks/bench_incremental.py
+"""
+Work per edit for Track change consumers.
+
+    python -m benchmarks.bench_incremental [--lanes 128] [--steps 256]
+
+- sequencer recompile after one toggle: compile_step_table from scratch vs
+  with `previous` (only the toggled step is rebuilt);
+- mixer-style repaint: pads touched per toggle from the TrackChange range vs
+  repainting the toggled row;
+- loading a 64-pattern song preset with apply_preset(): listener calls and
+  snapshots published, batched (the default) vs one per edit.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import random
+import time
+
+from engine.live_sequencer import compile_step_table
+from engine.pattern_exporter import apply_preset
+from engine.track import Track
+
+
+def _noop(delay: float = 0.0):
+    pass
+
+
+def _fill(lanes: int, steps: int, seed: int = 1) -> Track:
+    rng = random.Random(seed)
+    track = Track(steps=steps)
+    for n in range(lanes):
+        track.add_pattern(f"inst{n}", "".join(rng.choice("X---") for _ in range(steps)))
+    return track
+
+
+def _song_preset(patterns: int = 64, steps: int = 16) -> dict:
+    rng = random.Random(3)
+    bank = {f"P{p:02d}": {name: "".join(rng.choice("X---") for _ in range(steps))
+                         for name in ("kick", "snare", "hihat", "clap", "bass")}
+            for p in range(patterns)}
+    return {"bpm": 124, "steps": steps, "instruments": bank["P00"], "patterns": bank,
+            "song": [(name, 2) for name in bank], "current": "P00"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lanes", type=int, default=128)
+    parser.add_argument("--steps", type=int, default=256)
+    parser.add_argument("--edits", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(2)
+    track = _fill(args.lanes, args.steps)
+    fns = {f"inst{n}": _noop for n in range(args.lanes)}
+    touched = []
+    track.on_change(lambda changes: touched.extend(c.stop - c.start for c in changes))
+
+    entry = (track.get_step_table(), compile_step_table(track.get_step_table(), fns))
+    full = incremental = 0.0
+    for _ in range(args.edits):
+        track.toggle_step(f"inst{rng.randrange(args.lanes)}", rng.randrange(args.steps))
+        names = track.get_step_table()
+        t0 = time.perf_counter()
+        compile_step_table(names, fns)
+        t1 = time.perf_counter()
+        entry = (names, compile_step_table(names, fns, previous=entry))
+        t2 = time.perf_counter()
+        full += t1 - t0
+        incremental += t2 - t1
+    print(f"{args.lanes} lanes x {args.steps} steps, {args.edits} toggles")
+    print(f"recompile, full         {full / args.edits * 1e6:8.1f} us/edit")
+    print(f"recompile, incremental  {incremental / args.edits * 1e6:8.1f} us/edit")
+    print(f"pads repainted          {sum(touched) / len(touched):8.1f} per edit (row: {args.steps})")
+
+    data = _song_preset()
+    for batched in (True, False):
+        target = Track()
+        calls = []
+        target.on_change(calls.append)
+        if not batched:
+            target.batch = contextlib.nullcontext  # type: ignore[method-assign]
+        t0 = time.perf_counter()
+        apply_preset(target, data)
+        elapsed = (time.perf_counter() - t0) * 1e3
+        label = "batched" if batched else "per edit"
+        print(f"apply_preset ({label:8s}) {elapsed:8.2f} ms  {len(calls):4d} listener calls, "
+              f"{target.version:4d} snapshots")
+
+
+if __name__ == "__main__":
+    main()
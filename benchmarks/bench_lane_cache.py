@@ -0,0 +1,82 @@
+# benchmarks/bench_lane_cache.py
+"""
+Re-export time after small edits, with the per-lane render cache.
+
+    python -m benchmarks.bench_lane_cache [--bars 16]
+
+Exports a busy five-lane groove (synth kick/bass plus three samples) with
+render_to_wav and a LaneCache in a temporary directory, and prints the lane
+chunks each export rendered:
+- uncached:   the plain streamed export (no cache);
+- cold:       first export with an empty cache (every chunk rendered);
+- unchanged:  the same export again (memory hits only);
+- hihat pad:  one hihat step toggled (the hihat lane re-rendered: the
+              pattern loops, so every chunk hears it);
+- bass pad:   one bass step toggled (bass envelope only; the cached
+              oscillator is reused);
+- last bar:   the last bar switched to a copy of the pattern, then one kick
+              step toggled there (only the chunks from that bar on);
+- from disk:  a fresh LaneCache on the same directory (a new session).
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+
+from engine.audio_exporter import render_to_wav
+from engine.render_cache import LaneCache
+from engine.track import Track
+
+
+def _groove() -> Track:
+    track = Track(bpm=128, steps=16)
+    track.add_pattern("kick", "X---X---X---X---")
+    track.add_pattern("snare", "----X-------X---")
+    track.add_pattern("hihat", "XXXXXXXXXXXXXXXX")
+    track.add_pattern("clap", "----X--X----X---")
+    track.add_pattern("bass", "--X-----X--X--X-")
+    return track
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bars", type=int, default=16)
+    args = parser.parse_args()
+
+    track = _groove()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "out.wav")
+        cache = LaneCache(cache_dir=os.path.join(tmp, "lanes"))
+
+        def export(label, lane_cache):
+            renders = lane_cache.renders if lane_cache is not None else 0
+            t0 = time.perf_counter()
+            render_to_wav(track, path, bars=args.bars, cache=lane_cache)
+            elapsed = (time.perf_counter() - t0) * 1e3
+            rendered = "all" if lane_cache is None else lane_cache.renders - renders
+            print(f"{label:10s} {elapsed:8.1f} ms  chunks rendered: {rendered}")
+            return elapsed
+
+        full = export("uncached", None)
+        export("cold", cache)
+        export("unchanged", cache)
+        track.toggle_step("hihat", 1)
+        hat = export("hihat pad", cache)
+        track.toggle_step("bass", 4)
+        bass = export("bass pad", cache)
+        main_pattern = track.current
+        track.select_pattern("last", copy=True)
+        track.set_song([(main_pattern, max(1, args.bars - 1)), ("last", 1)])
+        export("song", cache)
+        track.toggle_step("kick", 2)
+        last = export("last bar", cache)
+        export("from disk", LaneCache(cache_dir=os.path.join(tmp, "lanes")))
+        print(f"one-pad re-export: {hat / full:.1%} (hihat) / {bass / full:.1%} (bass) / "
+              f"{last / full:.1%} (kick, last bar) of a full render")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# benchmarks/bench_param_bus.py
+"""
+Slider automation through the parameter bus.
+
+    python -m benchmarks.bench_param_bus [--buffers 400] [--per-buffer 20]
+
+Plays a bass line on a manual pyo server and, before every buffer, sends
+--per-buffer volume and frequency values (a fast two-slider drag; Tk fires
+one command per pixel). Compares:
+- direct: synth.update() for every value, as the mixer used to;
+- bus:    LiveSequencer.update_synth(), coalesced to the latest value per
+          parameter and applied once per buffer on the audio thread.
+Prints the time spent sending updates (the UI thread) and processing audio
+(the audio thread, which now applies the bus) per buffer, and the number of
+synth updates applied.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from engine.live_sequencer import LiveSequencer
+from engine.track import Track
+
+
+def _run(mode: str, buffers: int, per_buffer: int):
+    track = Track(bpm=128)
+    track.add_pattern("bass", "XXXXXXXXXXXXXXXX")
+    sequencer = LiveSequencer(track, audio="manual", capture_seconds=0)
+    synth = sequencer.bass_synth
+    send_s = process_s = 0.0
+    updates = 0
+    sequencer.start()
+    for k in range(buffers):
+        t0 = time.perf_counter()
+        for j in range(per_buffer):
+            x = ((k * per_buffer + j) % 200) / 200.0  # sawtooth drag
+            for param, value in (("volume", 0.2 + 0.8 * x), ("freq", 40.0 + 60.0 * x)):
+                if mode == "direct":
+                    synth.update(param, value)
+                    updates += 1
+                else:
+                    sequencer.update_synth(instrument="bass", param=param, value=value)
+        send_s += time.perf_counter() - t0
+        t0 = time.perf_counter()
+        sequencer.server.process()
+        process_s += time.perf_counter() - t0
+    if mode == "bus":
+        updates = sequencer.params.applied
+    sequencer.stop()
+    sequencer.shutdown()
+    return send_s / buffers, process_s / buffers, updates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--buffers", type=int, default=400)
+    parser.add_argument("--per-buffer", type=int, default=20)
+    args = parser.parse_args()
+
+    sent = args.buffers * args.per_buffer * 2
+    for mode in ("direct", "bus"):
+        send, process, updates = _run(mode, args.buffers, args.per_buffer)
+        print(f"{mode:6s} send {send * 1e6:7.1f} us + process {process * 1e6:7.1f} us "
+              f"= {(send + process) * 1e6:7.1f} us per buffer  updates applied {updates}/{sent}")
+
+
+if __name__ == "__main__":
+    main()
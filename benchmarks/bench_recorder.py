@@ -0,0 +1,84 @@
+# benchmarks/bench_recorder.py
+"""
+Background recording writer under load.
+
+    python -m benchmarks.bench_recorder [--seconds 10] [--stall-ms 0 2000 6000]
+
+Pushes `seconds` of 512-frame stereo buffers into a BlockRecorder at the
+audio clock's pace (the audio thread's side), while the file is written to a
+temporary directory. For each --stall-ms value the writer is held up that
+long once, mid-recording (a slow or busy disk): stalls shorter than the slot
+pool (POOL_SECONDS) lose nothing, longer ones drop and count blocks, and
+push() never waits either way. Also prints the bytes per second written
+against pyo's 32-bit float WAV.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from engine import recorder as recorder_module
+from engine.recorder import BlockRecorder
+
+SR = 44100
+BLOCK = 512
+
+
+def _stalling(write, stall: float):
+    """write_wav_stream() that stops reading the queue for `stall` seconds halfway."""
+    def run(path, blocks, **kwargs):
+        def slow():
+            for n, block in enumerate(blocks):
+                if n == 100 and stall:
+                    time.sleep(stall)
+                yield block
+        return write(path, slow(), **kwargs)
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--stall-ms", type=float, nargs="*", default=[0.0, 2000.0, 6000.0])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    block = rng.uniform(-0.5, 0.5, (BLOCK, 2)).astype(np.float32)
+    buffers = int(args.seconds * SR / BLOCK)
+    period = BLOCK / SR
+    write = recorder_module.write_wav_stream
+    print(f"{args.seconds:.0f}s of {BLOCK}-frame buffers ({period * 1e3:.1f} ms period), wav24")
+    try:
+        for stall in args.stall_ms:
+            recorder_module.write_wav_stream = _stalling(write, stall / 1e3)
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, "take.wav")
+                rec = BlockRecorder(path, SR, 2, BLOCK)
+                worst = total = 0.0
+                start = time.perf_counter()
+                for n in range(buffers):
+                    t = time.perf_counter()
+                    rec.push(block)
+                    spent = time.perf_counter() - t
+                    worst, total = max(worst, spent), total + spent
+                    delay = start + (n + 1) * period - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                stats = rec.close()
+                size = os.path.getsize(path)
+            print(f"stall {stall:6.0f} ms: push avg {total / buffers * 1e6:5.2f} us, worst "
+                  f"{worst * 1e6:7.1f} us; {stats.written}/{stats.blocks} written, "
+                  f"{stats.dropped} dropped, queue peak {stats.max_queued}")
+    finally:
+        recorder_module.write_wav_stream = write
+    print(f"disk: {size / (stats.written * period) / 1e3:.0f} KB/s vs {SR * 2 * 4 / 1e3:.0f} KB/s "
+          f"for 32-bit float WAV")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# benchmarks/bench_sample_bank.py
+"""
+Per-worker memory when several processes render from the same samples.
+
+    python -m benchmarks.bench_sample_bank [--workers 1 2 4 8] [--pack 48]
+
+Each worker is a fresh (spawned) process that renders one bar using every
+sample of a synthetic pack (2 s, 48 kHz mono, converted to 44.1 kHz stereo):
+- "decode": the worker decodes and converts its own copy (no cache);
+- "bank":   the worker maps one shared SampleBank file.
+Reported per worker (Linux, from /proc/self/smaps_rollup): USS, the memory
+only that worker holds, and PSS, which splits shared pages between the
+processes mapping them. With the bank, USS should stay flat as workers grow.
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing as mp
+import tempfile
+from pathlib import Path
+from typing import Dict, Tuple
+
+import numpy as np
+
+from engine.offline_renderer import render_patterns, write_wav
+from engine.sample_store import SampleBank, SampleStore, load_bank
+
+
+def _make_pack(folder: Path, count: int, seconds: float = 2.0) -> Dict[str, Path]:
+    rng = np.random.default_rng(1)
+    paths = {}
+    for i in range(count):
+        n = int(48000 * seconds)
+        decay = np.exp(-np.linspace(0, 6, n))[:, None]
+        path = folder / f"pack_{i:03d}.wav"
+        write_wav(path, 0.5 * rng.standard_normal((n, 1)) * decay, frame_rate=48000)
+        paths[f"pack_{i:03d}"] = path
+    return paths
+
+
+def _memory_kib() -> Tuple[int, int]:
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    uss = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    return uss, fields.get("Pss", 0)
+
+
+def _worker(mode: str, source, start, done, results):
+    if mode == "bank":
+        samples = source.samples  # SampleBank pickles as its path and is re-mapped here
+    else:
+        samples = load_bank(source, store=SampleStore(cache_dir=None))
+    patterns = {name: "X" + "-" * 15 for name in samples}
+    render_patterns(patterns, 120, samples)
+    start.wait()  # every worker is alive (and mapped) before anyone measures
+    results.put(_memory_kib())
+    done.wait()
+
+
+def _run(mode: str, source, workers: int) -> Tuple[float, float]:
+    ctx = mp.get_context("spawn")
+    start, done = ctx.Barrier(workers + 1), ctx.Event()
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(mode, source, start, done, results))
+             for _ in range(workers)]
+    for p in procs:
+        p.start()
+    start.wait()
+    stats = [results.get() for _ in procs]
+    done.set()
+    for p in procs:
+        p.join()
+    return (sum(u for u, _ in stats) / workers / 1024, sum(p for _, p in stats) / workers / 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--pack", type=int, default=48)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        paths = _make_pack(tmp, args.pack)
+        bank = SampleBank.build(tmp / "bank.f32", paths, store=SampleStore(cache_dir=None))
+        print(f"bank: {len(bank.samples)} samples, {bank.data.nbytes / 2**20:.1f} MiB")
+
+        for n in args.workers:
+            for mode, source in (("decode", paths), ("bank", bank)):
+                uss, pss = _run(mode, source, n)
+                print(f"{n:2d} workers  {mode:6s}  USS/worker {uss:7.1f} MiB  PSS/worker {pss:7.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
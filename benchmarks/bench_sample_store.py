@@ -0,0 +1,78 @@
+# benchmarks/bench_sample_store.py
+"""
+Load time of the shared sample store: cold, warm disk cache, warm memory.
+
+    python -m benchmarks.bench_sample_store [--pack 32] [--seconds 2]
+
+Loads assets/ plus a synthetic "user pack" of 48 kHz mono WAVs (so every
+file is resampled and widened to the 44.1 kHz stereo server format), into a
+throwaway cache directory. A second store on the same directory models the
+next app start; it should report zero decodes.
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from engine.offline_renderer import write_wav
+from engine.sample_store import SampleStore
+
+ASSETS_DIR = Path(__file__).resolve().parent.parent / "assets"
+SR = 44100
+
+
+def _make_pack(folder: Path, count: int, seconds: float):
+    rng = np.random.default_rng(1)
+    paths = []
+    for i in range(count):
+        n = int(48000 * seconds)
+        decay = np.exp(-np.linspace(0, 8, n))[:, None]
+        path = folder / f"pack_{i:03d}.wav"
+        write_wav(path, 0.5 * rng.standard_normal((n, 1)) * decay, frame_rate=48000)
+        paths.append(path)
+    return paths
+
+
+def _load_all(store: SampleStore, paths) -> float:
+    t0 = time.perf_counter()
+    for p in paths:
+        store.get(p, SR, 2)
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pack", type=int, default=32, help="synthetic pack size")
+    parser.add_argument("--seconds", type=float, default=2.0, help="length of each pack sample")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        paths = sorted(ASSETS_DIR.glob("*.wav")) + _make_pack(tmp, args.pack, args.seconds)
+        cache = tmp / "cache"
+
+        cold = SampleStore(cache_dir=cache)
+        t_cold = _load_all(cold, paths)
+        t_mem = _load_all(cold, paths)
+
+        warm = SampleStore(cache_dir=cache)  # next process start
+        t_disk = _load_all(warm, paths)
+
+        small = SampleStore(cache_dir=cache, memory_budget=8 * 1024 * 1024)
+        _load_all(small, paths)
+
+        print(f"{len(paths)} files")
+        print(f"cold (decode+convert)  {t_cold * 1000:8.1f} ms  decodes={cold.decodes}")
+        print(f"warm disk cache        {t_disk * 1000:8.1f} ms  decodes={warm.decodes} disk hits={warm.disk_hits}")
+        print(f"warm memory            {t_mem * 1000:8.1f} ms  memory hits={cold.memory_hits}")
+        print(f"8 MiB memory budget    resident {small.memory_bytes / 2**20:6.1f} MiB "
+              f"(unbounded: {cold.memory_bytes / 2**20:6.1f} MiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# benchmarks/bench_scheduler.py
+"""
+Measure timing drift of the thread-transport scheduler.
+
+    python -m benchmarks.bench_scheduler [--minutes 10] [--bpm 120]
+    python -m benchmarks.bench_scheduler --realtime 30
+
+By default a virtual clock simulates a long session in well under a second:
+every sleep overshoots by 0-2 ms and every step costs 0.3 ms of work. The old
+relative-sleep loop is run on the same clock for comparison.
+
+Drift is the change in (fire time - ideal time) between the first and the
+last minute of the run; the deadline scheduler should report ~0, and the
+command exits non-zero if it exceeds 0.1 ms.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import List
+
+from engine.live_sequencer import _DeadlineScheduler
+
+STEP_WORK = 0.0003
+MAX_OVERSHOOT = 0.002
+
+
+class _VirtualClock:
+    def __init__(self, seed: int = 1):
+        self.now = 0.0
+        self._rng = random.Random(seed)
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += max(0.0, seconds) + self._rng.uniform(0.0, MAX_OVERSHOOT)
+
+    def work(self):
+        self.now += STEP_WORK
+
+
+def _run_deadline(clock: _VirtualClock, interval: float, steps: int) -> List[float]:
+    sched = _DeadlineScheduler(clock=clock.time, sleep=clock.sleep)
+    sched.start(60.0 / interval / 4.0)
+    origin = clock.time()
+    errors = []
+    for n in range(steps):
+        delay = sched.wait_next()
+        errors.append(clock.time() + delay - (origin + n * interval))
+        clock.work()
+    return errors
+
+
+def _run_relative(clock: _VirtualClock, interval: float, steps: int) -> List[float]:
+    """The previous _run_loop timing: sleep(interval - elapsed) after each step."""
+    origin = clock.time()
+    errors = []
+    for n in range(steps):
+        start = clock.time()
+        errors.append(start - (origin + n * interval))
+        clock.work()
+        clock.sleep(max(0.0, interval - (clock.time() - start)))
+    return errors
+
+
+def _run_realtime(interval: float, steps: int) -> List[float]:
+    sched = _DeadlineScheduler()
+    sched.start(60.0 / interval / 4.0)
+    origin = time.perf_counter()
+    errors = []
+    for n in range(steps):
+        delay = sched.wait_next()
+        errors.append(time.perf_counter() + delay - (origin + n * interval))
+    return errors
+
+
+def _drift(errors: List[float], per_minute: int) -> float:
+    window = max(1, min(per_minute, len(errors) // 2))
+    head = sum(errors[:window]) / window
+    tail = sum(errors[-window:]) / window
+    return tail - head
+
+
+def _report(name: str, errors: List[float], per_minute: int) -> float:
+    drift = _drift(errors, per_minute)
+    worst = max(abs(e) for e in errors)
+    print(f"{name:18s} drift={drift * 1000:9.3f} ms  worst |error|={worst * 1000:9.3f} ms")
+    return drift
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--minutes", type=float, default=10.0)
+    parser.add_argument("--bpm", type=float, default=120.0)
+    parser.add_argument("--realtime", type=float, metavar="SECONDS",
+                        help="run the real scheduler on perf_counter for this long instead")
+    args = parser.parse_args()
+
+    interval = 60.0 / args.bpm / 4.0
+    per_minute = int(60.0 / interval)
+
+    if args.realtime:
+        steps = int(args.realtime / interval)
+        drift = _report("deadline (real)", _run_realtime(interval, steps), per_minute)
+    else:
+        steps = int(args.minutes * per_minute)
+        print(f"{steps} steps @ {args.bpm:g} BPM ({args.minutes:g} min simulated)")
+        _report("relative sleep", _run_relative(_VirtualClock(), interval, steps), per_minute)
+        drift = _report("deadline", _run_deadline(_VirtualClock(), interval, steps), per_minute)
+
+    raise SystemExit(0 if abs(drift) < 1e-4 else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# benchmarks/bench_snapshot.py
+"""
+Edit-to-playback latency and cost of Track snapshots.
+
+    python -m benchmarks.bench_snapshot [--edits 2000]
+
+Drives LiveSequencer._on_clock_step by hand (offline server, no-op
+triggers) with the playhead thread running, as in a live session (it
+recompiles published snapshots concurrently), and toggles a random step of
+a random lane at a random point in the bar. Reports:
+- latency: 16ths from the edit until the sequencer plays from the new
+  snapshot (bar-top pickup would average half a bar);
+- the sequencer's per-step cost with and without a pending edit;
+- the cost of publishing one snapshot (Track.toggle_step) for a small
+  groove and for 128 lanes x 256 steps.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import threading
+import time
+
+from engine.live_sequencer import LiveSequencer
+from engine.track import Track
+
+KNOWN = ("bass", "kick", "hihat", "clap", "snare")
+
+
+def _noop(delay: float = 0.0):
+    pass
+
+
+def _publish_us(lanes: int, steps: int, edits: int = 200) -> float:
+    rng = random.Random(2)
+    track = Track(steps=steps)
+    for n in range(lanes):
+        track.add_pattern(f"inst{n}", "".join(rng.choice("X---") for _ in range(steps)))
+    t0 = time.perf_counter()
+    for _ in range(edits):
+        track.toggle_step(f"inst{rng.randrange(lanes)}", rng.randrange(steps))
+    return (time.perf_counter() - t0) / edits * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--edits", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    track = Track(steps=16)
+    for name in KNOWN:
+        track.add_pattern(name, "".join(rng.choice("X---") for _ in range(16)))
+    sequencer = LiveSequencer(track, audio="offline")
+    try:
+        sequencer._play_fns = {name: _noop for name in KNOWN}
+        sequencer._song_tables()
+        sequencer.running = True
+        playhead = threading.Thread(target=sequencer._playhead_loop, daemon=True)
+        playhead.start()
+
+        latencies = []
+        edited_ns = 0.0
+        for _ in range(args.edits):
+            for _ in range(rng.randrange(16)):
+                sequencer._on_clock_step()
+            track.toggle_step(rng.choice(KNOWN), rng.randrange(16))
+            t0 = time.perf_counter()
+            sequencer._on_clock_step()
+            edited_ns += (time.perf_counter() - t0) * 1e9
+            # Played from the new snapshot iff the bar table was swapped on this step
+            latencies.append(0 if sequencer._bar_snapshot is track.snapshot else 1)
+        edited_ns /= args.edits
+
+        count = 100000
+        t0 = time.perf_counter()
+        for _ in range(count):
+            sequencer._on_clock_step()
+        idle_ns = (time.perf_counter() - t0) / count * 1e9
+    finally:
+        sequencer.running = False
+        sequencer.shutdown()
+
+    late = sum(latencies)
+    print(f"{args.edits} edits: played from the new snapshot on the next 16th in "
+          f"{args.edits - late}/{args.edits} (bar-top pickup: ~8 16ths on average)")
+    print(f"step, no edit pending   {idle_ns:8.0f} ns")
+    print(f"step, edit pending      {edited_ns:8.0f} ns  (recompiles only the edited pattern)")
+    print(f"publish (5 x 16)        {_publish_us(5, 16):8.1f} us/edit")
+    print(f"publish (128 x 256)     {_publish_us(128, 256):8.1f} us/edit")
+
+
+if __name__ == "__main__":
+    main()
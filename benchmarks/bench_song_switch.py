@@ -0,0 +1,89 @@
+# benchmarks/bench_song_switch.py
+"""
+Cost of song mode with a large pattern bank.
+
+    python -m benchmarks.bench_song_switch [--patterns 500] [--repeats 2]
+
+Builds a bank of random 16-step patterns for the five live instruments and a
+song that plays each one `--repeats` times, on an offline LiveSequencer with
+no-op triggers. Reports:
+- the one-off compile of the whole arrangement (LiveSequencer._song_tables);
+- the recompile after editing one pattern (only that pattern is rebuilt);
+- the per-bar switch on the audio thread (LiveSequencer._next_bar_table),
+  against building the next pattern's table at the switch point instead.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from engine.live_sequencer import LiveSequencer, compile_step_table
+from engine.track import Track
+
+KNOWN = ("bass", "kick", "hihat", "clap", "snare")
+
+
+def _noop(delay: float = 0.0):
+    pass
+
+
+def _make_song(patterns: int, repeats: int, density: float = 0.3, seed: int = 1) -> Track:
+    rng = random.Random(seed)
+    track = Track(steps=16)
+    for p in range(patterns):
+        track.select_pattern(f"P{p:04d}")
+        for name in KNOWN:
+            track.add_pattern(name, "".join("X" if rng.random() < density else "-" for _ in range(16)))
+    track.set_song([(name, repeats) for name in track.get_pattern_names() if name != "A"])
+    return track
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--patterns", type=int, default=500)
+    parser.add_argument("--repeats", type=int, default=2)
+    parser.add_argument("--switches", type=int, default=200000)
+    args = parser.parse_args()
+
+    track = _make_song(args.patterns, args.repeats)
+    sequencer = LiveSequencer(track, audio="offline")
+    try:
+        sequencer._play_fns = {name: _noop for name in KNOWN}
+        bars = len(track.song_bars())
+
+        t0 = time.perf_counter()
+        sequencer._song_tables()
+        cold_ms = (time.perf_counter() - t0) * 1e3
+
+        track.add_pattern("kick", "X---" * 4)  # edits the current (last) pattern
+        t0 = time.perf_counter()
+        sequencer._song_tables()
+        edit_us = (time.perf_counter() - t0) * 1e6
+
+        t0 = time.perf_counter()
+        for _ in range(args.switches):
+            sequencer._next_bar_table()
+        switch_ns = (time.perf_counter() - t0) / args.switches * 1e9
+
+        # Building the next bar's table at the switch point instead of ahead of it
+        names = track.song_bars()
+        fns = sequencer._play_fns
+        count = min(args.switches, 20000)
+        t0 = time.perf_counter()
+        for b in range(count):
+            compile_step_table(track.get_matrix(names[b % bars]).step_names(), fns)
+        build_ns = (time.perf_counter() - t0) / count * 1e9
+    finally:
+        sequencer.shutdown()
+
+    print(f"{args.patterns} patterns, song of {bars} bars")
+    print(f"compile arrangement   {cold_ms:9.2f} ms  (once, off the audio thread)")
+    print(f"recompile after edit  {edit_us:9.1f} us")
+    print(f"switch (precompiled)  {switch_ns:9.0f} ns/bar")
+    print(f"switch (build at bar) {build_ns:9.0f} ns/bar  ({build_ns / switch_ns:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
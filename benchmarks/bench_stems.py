@@ -0,0 +1,80 @@
+# benchmarks/bench_stems.py
+"""
+Stem export: one pass vs re-rendering with the other lanes muted.
+
+    python -m benchmarks.bench_stems [--bars 16] [--workers 4]
+
+- full mix:   render_to_wav of the whole groove (no lane cache);
+- solo x N:   the old route, one render_to_wav per instrument with every
+              other lane removed, plus the full mix;
+- stems:      render_stems(), the mix and every stem in one pass with the
+              writes on a thread pool.
+Also checks that the stem export's master.wav matches the full mix.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+from engine.audio_exporter import render_stems, render_to_wav
+from engine.track import Track
+
+GROOVE = {
+    "kick": "X---X---X---X---",
+    "snare": "----X-------X---",
+    "hihat": "XXXXXXXXXXXXXXXX",
+    "clap": "----X--X----X---",
+    "bass": "--X-----X--X--X-",
+}
+
+
+def _track(lanes) -> Track:
+    track = Track(bpm=128, steps=16)
+    for name in lanes:
+        track.add_pattern(name, GROOVE[name])
+    return track
+
+
+def _read(path) -> np.ndarray:
+    with wave.open(str(path), "rb") as w:
+        return np.frombuffer(w.readframes(w.getnframes()), dtype=np.int16).astype(np.int32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bars", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        render_to_wav(_track(GROOVE), os.path.join(tmp, "mix.wav"), bars=args.bars)
+        full = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        render_to_wav(_track(GROOVE), os.path.join(tmp, "mix.wav"), bars=args.bars)
+        for name in GROOVE:
+            render_to_wav(_track([name]), os.path.join(tmp, f"solo_{name}.wav"), bars=args.bars)
+        solo = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        paths = render_stems(_track(GROOVE), os.path.join(tmp, "stems"), bars=args.bars,
+                             workers=args.workers)
+        stems = time.perf_counter() - t0
+
+        diff = np.abs(_read(paths["master"]) - _read(os.path.join(tmp, "mix.wav"))).max()
+        print(f"{len(GROOVE)} lanes, {args.bars} bars")
+        print(f"full mix   {full * 1e3:8.1f} ms")
+        print(f"solo x {len(GROOVE)}  {solo * 1e3:8.1f} ms  ({solo / full:.2f}x full)")
+        print(f"stems      {stems * 1e3:8.1f} ms  ({stems / full:.2f}x full)")
+        print(f"master.wav vs full mix: max {diff} LSB")
+
+
+if __name__ == "__main__":
+    main()
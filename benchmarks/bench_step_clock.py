@@ -0,0 +1,56 @@
+# benchmarks/bench_step_clock.py
+"""
+Hit timing error of the audio-clock transport, by buffer size.
+
+    python -m benchmarks.bench_step_clock [--minutes 10] [--bpm 128] [--sr 44100]
+
+Runs _StepClock (no server needed) as the pyo callback would, one tick per
+buffer, and compares the buffer each step fires on with the step's exact
+frame. pyo only starts triggers on buffer boundaries, so the error can't go
+below half a buffer; it must not grow over the run either. Prints the worst
+early/late error and the mean per buffer size, and exits non-zero if any
+step is off by more than half a buffer.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+
+import numpy as np
+
+from engine.live_sequencer import _StepClock
+
+BUFFER_SIZES = (64, 128, 256, 512, 1024)
+
+
+def _errors(bufsize: int, sr: int, bpm: float, steps: int) -> np.ndarray:
+    clock = _StepClock(sr, bufsize)
+    fired = []
+    clock.start(bpm, limit=steps)
+    while clock.running:
+        clock.tick(lambda: fired.append(clock.frame))
+    exact = np.arange(len(fired)) * (sr * 60.0 / bpm / 4.0)
+    return (np.array(fired) - exact) / sr * 1e3  # ms; negative: early
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--minutes", type=float, default=10.0)
+    parser.add_argument("--bpm", type=float, default=128.0)
+    parser.add_argument("--sr", type=int, default=44100)
+    args = parser.parse_args()
+
+    steps = int(args.minutes * args.bpm * 4)
+    failed = False
+    for bufsize in BUFFER_SIZES:
+        err = _errors(bufsize, args.sr, args.bpm, steps)
+        bound = bufsize / 2.0 / args.sr * 1e3
+        failed |= bool(np.abs(err).max() > bound + 1e-9)
+        print(f"buffer {bufsize:5d}  early {-err.min():6.2f} ms  late {err.max():6.2f} ms  "
+              f"mean {err.mean():+6.3f} ms  (bound +-{bound:.2f} ms, {len(err)} steps)")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# benchmarks/bench_step_matrix.py
+"""
+Memory and access cost of the array-backed step matrix at large sizes.
+
+    python -m benchmarks.bench_step_matrix [--lanes 128] [--steps 256]
+
+Fills a Track with random lanes and reports, for each size up to the given
+one: bytes per pattern (StepMatrix cells vs the old dict of "X"/"-" strings
+with the same information, which had no room for velocity/pitch/offset),
+single-step reads (gate and velocity of one cell), the full step table
+compile, and the cost of one toggle (publishing a snapshot, which only
+rebuilds the toggled step). Everything should scale with cells, not with
+any per-step parsing.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+
+from engine.track import Track
+
+
+def _fill(lanes: int, steps: int, density: float = 0.25, seed: int = 1) -> Track:
+    rng = random.Random(seed)
+    track = Track(steps=steps)
+    for n in range(lanes):
+        track.add_pattern(f"inst{n}", "".join("X" if rng.random() < density else "-" for _ in range(steps)))
+    return track
+
+
+def _string_bytes(patterns) -> int:
+    return sys.getsizeof(patterns) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in patterns.items())
+
+
+def _per_op_ns(fn, count: int) -> float:
+    t0 = time.perf_counter()
+    for i in range(count):
+        fn(i)
+    return (time.perf_counter() - t0) / count * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lanes", type=int, default=128)
+    parser.add_argument("--steps", type=int, default=256)
+    parser.add_argument("--reads", type=int, default=200000)
+    args = parser.parse_args()
+
+    sizes = sorted({(16, 16), (min(args.lanes, 32), min(args.steps, 64)), (args.lanes, args.steps)})
+    for lanes, steps in sizes:
+        track = _fill(lanes, steps)
+        matrix = track.get_matrix()
+        cells = matrix.cells
+        strings = _string_bytes(track.get_patterns())
+
+        def read(i):
+            cell = cells[i % lanes, i % steps]
+            return cell["gate"], cell["velocity"]
+
+        def toggle(i):
+            track.toggle_step(matrix.names[i % lanes], i % steps)
+
+        read_ns = _per_op_ns(read, args.reads)
+        t0 = time.perf_counter()
+        for i in range(20):
+            matrix.step_names()
+        compile_us = (time.perf_counter() - t0) / 20 * 1e6
+        toggle_ns = _per_op_ns(toggle, 2000)
+
+        print(f"{lanes:4d} lanes x {steps:4d} steps  matrix {cells.nbytes / 1024:7.1f} KiB  "
+              f"strings {strings / 1024:7.1f} KiB  read {read_ns:5.0f} ns  "
+              f"step table {compile_us:8.1f} us  toggle {toggle_ns:6.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# benchmarks/bench_stream_export.py
+"""
+Peak memory of long exports: streamed blocks vs one whole-length buffer.
+
+    python -m benchmarks.bench_stream_export [--minutes 0.25 1 4] [--block 65536]
+
+Renders a busy 16-step groove looped for each length. "stream" is the
+uncached exporter path (stream_patterns -> write_wav_stream). "cached" is
+the default export path (stream_song_cached with a fresh LaneCache in a
+temporary directory), which caches every lane chunk by chunk; its peak
+includes the cache's in-memory LRU (render_cache.MEMORY_BUDGET). "buffer"
+collects the streamed blocks into one array before writing, like a
+whole-length mixdown would. Peak is measured with tracemalloc, which sees
+NumPy's allocations. Streamed and cached peaks should stay flat as the
+length grows.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from engine import audio_exporter
+from engine.offline_renderer import (
+    output_format,
+    step_duration_ms,
+    stream_patterns,
+    write_wav,
+    write_wav_stream,
+)
+from engine.offline_synths import SYNTH_LANES, make_voices
+from engine.render_cache import LaneCache, stream_song_cached
+from engine.sample_store import load_bank
+from engine.track import Track
+
+BPM = 128
+
+
+def _groove() -> Track:
+    track = Track(bpm=BPM, steps=16)
+    track.add_pattern("kick", "X---X---X---X---")
+    track.add_pattern("snare", "----X-------X---")
+    track.add_pattern("hihat", "XXXXXXXXXXXXXXXX")
+    track.add_pattern("clap", "----X--X----X---")
+    track.add_pattern("bass", "--X-----X--X--X-")
+    return track
+
+
+def _measure(track: Track, bars: int, block: int, mode: str, path: str):
+    patterns = track.get_patterns()
+    lanes = [n for n in patterns if n not in SYNTH_LANES]
+    samples = load_bank(audio_exporter.SAMPLE_PATHS, names=lanes)
+    frame_rate, channels, width = output_format(samples)
+    voices = make_voices(track, sr=frame_rate)
+
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    if mode == "cached":
+        cache = LaneCache(cache_dir=os.path.join(os.path.dirname(path), "lanes"))
+        blocks = stream_song_cached([patterns] * bars, BPM, samples, cache, frame_rate=frame_rate,
+                                    channels=channels, voices=voices, block=block)
+    else:
+        blocks = stream_patterns(patterns, BPM, samples, bars=bars, frame_rate=frame_rate,
+                                 channels=channels, voices=voices, block=block)
+    if mode == "buffer":
+        write_wav(path, np.concatenate(list(blocks)), frame_rate=frame_rate, sample_width=width)
+    else:
+        write_wav_stream(path, blocks, frame_rate=frame_rate, sample_width=width, channels=channels)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--minutes", type=float, nargs="+", default=[0.25, 1.0, 4.0])
+    parser.add_argument("--block", type=int, default=65536)
+    args = parser.parse_args()
+
+    track = _groove()
+    bar_seconds = step_duration_ms(BPM) * 16 / 1000.0
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "long.wav")
+        for minutes in args.minutes:
+            bars = max(1, int(round(minutes * 60 / bar_seconds)))
+            for mode in ("stream", "cached", "buffer"):
+                peak, elapsed = _measure(track, bars, args.block, mode, path)
+                size = os.path.getsize(path)
+                print(f"{minutes:5.1f} min ({bars:4d} bars)  {mode:6s}  peak {peak / 2**20:8.1f} MiB  "
+                      f"{elapsed:6.2f}s  wav {size / 2**20:7.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
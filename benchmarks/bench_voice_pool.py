@@ -0,0 +1,110 @@
+# benchmarks/bench_voice_pool.py
+"""
+Trigger cost of the one-shot sample players on 32nd-note rolls.
+
+    python -m benchmarks.bench_voice_pool [--seconds 8] [--bpm 140] [--voices 16]
+
+HatSynth, ClapSynth and SnareSynth all roll 32nd notes on an offline Server,
+triggered from the server callback (the audio-clock transport path). Each hit
+is timed around play(), and Python allocations are traced with tracemalloc.
+The previous implementation (a new SfPlayer per hit, kept in a 64-deep deque)
+runs on the same schedule for comparison.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from collections import deque
+from typing import Any, Callable, Deque, List
+
+from engine.live_sequencer import _silence_pyo
+from engine.synths import ClapSynth, HatSynth, SnareSynth, _asset
+
+with _silence_pyo():
+    from pyo import Server, SfPlayer, Sig
+
+SR = 44100
+BUFFERSIZE = 256
+FILES = ("hihat.wav", "clap.wav", "snare.wav")
+
+
+class _LegacyOneShot:
+    """The previous _OneShotSample.play: one SfPlayer per hit."""
+
+    def __init__(self, server, filename: str, volume: float = 1.0):
+        self.volume = Sig(float(volume))
+        self.file_path = _asset(filename)
+        self._players: Deque[Any] = deque(maxlen=64)
+
+    def play(self, delay: float = 0.0):
+        p = SfPlayer(self.file_path, speed=1, loop=False, mul=self.volume).out(delay=delay)
+        self._players.append(p)
+
+
+def _run(make_players: Callable[[Any], List[Any]], seconds: float, bpm: float):
+    fd, scratch = tempfile.mkstemp(suffix=".wav")
+    os.close(fd)
+    times: List[float] = []
+    with _silence_pyo():
+        server = Server(sr=SR, nchnls=2, buffersize=BUFFERSIZE, duplex=0, audio="offline").boot()
+        server.recordOptions(dur=seconds, filename=scratch)
+        players = make_players(server)
+        streams_before = server.getNumberOfStreams()
+
+        step = SR * 60.0 / bpm / 8  # 32nd note in frames
+        state = {"block": 0, "next": 0.0}
+
+        def on_block():
+            start = state["block"] * BUFFERSIZE
+            while state["next"] < start + BUFFERSIZE:
+                for p in players:
+                    t0 = time.perf_counter()
+                    p.play()
+                    times.append(time.perf_counter() - t0)
+                state["next"] += step
+            state["block"] += 1
+
+        server.setCallback(on_block)
+        tracemalloc.start()
+        server.start()
+        _, peak = tracemalloc.get_traced_memory()
+        allocated = tracemalloc.take_snapshot().statistics("filename")
+        tracemalloc.stop()
+        new_streams = server.getNumberOfStreams() - streams_before
+        server.shutdown()
+    os.remove(scratch)
+    live_bytes = sum(s.size for s in allocated)
+    return times, new_streams, live_bytes, peak
+
+
+def _report(name: str, times: List[float], new_streams: int, live_bytes: int, peak: int):
+    hits = len(times)
+    ordered = sorted(times)
+    p99 = ordered[int(0.99 * (hits - 1))]
+    print(f"{name:10s} {hits:5d} hits  mean {statistics.mean(times) * 1e6:7.1f} us  "
+          f"p99 {p99 * 1e6:7.1f} us  max {ordered[-1] * 1e6:7.1f} us  "
+          f"new streams/hit {new_streams / hits:5.2f}  "
+          f"traced {live_bytes / 1024:7.1f} KiB (peak {peak / 1024:7.1f} KiB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=8.0)
+    parser.add_argument("--bpm", type=float, default=140.0)
+    parser.add_argument("--voices", type=int, default=16)
+    args = parser.parse_args()
+
+    legacy = _run(lambda s: [_LegacyOneShot(s, f) for f in FILES], args.seconds, args.bpm)
+    pooled = _run(lambda s: [HatSynth(s, voices=args.voices), ClapSynth(s, voices=args.voices),
+                             SnareSynth(s, voices=args.voices)], args.seconds, args.bpm)
+    _report("SfPlayer", *legacy)
+    _report(f"pool x{args.voices}", *pooled)
+
+
+if __name__ == "__main__":
+    main()
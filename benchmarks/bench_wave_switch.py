@@ -0,0 +1,71 @@
+# benchmarks/bench_wave_switch.py
+"""
+BassSynth waveform switching while playing.
+
+    python -m benchmarks.bench_wave_switch [--buffers 800] [--buffersize 512]
+
+Holds a bass note on every step and drives a manual pyo server buffer by
+buffer, switching the wave (saw -> square -> sine -> saw ...) every 100
+buffers. Prints:
+- the time of update("wave", ...) itself (only gain targets are set);
+- the server's time per buffer;
+- the largest sample-to-sample step within a buffer of each switch against
+  the largest one in the steady stretch before it (a click shows up as a
+  step well above the steady one).
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from engine.live_sequencer import LiveSequencer
+from engine.synths import WAVES
+from engine.track import Track
+
+EVERY = 100
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--buffers", type=int, default=800)
+    parser.add_argument("--buffersize", type=int, default=512)
+    args = parser.parse_args()
+
+    track = Track(bpm=128)
+    track.add_pattern("bass", "XXXXXXXXXXXXXXXX")
+    sequencer = LiveSequencer(track, audio="manual", buffersize=args.buffersize, capture_seconds=0)
+    bs = args.buffersize
+    out = np.empty((args.buffers * bs, 2), dtype=np.float32)
+    switches = []
+    update_s = process_s = 0.0
+    sequencer.start()
+    for k in range(args.buffers):
+        if k and k % EVERY == 0:
+            wave = WAVES[(k // EVERY) % len(WAVES)]
+            t0 = time.perf_counter()
+            sequencer.bass_synth.update("wave", wave)
+            update_s += time.perf_counter() - t0
+            switches.append((k, wave))
+        t0 = time.perf_counter()
+        sequencer.server.process()
+        process_s += time.perf_counter() - t0
+        out[k * bs:(k + 1) * bs] = sequencer._output
+    sequencer.stop()
+    sequencer.shutdown()
+
+    # The tap holds each buffer right after process()
+    steps = np.abs(np.diff(out[:, 0]))
+    print(f"update(wave)   {update_s / max(1, len(switches)) * 1e6:8.1f} us")
+    print(f"per buffer     {process_s / args.buffers * 1e6:8.1f} us")
+    for k, wave in switches:
+        at = k * bs
+        switch = steps[at - bs:at + 2 * bs].max()
+        steady = steps[at - EVERY * bs // 2:at - bs].max()
+        print(f"-> {wave:7s} max step {switch:.3f} (steady {steady:.3f})")
+
+
+if __name__ == "__main__":
+    main()
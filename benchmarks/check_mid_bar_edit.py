@@ -0,0 +1,90 @@
+# benchmarks/check_mid_bar_edit.py
+"""
+Check that an edit ahead of the playhead plays in the current bar.
+
+    python -m benchmarks.check_mid_bar_edit [--timings 8]
+
+For each transport (audio clock on a manual server, and the thread
+transport), starts a kick-only groove with the playhead thread running,
+waits until bar 2 reaches step 2, then toggles snare step 8 on, at
+--timings different points before step 3. The snare must fire at step 8 of
+that same bar every time. Triggers are recorded instead of played.
+Exits non-zero if any edit was missed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+
+from engine.live_sequencer import LiveSequencer
+from engine.track import Track
+
+EDIT_STEP = 8
+AT_STEP = 2
+
+
+def _sequencer(transport: str):
+    track = Track(bpm=200, steps=16)
+    track.add_pattern("kick", "X---X---X---X---")
+    track.add_pattern("snare", "-" * 16)
+    sequencer = LiveSequencer(track, audio="manual", buffersize=64, transport=transport,
+                              capture_seconds=0)
+    hits = []
+
+    def recorder(name):
+        def play(delay: float = 0.0):
+            hits.append((name, sequencer._song_bar, sequencer.step))
+        return play
+    sequencer._play_fns = {name: recorder(name) for name in ("kick", "snare")}
+    return track, sequencer, hits
+
+
+def _wait_step(sequencer, bar: int, step: int, advance):
+    while not (sequencer._song_bar == bar and sequencer.playhead()[1] == step):
+        advance()
+
+
+def _trial(transport: str, timing: int, timings: int) -> bool:
+    track, sequencer, hits = _sequencer(transport)
+    try:
+        if transport == "audio":
+            def advance():
+                sequencer.server.process()
+                time.sleep(0.0005)  # let the playhead thread run between buffers
+        else:
+            def advance():
+                time.sleep(0.001)
+        sequencer.start()
+        _wait_step(sequencer, 2, AT_STEP, advance)
+        # Spread the edit over the gap before the next step
+        if transport == "audio":
+            step_buffers = int(sequencer._clock._step_frames // sequencer._clock.bufsize)
+            for _ in range(timing * step_buffers // timings):
+                advance()
+        else:
+            time.sleep(60.0 / 200 / 4 * timing / timings)
+        track.toggle_step("snare", EDIT_STEP)
+        _wait_step(sequencer, 3, 0, advance)
+    finally:
+        sequencer.stop()
+        sequencer.shutdown()
+    return ("snare", 2, EDIT_STEP) in hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--timings", type=int, default=8)
+    args = parser.parse_args()
+
+    failed = 0
+    for transport in ("audio", "thread"):
+        played = sum(_trial(transport, t, args.timings) for t in range(args.timings))
+        failed += args.timings - played
+        print(f"{transport:6s} mid-bar edit played in the same bar: {played}/{args.timings}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
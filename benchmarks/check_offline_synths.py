@@ -0,0 +1,119 @@
+# benchmarks/check_offline_synths.py
+"""
+Check the NumPy KickVoice / BassVoice against the real pyo synths rendered on
+an offline Server, and time both.
+
+    python -m benchmarks.check_offline_synths [--seconds 2]
+
+Hits are placed on pyo buffer boundaries so both sides trigger on the same
+sample. Stated tolerances (absolute, output units):
+- kick:         max error < 1e-3
+- bass square:  max error < 1e-2
+- bass sine:    max error < 1e-2  (pyo's float32 Sine pointer drifts ~1e-5 cycles/s)
+- bass saw:     99.9th percentile error < 1e-2; single samples may differ at
+                saw resets, where pyo's float32 pointers wrap one sample apart
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from engine.live_sequencer import _silence_pyo
+from engine.offline_synths import BassVoice, KickVoice
+from engine.synths import BassSynth, KickSynth
+
+with _silence_pyo():
+    from pyo import NewTable, Server, TableRec
+
+SR = 44100
+BUFFERSIZE = 64
+
+CASES = [
+    ("kick", lambda s: KickSynth(s), lambda: KickVoice(), "max", 1e-3),
+    ("kick decay=0.6", lambda s: KickSynth(s, base_freq=70, decay=0.6),
+     lambda: KickVoice(70, 0.6), "max", 1e-3),
+    ("bass saw", lambda s: BassSynth(s), lambda: BassVoice(), "p99.9", 1e-2),
+    ("bass square", lambda s: BassSynth(s, freq=80, wave="square"),
+     lambda: BassVoice(80, "square"), "max", 1e-2),
+    ("bass sine", lambda s: BassSynth(s, wave="sine", decay=0.8),
+     lambda: BassVoice(60, "sine", 0.8), "max", 1e-2),
+]
+
+
+def _hit_offsets(frames: int, bpm: int = 120):
+    """Every other 16th, snapped to the pyo buffer grid, after a short lead-in."""
+    step = SR * 60.0 / bpm / 4
+    lead = 4096
+    offsets = []
+    i = 0
+    while True:
+        pos = lead + BUFFERSIZE * int(i * step / BUFFERSIZE)
+        if pos >= frames:
+            return offsets
+        offsets.append(pos)
+        i += 2
+
+
+def _render_pyo(make_synth, offsets, frames: int) -> np.ndarray:
+    fd, scratch = tempfile.mkstemp(suffix=".wav")
+    os.close(fd)
+    with _silence_pyo():
+        server = Server(sr=SR, nchnls=1, buffersize=BUFFERSIZE, duplex=0, audio="offline").boot()
+        # the offline server always writes a file; the TableRec is what we compare
+        server.recordOptions(dur=frames / SR, filename=scratch)
+        synth = make_synth(server)
+        table = NewTable(length=frames / SR)
+        rec = TableRec(synth.output, table).play()
+
+        hits = set(offsets)
+        counter = {"block": 0}
+
+        def on_block():
+            if counter["block"] * BUFFERSIZE in hits:
+                synth.play()
+            counter["block"] += 1
+
+        server.setCallback(on_block)
+        server.start()
+        data = np.asarray(table.getTable(), dtype=np.float64)[:frames]
+        del rec
+        server.shutdown()
+    os.remove(scratch)
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    frames = int(args.seconds * SR)
+    offsets = _hit_offsets(frames)
+    failed = False
+
+    for name, make_synth, make_voice, metric, tol in CASES:
+        t0 = time.perf_counter()
+        ref = _render_pyo(make_synth, offsets, frames)
+        t_pyo = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        out = make_voice().render_hits(offsets, frames)
+        t_np = time.perf_counter() - t0
+
+        err = np.abs(ref - out[:len(ref)])
+        value = float(err.max() if metric == "max" else np.percentile(err, 99.9))
+        ok = value < tol
+        failed |= not ok
+        print(f"{name:16s} {metric:>6s} err={value:.2e} (tol {tol:.0e}) {'ok' if ok else 'FAIL'}  "
+              f"pyo offline {args.seconds / t_pyo:6.0f}x  numpy {args.seconds / t_np:6.0f}x realtime")
+
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -51,8 +51,8 @@ def parse_command(cmd, track):
             if not hasattr(track, "bass_synth_settings"):
                 track.bass_synth_settings = {}
             track.bass_synth_settings[param] = value
-            if hasattr(track, "sequencer") and hasattr(track.sequencer, "bass_synth"):
-                track.sequencer.bass_synth.update(param, value)
+            if hasattr(track, "sequencer"):
+                track.sequencer.update_synth("bass", param, value)
             print(f"Bass synth {param} set to {value}")
         except Exception as e:
             print(f"Error updating bass synth: {e}")
@@ -66,8 +66,8 @@ def parse_command(cmd, track):
         value_str = tokens[2]
         try:
             value = float(value_str) if value_str.replace('.', '', 1).isdigit() else value_str
-            if hasattr(track, "sequencer") and hasattr(track.sequencer, "kick_synth"):
-                track.sequencer.kick_synth.update(param, value)
+            if hasattr(track, "sequencer"):
+                track.sequencer.update_synth("kick", param, value)
             print(f"Kick synth {param} set to {value}")
         except Exception as e:
             print(f"Error updating kick synth: {e}")
@@ -78,7 +78,7 @@ def parse_command(cmd, track):
             return
         param, val = tokens[1], tokens[2]
         value = float(val) if val.replace('.', '', 1).isdigit() else val
-        track.sequencer.hihat_synth.update(param, value)
+        track.sequencer.update_synth("hihat", param, value)
         print(f"Hihat synth {param} set to {value}")
 
     elif command == "set_clap_synth":
@@ -87,7 +87,7 @@ def parse_command(cmd, track):
             return
         param, val = tokens[1], tokens[2]
         value = float(val) if val.replace('.', '', 1).isdigit() else val
-        track.sequencer.clap_synth.update(param, value)
+        track.sequencer.update_synth("clap", param, value)
         print(f"Clap synth {param} set to {value}")
 
     elif command == "set_snare_synth":
@@ -96,7 +96,7 @@ def parse_command(cmd, track):
             return
         param, val = tokens[1], tokens[2]
         value = float(val) if val.replace('.', '', 1).isdigit() else val
-        track.sequencer.snare_synth.update(param, value)
+        track.sequencer.update_synth("snare", param, value)
         print(f"Snare synth {param} set to {value}")
 
     else:
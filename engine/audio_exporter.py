@@ -1,7 +1,19 @@
 # engine/audio_exporter.py
 import os
 from pathlib import Path
-from pydub import AudioSegment
+
+import numpy as np
+
+from engine.offline_renderer import (
+    output_format,
+    stream_song,
+    stream_song_stems,
+    write_wav_stream,
+    write_wav_streams,
+)
+from engine.offline_synths import SYNTH_LANES, make_voices
+from engine.render_cache import default_lane_cache, stream_song_cached
+from engine.sample_store import load_bank
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 ASSETS_DIR = BASE_DIR / "assets"
@@ -16,8 +28,120 @@ SAMPLE_PATHS = {
 
 EXPORT_DIR = BASE_DIR / "exports"
 
-def export_to_wav(track, filename="output.wav"):
+MASTER_STEM = "master"
+STEM_WORKERS = 4  # writer threads for export_stems
+
+def export_to_wav(track, filename="output.wav", backend="numpy", bank=None, bars=None, tail=0.0,
+                  cache=None):
+    """
+    Render the track's patterns to exports/<filename>.
+    backend="numpy" (default) mixes with engine.offline_renderer and
+    synthesizes kick/bass like the live synths (engine.offline_synths);
+    backend="pydub" keeps the original overlay-per-hit path (kick/bass WAVs).
+    bank: optional engine.sample_store.SampleBank to read samples from
+    (memory-mapped, shared between processes) instead of SAMPLE_PATHS.
+    bars/tail (numpy only): bars=None renders one pass of the track's song
+    (Track.song_bars(); one bar of the current pattern without a song), more
+    bars cycle through it; tail lets the last hits ring out. Audio is streamed
+    to disk block by block.
+    cache (numpy only): engine.render_cache.LaneCache that unchanged lane
+    chunks are reused from, so re-exporting after a small edit only renders
+    the chunks of the lanes that changed (default: the shared one under
+    cache/lanes/). Lanes are cached chunk by chunk as they stream, so length
+    doesn't cost memory either way.
+    """
     os.makedirs(EXPORT_DIR, exist_ok=True)
+    export_path = EXPORT_DIR / filename
+    if cache is None:
+        cache = default_lane_cache()
+    render_to_wav(track, export_path, backend=backend, bank=bank, bars=bars, tail=tail, cache=cache)
+    print(f"WAV exported to {export_path}")
+
+
+def render_to_wav(track, export_path, backend="numpy", bank=None, bars=None, tail=0.0, cache=None):
+    """
+    Same as export_to_wav, but to any path and without printing (batch use);
+    lanes are only cached when a `cache` is passed.
+    """
+    if backend == "pydub":
+        if bars not in (None, 1) or tail or track.get_song():
+            raise ValueError("The pydub backend renders a single bar only")
+        _export_pydub(track, export_path)
+    elif backend == "numpy":
+        _export_numpy(track, export_path, bank, bars, tail, cache)
+    else:
+        raise ValueError(f"Unknown export backend: {backend}")
+
+
+def export_stems(track, name="stems", bank=None, bars=None, tail=0.0, workers=STEM_WORKERS):
+    """
+    Render the mix and every instrument lane as separate WAVs in
+    exports/<name>/ (master.wav plus <instrument>.wav), in one pass.
+    bank/bars/tail as for export_to_wav. Returns {"master"|instrument: path}.
+    """
+    out_dir = EXPORT_DIR / name
+    paths = render_stems(track, out_dir, bank=bank, bars=bars, tail=tail, workers=workers)
+    print(f"{len(paths) - 1} stems + master exported to {out_dir}")
+    return paths
+
+
+def render_stems(track, out_dir, bank=None, bars=None, tail=0.0, workers=STEM_WORKERS):
+    """
+    Same as export_stems, but to any folder and without printing. Samples are
+    decoded and hits scheduled once for all stems (offline_renderer.
+    stream_song_stems); the files are encoded and written on `workers`
+    threads while the next block renders.
+    """
+    out_dir = Path(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    bar_patterns, steps, samples, (frame_rate, channels, sample_width), voices = _numpy_job(track, bank, bars)
+    names, blocks = stream_song_stems(bar_patterns, track.get_bpm(), samples, steps=steps,
+                                      frame_rate=frame_rate, channels=channels, voices=voices, tail=tail)
+    if MASTER_STEM in names:
+        raise ValueError(f"An instrument named {MASTER_STEM!r} would overwrite the mix stem")
+    paths = {MASTER_STEM: out_dir / f"{MASTER_STEM}.wav"}
+    paths.update((n, out_dir / f"{n}.wav") for n in names)
+    write_wav_streams(list(paths.values()), blocks, frame_rate=frame_rate, sample_width=sample_width,
+                      channels=channels, workers=workers)
+    return paths
+
+
+def _numpy_job(track, bank=None, bars=None):
+    """(bar patterns, steps, samples, output format, voices) for a NumPy render."""
+    # One step matrix per bar, read directly; repeats share the bank's object
+    names = track.song_bars(bars)
+    bar_patterns = [track.get_matrix(name) for name in names]
+    distinct = [track.get_matrix(name) for name in dict.fromkeys(names)]
+    steps = max([m.steps for m in distinct if len(m)] + [16])
+
+    # Only lanes with hits shape the output format (as with pydub's overlay sync)
+    active = dict.fromkeys(m.names[row] for m in distinct
+                           for row in np.flatnonzero(m.gates.any(axis=1)))
+    lanes = [n for n in active if n not in SYNTH_LANES]
+    if bank is not None:
+        # Already converted to the bank's rate/channels; views into the shared map
+        samples = {n: s for n, s in bank.samples.items() if n in lanes}
+    else:
+        # Decoded/converted once per asset and format (engine.sample_store cache)
+        samples = load_bank(SAMPLE_PATHS, names=lanes)
+    fmt = output_format(samples)
+    return bar_patterns, steps, samples, fmt, make_voices(track, sr=fmt[0])
+
+
+def _export_numpy(track, export_path, bank=None, bars=None, tail=0.0, cache=None):
+    bar_patterns, steps, samples, (frame_rate, channels, sample_width), voices = _numpy_job(track, bank, bars)
+    if cache is not None:
+        blocks = stream_song_cached(bar_patterns, track.get_bpm(), samples, cache, steps=steps,
+                                    frame_rate=frame_rate, channels=channels, voices=voices, tail=tail)
+    else:
+        blocks = stream_song(bar_patterns, track.get_bpm(), samples, steps=steps,
+                             frame_rate=frame_rate, channels=channels, voices=voices, tail=tail)
+    write_wav_stream(export_path, blocks, frame_rate=frame_rate, sample_width=sample_width,
+                     channels=channels)
+
+
+def _export_pydub(track, export_path):
+    from pydub import AudioSegment  # only needed for the legacy path
 
     bpm = track.get_bpm()
     step_duration_ms = 60_000 / bpm / 4  # 16th note duration in ms
@@ -41,6 +165,4 @@ def export_to_wav(track, filename="output.wav"):
                 offset = int(i * step_duration_ms)
                 output = output.overlay(sample, position=offset)
 
-    export_path = EXPORT_DIR / filename
     output.export(export_path, format="wav")
-    print(f"WAV exported to {export_path}")
@@ -0,0 +1,162 @@
+# engine/batch_export.py
+"""
+Headless batch export of preset folders.
+- Takes a directory (every *.json in it) or a glob of presets saved with
+  engine/pattern_exporter.save_preset.
+- Renders each one with the offline exporter (audio_exporter.render_to_wav,
+  NumPy backend, streamed to disk) in a ProcessPoolExecutor across all cores.
+- Samples are packed once into a memory-mapped SampleBank that every worker
+  maps instead of decoding its own copy.
+- Presets whose WAV is newer than the preset and was rendered with the same
+  parameters (bars, sample bank contents; kept in a <wav>.stamp sidecar)
+  are skipped unless force=True.
+"""
+
+from __future__ import annotations
+
+import glob
+import json
+import os
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from engine.audio_exporter import SAMPLE_PATHS, render_to_wav
+from engine.offline_synths import SYNTH_LANES
+from engine.pattern_exporter import apply_preset, load_preset
+from engine.sample_store import CACHE_DIR, SampleBank, file_digest
+from engine.track import Track
+
+BANK_PATH = CACHE_DIR.parent / "bank" / "assets.f32"
+RENDER_SUBDIR = "renders"
+
+
+class BatchResult(NamedTuple):
+    preset: Path
+    output: Path
+    status: str          # "rendered" | "skipped" | "failed"
+    seconds: float = 0.0  # wall time spent rendering
+    audio: float = 0.0    # length of the rendered WAV in seconds
+    error: str = ""
+
+
+def find_presets(spec) -> List[Path]:
+    """A directory (its *.json files) or a glob pattern -> sorted preset paths."""
+    path = Path(spec)
+    if path.is_dir():
+        return sorted(path.glob("*.json"))
+    return sorted(Path(p) for p in glob.glob(str(spec)) if p.endswith(".json"))
+
+
+def output_path(preset: Path, out_dir: Optional[Path] = None) -> Path:
+    """<out_dir>/<stem>.wav; by default a renders/ folder next to the preset."""
+    folder = Path(out_dir) if out_dir is not None else preset.parent / RENDER_SUBDIR
+    return folder / f"{preset.stem}.wav"
+
+
+def stamp_path(output: Path) -> Path:
+    return output.with_name(output.name + ".stamp")
+
+
+def render_stamp(bars: Optional[int] = None) -> Dict[str, Any]:
+    """The render parameters a WAV depends on besides its preset."""
+    samples = {n: p for n, p in SAMPLE_PATHS.items() if n not in SYNTH_LANES}
+    bank = {name: file_digest(path) if Path(path).exists() else None
+            for name, path in sorted(samples.items())}
+    return {"bars": bars, "bank": bank}
+
+
+def is_up_to_date(preset: Path, output: Path, stamp: Optional[Dict[str, Any]] = None) -> bool:
+    """Output newer than the preset and, given a stamp, rendered with those parameters."""
+    try:
+        if output.stat().st_mtime < preset.stat().st_mtime:
+            return False
+        return stamp is None or json.loads(stamp_path(output).read_text()) == stamp
+    except (FileNotFoundError, ValueError):
+        return False
+
+
+def _render_one(preset: Path, output: Path, bank: Optional[SampleBank],
+                bars: Optional[int] = None,
+                stamp: Optional[Dict[str, Any]] = None) -> Tuple[float, float]:
+    """Worker: render one preset; returns (wall seconds, audio seconds)."""
+    t0 = time.perf_counter()
+    track = Track()
+    apply_preset(track, load_preset(str(preset)))
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp = output.with_suffix(f".{os.getpid()}.tmp.wav")
+    stamp_path(output).unlink(missing_ok=True)  # no stamp until the new WAV is in place
+    try:
+        render_to_wav(track, tmp, bank=bank, bars=bars)
+        os.replace(tmp, output)  # a half-written file never looks up to date
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    if stamp is not None:
+        stamp_path(output).write_text(json.dumps(stamp))
+    elapsed = time.perf_counter() - t0
+    with wave.open(str(output), "rb") as w:
+        audio = w.getnframes() / float(w.getframerate())
+    return elapsed, audio
+
+
+def batch_export(spec, out_dir=None, jobs: Optional[int] = None, force: bool = False,
+                 bars: Optional[int] = None, progress: bool = True) -> List[BatchResult]:
+    presets = find_presets(spec)
+    results: List[BatchResult] = []
+    todo: List[Tuple[Path, Path]] = []
+    stamp = render_stamp(bars)
+    for preset in presets:
+        output = output_path(preset, out_dir)
+        if not force and is_up_to_date(preset, output, stamp):
+            results.append(BatchResult(preset, output, "skipped"))
+        else:
+            todo.append((preset, output))
+
+    total = len(presets)
+    done = len(results)
+    if progress and done:
+        print(f"[batch] {done} of {total} presets up to date, skipped")
+    if not todo:
+        return results
+
+    bank = SampleBank.build(BANK_PATH, {n: p for n, p in SAMPLE_PATHS.items() if n not in SYNTH_LANES})
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:  # None -> one per core
+        futures = {pool.submit(_render_one, preset, output, bank, bars, stamp): (preset, output)
+                   for preset, output in todo}
+        for future in as_completed(futures):
+            preset, output = futures[future]
+            try:
+                elapsed, audio = future.result()
+                result = BatchResult(preset, output, "rendered", elapsed, audio)
+            except Exception as e:
+                result = BatchResult(preset, output, "failed", error=f"{type(e).__name__}: {e}")
+            results.append(result)
+            done += 1
+            if progress:
+                detail = f"{result.seconds:6.3f}s" if result.status == "rendered" else result.error
+                print(f"[{done:{len(str(total))}d}/{total}] {result.status:8s} {preset.name}  {detail}")
+    return results
+
+
+def print_summary(results: List[BatchResult], wall: float):
+    rendered = [r for r in results if r.status == "rendered"]
+    skipped = sum(1 for r in results if r.status == "skipped")
+    failed = [r for r in results if r.status == "failed"]
+
+    if rendered:
+        width = max(len(r.preset.name) for r in rendered)
+        print("\nper-file timing:")
+        for r in sorted(rendered, key=lambda r: r.seconds, reverse=True):
+            print(f"  {r.preset.name:{width}s}  {r.seconds * 1000:8.1f} ms  ({r.audio:5.2f}s audio) -> {r.output}")
+    for r in failed:
+        print(f"  FAILED {r.preset}: {r.error}")
+
+    audio = sum(r.audio for r in rendered)
+    rate = len(rendered) / wall if wall > 0 else 0.0
+    realtime = audio / wall if wall > 0 else 0.0
+    print(f"\n{len(rendered)} rendered, {skipped} skipped, {len(failed)} failed in {wall:.2f}s "
+          f"({rate:.1f} presets/s, {realtime:.0f}x realtime)")
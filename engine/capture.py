@@ -0,0 +1,129 @@
+# engine/capture.py
+"""
+Retroactive capture of the live master output.
+- CaptureBuffer is an in-memory ring holding the last `seconds` of what the
+  server played, written once per audio buffer from the server callback
+  (LiveSequencer taps pyo's output buffer, so it is exactly what a
+  recording would contain). Nothing touches the disk until a take is saved.
+- The sequencer marks where every bar starts, so last_bars() returns whole
+  bars ending on the most recent downbeat: the loop that was just played
+  (sample-exact on the audio-clock transport, to about a buffer on the
+  thread transport).
+- save_take() writes a captured take to WAV on a background thread.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import List, Optional
+
+import numpy as np
+
+from engine.offline_renderer import write_wav
+
+DEFAULT_SECONDS = 60.0
+TAKE_SAMPLE_WIDTH = 3  # 24-bit PCM
+
+
+class CaptureBuffer:
+    """
+    Single-writer ring of (frames, channels) float32 audio. write() runs on
+    the audio thread without locking; readers copy out and retry if the
+    writer lapped them while copying.
+    """
+
+    # Extra room past `seconds`, so reading the oldest frames doesn't race the writer
+    GUARD_SECONDS = 1.0
+
+    def __init__(self, seconds: float = DEFAULT_SECONDS, sr: int = 44100, channels: int = 2,
+                 max_marks: int = 1024):
+        self.sr = int(sr)
+        self.channels = int(channels)
+        self.seconds = float(seconds)
+        self.capacity = int((self.seconds + self.GUARD_SECONDS) * self.sr)
+        self._data = np.zeros((self.capacity, self.channels), dtype=np.float32)
+        self.written = 0  # frames written since creation (absolute position of the write head)
+        self._marks: deque = deque(maxlen=max(2, int(max_marks)))  # absolute frames of bar starts
+
+    def write(self, block: np.ndarray):
+        """Append (frames, channels) audio; the oldest frames are overwritten."""
+        n = len(block)
+        if n > self.capacity:
+            block, n = block[-self.capacity:], self.capacity
+        start = self.written % self.capacity
+        first = min(n, self.capacity - start)
+        self._data[start:start + first] = block[:first]
+        if first < n:
+            self._data[:n - first] = block[first:]
+        self.written += n
+
+    def mark(self, frame: Optional[int] = None):
+        """Note that a bar starts at absolute `frame` (default: the write head)."""
+        self._marks.append(self.written if frame is None else int(frame))
+
+    def new_run(self):
+        """The transport (re)started: no bar spans the gap before the next mark."""
+        self._marks.append(None)
+
+    def frames_between(self, start: int, end: int) -> np.ndarray:
+        """Copy of absolute frames [start, end), clipped to what the ring still holds."""
+        for _ in range(3):
+            written = self.written
+            end_ = min(end, written)
+            start_ = max(start, written - int(self.seconds * self.sr), 0)
+            if end_ <= start_:
+                return np.zeros((0, self.channels), dtype=np.float32)
+            a, b = start_ % self.capacity, end_ % self.capacity
+            if a < b:
+                out = self._data[a:b].copy()
+            else:
+                out = np.concatenate([self._data[a:], self._data[:b]])
+            # Valid unless the writer wrapped onto [start_, end_) while we copied
+            if self.written - start_ <= self.capacity:
+                return out
+        return out
+
+    def last_seconds(self, seconds: float) -> np.ndarray:
+        """The most recent `seconds` of output (less if the ring holds less)."""
+        end = self.written
+        return self.frames_between(end - int(float(seconds) * self.sr), end)
+
+    def last_bars(self, bars: int) -> np.ndarray:
+        """
+        The last `bars` complete bars, ending where the current bar began.
+        Fewer if fewer were played (or fit in the ring); empty without marks.
+        """
+        written = self.written
+        runs: List[List[int]] = [[]]
+        for m in list(self._marks):
+            if m is None:
+                runs.append([])
+            elif m <= written:
+                runs[-1].append(m)
+        # The latest run with a complete bar (a run just started has none yet)
+        marks = next((r for r in reversed(runs) if len(r) >= 2), None)
+        if marks is None:
+            return np.zeros((0, self.channels), dtype=np.float32)
+        bars = max(1, int(bars))
+        return self.frames_between(marks[max(0, len(marks) - 1 - bars)], marks[-1])
+
+
+def save_take(data: np.ndarray, path, sr: int) -> Future:
+    """
+    Write a captured take to a 24-bit WAV on a daemon thread. The returned
+    Future resolves to `path` (or the write error) once the file is written.
+    """
+    future: Future = Future()
+
+    def run():
+        try:
+            write_wav(path, data, frame_rate=sr, sample_width=TAKE_SAMPLE_WIDTH)
+        except Exception as e:
+            future.set_exception(e)
+        else:
+            future.set_result(path)
+
+    threading.Thread(target=run, name="CaptureSave", daemon=True).start()
+    return future
@@ -1,27 +1,58 @@
 # engine/live_sequencer.py
 """
-Realtime step sequencer driven by a background thread.
+Realtime step sequencer.
 - Uses pyo exclusively for audio.
+- Steps are fired from the pyo audio clock by default (sample-counted, driven
+  by the server callback); a Python thread on absolute deadlines with
+  lookahead remains as a fallback.
+- Optional headless mode (audio="offline") renders the same graph to WAV
+  faster than real time on the same audio clock.
 - Fixed sample rate / channels for consistent recording and playback.
-- Built-in recording of the exact live output between Start and Stop.
+- Built-in recording of the exact live output between Start and Stop; as
+  32-bit float WAV from pyo, or 24-bit WAV/FLAC encoded on a background
+  thread (engine.recorder).
+- Always-on retroactive capture: the last minute of output is kept in memory
+  (engine.capture) so the last few bars can be saved after the fact.
+- Synth parameters from the UI or any other thread go through a coalescing
+  bus (engine.param_bus), applied on the audio thread once per buffer.
+- Optional event log of the session (engine.event_log): every trigger and
+  synth parameter change on its exact frame, a few KB a minute, which
+  render_event_log() re-renders offline at any sample rate.
 - Silences pyo's startup / MIDI scan / GUI backend messages.
 """
 
 from __future__ import annotations
 
 import contextlib
+import ctypes
 import io
 import os
 import tempfile
 import threading
 import time
-from typing import Callable, Dict, Optional
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
 
 # ---- Silence pyo import-time prints ----
 with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
     from pyo import Server  # explicit import, no wildcard
 
-from engine.synths import BassSynth, KickSynth, HatSynth, ClapSynth, SnareSynth
+from engine.capture import DEFAULT_SECONDS as CAPTURE_SECONDS
+from engine.capture import CaptureBuffer, save_take
+from engine.event_log import BPM as EV_BPM
+from engine.event_log import PARAM as EV_PARAM
+from engine.event_log import STEP as EV_STEP
+from engine.event_log import TRIGGER as EV_TRIGGER
+from engine.event_log import EventLogWriter, read_event_log
+from engine.offline_renderer import write_float_wav_stream
+from engine.param_bus import ParamBus
+from engine.pattern_exporter import preset_data
+from engine.recorder import FORMATS as RECORD_FORMATS
+from engine.recorder import BlockRecorder, RecordStats
+from engine.synths import DEFAULT_VOICES, BassSynth, KickSynth, HatSynth, ClapSynth, SnareSynth
+from engine.track import Track, TrackSnapshot
 
 
 @contextlib.contextmanager
@@ -31,39 +62,292 @@ def _silence_pyo():
         yield
 
 
+StepTable = Tuple[Tuple[Callable[..., None], ...], ...]
+
+AMP = 0.8  # server output gain (global headroom)
+
+
+def compile_step_table(names_table: Tuple[Tuple[str, ...], ...],
+                       play_fns: Dict[str, Callable[..., None]],
+                       previous: Optional[Tuple[Tuple[Tuple[str, ...], ...], StepTable]] = None) -> StepTable:
+    """
+    Map Track.get_step_table() onto ready-to-call trigger functions.
+    Unknown instruments are dropped here, once, instead of at every step.
+    `previous` is an earlier (names_table, compiled) pair for the same pattern:
+    steps whose names tuple is the same object (Track snapshots keep untouched
+    steps) reuse their compiled entry, so an edit costs what it touched.
+    """
+    if previous is not None and len(previous[0]) == len(names_table):
+        old_names, old = previous
+        return tuple(
+            old[i] if names is old_names[i] else tuple(play_fns[n] for n in names if n in play_fns)
+            for i, names in enumerate(names_table)
+        )
+    return tuple(
+        tuple(play_fns[name] for name in names if name in play_fns)
+        for names in names_table
+    )
+
+
+class _StepClock:
+    """
+    Sample-counted 16th-note clock advanced from the pyo server callback
+    (once per audio buffer, on the audio thread).
+    Step positions are absolute frame counts from a tempo anchor, so nothing
+    accumulates between steps; each step fires at the start of the buffer
+    whose start is nearest its frame, whatever the Python load.
+    That is the limit of pyo's triggers: play() (and a play() delay) only
+    takes effect on a buffer boundary, and the synths' Adsr/Linseg envelopes
+    can't be started mid-buffer, so a hit can be off by up to half a buffer
+    (+-2.9 ms at the default 256 frames and 44.1 kHz; smaller buffers are
+    tighter, see benchmarks/bench_step_clock.py).
+    """
+
+    def __init__(self, sr: float, bufsize: int):
+        self.sr = float(sr)
+        self.bufsize = int(bufsize)
+        self.frame = 0           # frames rendered since the server started
+        self.running = False
+        self.limit: Optional[int] = None  # stop after this many steps (offline renders)
+        self.fired = 0
+        self._origin = 0.0       # frame of step 0 at the current tempo
+        self._count = 0          # steps fired since the anchor
+        self._step_frames = 0.0
+
+    def start(self, bpm: float, limit: Optional[int] = None):
+        self._origin = float(self.frame)
+        self._count = 0
+        self._step_frames = self.sr * 60.0 / float(bpm) / 4.0
+        self.limit = limit
+        self.fired = 0
+        self.running = True
+
+    def set_bpm(self, bpm: float):
+        """Re-anchor on the step being fired; call from the on_step callback."""
+        self._origin += (self._count - 1) * self._step_frames
+        self._count = 1
+        self._step_frames = self.sr * 60.0 / float(bpm) / 4.0
+
+    def tick(self, on_step: Callable[[], None]):
+        # Steps nearer this buffer's start than the next one's fire now
+        nearest_end = self.frame + self.bufsize / 2.0
+        while self.running and self._origin + self._count * self._step_frames < nearest_end:
+            if self.limit is not None and self.fired >= self.limit:
+                self.running = False
+                break
+            self._count += 1
+            self.fired += 1
+            on_step()
+        self.frame += self.bufsize
+
+
+class _DeadlineScheduler:
+    """
+    Absolute-deadline 16th-note scheduler for the thread transport.
+    Step n is due at origin + n * interval on time.perf_counter, so sleep
+    overshoot and per-step work never accumulate. The thread wakes `lookahead`
+    seconds before each deadline and hands the remainder to pyo as a play()
+    delay, so hits can be dispatched early and still land on time.
+    """
+
+    def __init__(self, lookahead: float = 0.025,
+                 clock: Callable[[], float] = time.perf_counter,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.lookahead = float(lookahead)
+        self._clock = clock
+        self._sleep = sleep
+        self._origin = 0.0
+        self._index = 0
+        self._interval = 0.125
+        self.max_late = 0.0   # worst wake-up lateness past a deadline (seconds)
+        self.resyncs = 0      # times the grid was re-anchored after a stall
+
+    def start(self, bpm: float):
+        self._origin = self._clock()
+        self._index = 0
+        self._interval = 60.0 / float(bpm) / 4.0
+        self.max_late = 0.0
+        self.resyncs = 0
+
+    def set_bpm(self, bpm: float):
+        """Tempo changes re-anchor the grid on the next pending step."""
+        interval = 60.0 / float(bpm) / 4.0
+        if interval != self._interval:
+            self._origin = self.next_deadline()
+            self._index = 0
+            self._interval = interval
+
+    def next_deadline(self) -> float:
+        return self._origin + self._index * self._interval
+
+    def wait_next(self) -> float:
+        """
+        Block until the next step is within the lookahead window.
+        Returns the delay (seconds) still to wait on the audio side.
+        """
+        due = self.next_deadline()
+        while True:
+            remaining = due - self.lookahead - self._clock()
+            if remaining <= 0:
+                break
+            self._sleep(remaining)
+
+        late = self._clock() - due
+        if late > self._interval:
+            # Fell a whole step behind (e.g. process suspended): re-anchor
+            # instead of firing a burst of catch-up hits.
+            self._origin = self._clock()
+            self._index = 0
+            self.resyncs += 1
+            late = 0.0
+        self._index += 1
+        self.max_late = max(self.max_late, late)
+        return max(0.0, -late)
+
+
 class LiveSequencer:
-    def __init__(self, track):
+    def __init__(self, track, audio: str = "portaudio", buffersize: int = 256,
+                 transport: str = "audio", sample_voices: int = DEFAULT_VOICES,
+                 capture_seconds: float = CAPTURE_SECONDS, record_format: str = "float",
+                 sr: int = 44100, event_log: Optional[str] = None):
+        if record_format != "float" and record_format not in RECORD_FORMATS:
+            raise ValueError(f"Unknown recording format: {record_format} "
+                             f"(use float, {', '.join(RECORD_FORMATS)})")
+        if transport not in ("audio", "thread"):
+            raise ValueError(f"Unknown transport: {transport} (use 'audio' or 'thread')")
         self.track = track
         self.running: bool = False
         self.step: int = 0
         self.bpm: int = 120
         self.loop_thread: Optional[threading.Thread] = None
 
-        # Start pyo server with explicit settings (stable SR avoids detune/recording drift)
+        # "audio": steps fired from the pyo audio clock (sample-counted, no drift)
+        # "thread": Python thread on absolute perf_counter deadlines (fallback)
+        self.transport: str = transport
+        self.scheduler = _DeadlineScheduler()
+
+        # Boot pyo server with explicit settings (stable SR avoids detune/recording drift)
         # - sr=44100 (CD quality), nchnls=2 (stereo)
-        # - buffersize=512 for stability; lower if you want snappier timing (256)
+        # - buffersize=256: hits land within half a buffer of their step (_StepClock);
+        #   raise it (512) if the machine can't keep up, lower it for tighter timing
         # - duplex=0 (output only)
+        # - audio="offline" builds the same graph without a sound card; the
+        #   server is then started by render_offline() and runs as fast as the CPU allows
+        # - audio="manual" is driven buffer by buffer with server.process() (render_event_log)
+        # The server is started once the whole graph exists (end of __init__), so
+        # every synth runs from the first buffer and a session replays exactly
+        self.offline: bool = audio == "offline"
+        # Seconds spent booting the server / building the synths (startup timing)
+        self.boot_times: Dict[str, float] = {}
+        t0 = time.perf_counter()
         with _silence_pyo():
-            self.server: Server = Server(sr=44100, nchnls=2, buffersize=512, duplex=0).boot()
-            self.server.setAmp(0.8)  # global headroom
-            self.server.start()
+            self.server: Server = Server(
+                sr=int(sr), nchnls=2, buffersize=buffersize, duplex=0, audio=audio
+            ).boot()
+            self.server.setAmp(AMP)  # global headroom
+        self.boot_times["server"] = time.perf_counter() - t0
+
+        # Audio-clock transport state (shared by live "audio" mode and offline renders)
+        self._clock = _StepClock(self.server.getSamplingRate(), self.server.getBufferSize())
+        self._bar_step: int = 0
+        self._bar_table: StepTable = ()
+        # Snapshot _bar_table was compiled from: only the stepping thread reads
+        # or writes it, so an edit is pending exactly while track.snapshot differs
+        # (the shared _song_state cache is refreshed by other threads too)
+        self._bar_snapshot: Optional[TrackSnapshot] = None
+        self._song_bar: int = 0  # bars played since start; indexes the arrangement
+        self._playhead_event = threading.Event()
+        # Playhead mailbox: (steps published, latest step), replaced as one tuple
+        # by the stepping thread and read by anyone without a lock (playhead())
+        self._playhead: Tuple[int, int] = (0, 0)
+        self._playhead_thread: Optional[threading.Thread] = None
+
+        # Output tap: at the start of each server callback pyo's output buffer
+        # still holds the previous buffer's final, post-amp samples. It feeds the
+        # retroactive capture ring (capture_seconds=0 turns it off) and
+        # background recordings; offline renders don't tap
+        self.capture: Optional[CaptureBuffer] = None
+        self._output: Optional[np.ndarray] = None
+        if not self.offline:
+            nchnls, bufsize = int(self.server.getNchnls()), int(self.server.getBufferSize())
+            addr = int(self.server.getOutputAddr(), 16)
+            self._output = np.ctypeslib.as_array(
+                (ctypes.c_float * (bufsize * nchnls)).from_address(addr)).reshape(bufsize, nchnls)
+            if capture_seconds > 0:
+                self.capture = CaptureBuffer(capture_seconds, int(self.server.getSamplingRate()), nchnls)
 
-        # Optional UI callback for playhead highlight
+        # Event timeline: frames since boot. _event_frame is the buffer that
+        # anything done now lands on (the current one inside the server
+        # callback, the next one between callbacks)
+        self._event_frame: int = 0
+        self._event_log: Optional[EventLogWriter] = None
+        # Synth parameter changes from any thread, applied once per buffer (engine.param_bus)
+        self.params = ParamBus()
+
+        # Optional playhead hook, called from the playhead thread (never the
+        # stepping one); UIs can poll playhead() instead
         self.playhead_callback: Optional[Callable[[int], None]] = None
 
         # Synth instances (all audio comes from here)
+        t0 = time.perf_counter()
         self.bass_synth = BassSynth(self.server)
         self.kick_synth = KickSynth(self.server)
-        self.hihat_synth = HatSynth(self.server)
-        self.clap_synth = ClapSynth(self.server)
-        self.snare_synth = SnareSynth(self.server)
+        # One-shots play from a fixed pool of `sample_voices` voices each
+        self.hihat_synth = HatSynth(self.server, voices=sample_voices)
+        self.clap_synth = ClapSynth(self.server, voices=sample_voices)
+        self.snare_synth = SnareSynth(self.server, voices=sample_voices)
+
+        self.synths: Dict[str, Any] = {
+            "bass": self.bass_synth,
+            "kick": self.kick_synth,
+            "hihat": self.hihat_synth,
+            "clap": self.clap_synth,
+            "snare": self.snare_synth,
+        }
+        self.boot_times["synths"] = time.perf_counter() - t0
+        # Instrument name -> trigger; patterns are compiled against this once per edit
+        self._play_fns: Dict[str, Callable[..., None]] = {
+            name: synth.play if event_log is None else self._logged_play(name, synth.play)
+            for name, synth in self.synths.items()
+        }
+        # Pattern name -> (snapshot step table it was compiled from, compiled table);
+        # _song_state pairs a Track snapshot with one compiled table per bar of its
+        # arrangement, assigned as one tuple so readers never see a torn pair
+        self._compiled: Dict[str, Tuple[Tuple[Tuple[str, ...], ...], StepTable]] = {}
+        self._song_state: Tuple[Optional[TrackSnapshot], Tuple[StepTable, ...]] = (None, ())
 
-        # Recording state
+        # Recording state. record_format "float": pyo writes 32-bit float WAV from
+        # the audio thread; "wav24"/"flac": the audio thread queues the tapped
+        # output to a BlockRecorder writer thread (engine.recorder)
         self.recording: bool = False
+        self.record_format: str = record_format
         self._record_temp_path: Optional[str] = None
+        self._recorder: Optional[BlockRecorder] = None
+        self.last_record_stats: Optional[RecordStats] = None
 
         # Allow DSL / other modules to address the sequencer via the Track
         track.sequencer = self
+        # Compile edits on the editing thread as they happen, so the audio
+        # thread normally finds the new snapshot already compiled
+        track.on_change(self._on_track_change)
+
+        if event_log is not None:
+            if os.path.dirname(event_log):
+                os.makedirs(os.path.dirname(event_log), exist_ok=True)
+            self._event_log = EventLogWriter(event_log, {
+                "sr": int(self.server.getSamplingRate()),
+                "bufsize": int(self.server.getBufferSize()),
+                "nchnls": int(self.server.getNchnls()),
+                "amp": AMP,
+                "voices": int(sample_voices),
+                "synths": self.synth_settings(),
+                "preset": preset_data(track, track.get_steps(), "session"),
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            })
+        self.server.setCallback(self._on_audio_block)
+        if not self.offline:
+            with _silence_pyo():
+                self.server.start()
 
     # ---------------------------
     # Public controls
@@ -73,14 +357,29 @@ class LiveSequencer:
             return
         self.running = True
         self.bpm = int(self.track.get_bpm())
-        self.loop_thread = threading.Thread(target=self._run_loop, name="SequencerLoop", daemon=True)
-        self.loop_thread.start()
+        if self.capture is not None:
+            self.capture.new_run()
+        self._playhead_event.clear()
+        self._playhead_thread = threading.Thread(target=self._playhead_loop, name="Playhead", daemon=True)
+        self._playhead_thread.start()
+        if self.transport == "audio":
+            # Audio thread fires the steps; the playhead thread forwards them
+            self._bar_step = 0
+            self._song_bar = 0
+            self._song_tables()  # compiled here, not on the audio thread
+            self._clock.start(self.bpm)
+        else:
+            self.loop_thread = threading.Thread(target=self._run_loop, name="SequencerLoop", daemon=True)
+            self.loop_thread.start()
         print("[loop] started")
 
     def stop(self):
         self.running = False
-        if self.loop_thread and self.loop_thread.is_alive():
-            self.loop_thread.join(timeout=1.0)
+        self._clock.running = False
+        self._playhead_event.set()  # wake the playhead thread so it can exit
+        for thread in (self.loop_thread, self._playhead_thread):
+            if thread and thread.is_alive():
+                thread.join(timeout=1.0)
         print("[loop] stopped")
 
     def shutdown(self):
@@ -89,6 +388,12 @@ class LiveSequencer:
             self.stop()
         except Exception:
             pass
+        if self._recorder is not None:
+            self.stop_recording()  # let the writer finish the file
+        if self._event_log is not None:
+            self._event_log.close(self._event_frame)
+            print(f"[log] {self._event_log.events} events -> {self._event_log.path}")
+        self.track.off_change(self._on_track_change)
         with _silence_pyo():
             try:
                 self.server.stop()
@@ -96,6 +401,61 @@ class LiveSequencer:
             except Exception:
                 pass
 
+    def playhead(self) -> Tuple[int, int]:
+        """
+        (steps played since boot, latest step index), from any thread.
+        Pollers compare the count to tell a new step from none (the index
+        alone repeats every bar); steps between two polls are skipped.
+        """
+        return self._playhead
+
+    # ---------------------------
+    # Synth parameters
+    # ---------------------------
+    def update_synth(self, instrument: str, param: str, value):
+        """
+        synth.update() for UI controls and remote control, from any thread.
+        Changes go through the parameter bus and are applied on the audio
+        thread at the start of the next buffer, latest value only (and
+        logged there, so a replay lands them on the same sample).
+        """
+        self.params.set(instrument, param, value)
+
+    def synth_settings(self) -> Dict[str, Dict[str, Any]]:
+        """Current settings of every synth, as update() parameters."""
+        def value(v):
+            return v.value if hasattr(v, "value") else v
+        settings: Dict[str, Dict[str, Any]] = {
+            "kick": {"base_freq": self.kick_synth.base_freq, "decay": self.kick_synth.decay,
+                     "volume": value(self.kick_synth.volume)},
+            "bass": {"freq": value(self.bass_synth.freq), "wave": self.bass_synth.wave,
+                     "decay": self.bass_synth.decay, "volume": value(self.bass_synth.volume)},
+        }
+        for name in ("hihat", "clap", "snare"):
+            settings[name] = {"volume": value(self.synths[name].volume)}
+        return settings
+
+    def _logged_play(self, name: str, play: Callable[..., None]) -> Callable[..., None]:
+        sr = self.server.getSamplingRate()
+
+        def play_logged(delay: float = 0.0):
+            log = self._event_log
+            if log is not None:
+                log.log(self._event_frame + int(round(delay * sr)), EV_TRIGGER, name)
+            play(delay)
+        return play_logged
+
+    def _apply_params(self):
+        """Audio thread: apply (and log) the latest bus value of each changed parameter."""
+        log = self._event_log
+        for (instrument, param), value in self.params.drain().items():
+            try:
+                self.synths[instrument].update(param, value)
+            except Exception:
+                continue
+            if log is not None:
+                log.log(self._event_frame, EV_PARAM, instrument, param, value)
+
     # ---------------------------
     # Recording helpers
     # ---------------------------
@@ -104,21 +464,31 @@ class LiveSequencer:
         """
         Exports/temporary path for a unique recording filename.
         """
-        fd, path = tempfile.mkstemp(prefix="recording_", suffix=".wav")
+        suffix = RECORD_FORMATS.get(self.record_format, ".wav")
+        fd, path = tempfile.mkstemp(prefix="recording_", suffix=suffix)
         os.close(fd)
         os.unlink(path)
         return path
 
     def start_recording(self, temp_path: str):
         """
-        Record the server's output to the given WAV file until stop_recording.
-        Use 32-bit float WAV to avoid clipping/quantization issues.
+        Record the server's output to the given file until stop_recording.
+        "float" (default) uses pyo's 32-bit float WAV to avoid clipping/quantization
+        issues; "wav24"/"flac" encode on a background thread so the audio
+        thread never waits on the disk (dropped blocks: record_stats()), and
+        clip at full scale like the offline exports.
         """
-        os.makedirs(os.path.dirname(temp_path), exist_ok=True)
-        with _silence_pyo():
-            # fileformat=1 -> WAV, sampletype=3 -> 32-bit float
-            self.server.recordOptions(dur=0, filename=temp_path, fileformat=1, sampletype=3)
-            self.server.recstart()
+        if os.path.dirname(temp_path):
+            os.makedirs(os.path.dirname(temp_path), exist_ok=True)
+        if self.record_format == "float" or self._output is None:
+            with _silence_pyo():
+                # fileformat=1 -> WAV, sampletype=3 -> 32-bit float
+                self.server.recordOptions(dur=0, filename=temp_path, fileformat=1, sampletype=3)
+                self.server.recstart()
+        else:
+            bufsize, nchnls = self._output.shape
+            self._recorder = BlockRecorder(temp_path, int(self.server.getSamplingRate()), nchnls,
+                                           bufsize, fmt=self.record_format)
         self.recording = True
         self._record_temp_path = temp_path
         print(f"[rec] started -> {temp_path}")
@@ -129,58 +499,328 @@ class LiveSequencer:
         """
         if not self.recording:
             return None
-        with _silence_pyo():
-            self.server.recstop()
+        recorder, self._recorder = self._recorder, None
+        if recorder is not None:
+            self.last_record_stats = stats = recorder.close()
+            print(f"[rec] {stats.written}/{stats.blocks} blocks written, {stats.dropped} dropped")
+        else:
+            with _silence_pyo():
+                self.server.recstop()
         self.recording = False
         print(f"[rec] stopped -> {self._record_temp_path}")
         return self._record_temp_path
 
+    def record_stats(self) -> Optional[RecordStats]:
+        """Counters of the background recording in progress (else of the last one)."""
+        recorder = self._recorder
+        return recorder.stats() if recorder is not None else self.last_record_stats
+
+    # ---------------------------
+    # Retroactive capture
+    # ---------------------------
+    def captured(self, bars: Optional[int] = 8, seconds: Optional[float] = None) -> np.ndarray:
+        """
+        Copy of the last `bars` complete bars of output, ending on the latest
+        downbeat (or of the last `seconds`); empty when capture is off.
+        """
+        if self.capture is None:
+            return np.zeros((0, 2), dtype=np.float32)
+        if seconds is not None:
+            return self.capture.last_seconds(seconds)
+        return self.capture.last_bars(8 if bars is None else bars)
+
+    def save_capture(self, path: str, bars: Optional[int] = 8,
+                     seconds: Optional[float] = None) -> Optional[Future]:
+        """
+        Save captured() output to a WAV on a background thread. Returns a
+        Future for the written path, or None if nothing has been captured yet.
+        """
+        data = self.captured(bars, seconds)
+        if not len(data) or self.capture is None:
+            return None
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        print(f"[capture] {len(data) / self.capture.sr:.2f}s -> {path}")
+        return save_take(data, path, self.capture.sr)
+
+    # ---------------------------
+    # Headless render
+    # ---------------------------
+    def render_offline(self, path: str, bars: Optional[int] = None, tail: float = 0.0) -> str:
+        """
+        Render `bars` bars of the current track through the live synth graph
+        into a 32-bit float WAV, faster than real time. bars=None renders one
+        pass of the song (one bar without a song); more bars cycle through it.
+        Steps are fired from the audio clock (one server callback per buffer),
+        so each hit lands on the buffer nearest its exact sample position.
+        `tail` adds seconds after the last bar so releases can ring out.
+        """
+        if not self.offline:
+            raise RuntimeError("render_offline() needs LiveSequencer(track, audio='offline')")
+
+        bpm = int(self.track.get_bpm())
+        song = self._song_tables()
+        bars = len(song) if bars is None else max(1, int(bars))
+        total_steps = sum(len(song[b % len(song)]) for b in range(bars))
+        duration = total_steps * 60.0 / bpm / 4.0 + max(0.0, float(tail))
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._bar_step = 0
+        self._song_bar = 0
+        self._clock.start(bpm, limit=total_steps)
+        with _silence_pyo():
+            # fileformat=1 -> WAV, sampletype=3 -> 32-bit float (same as live recordings)
+            self.server.recordOptions(dur=duration, filename=path, fileformat=1, sampletype=3)
+            self.server.start()  # blocks until `duration` has been rendered
+        print(f"[render] {total_steps} steps @ {bpm} BPM -> {path}")
+        return path
+
     # ---------------------------
     # Internal loop
     # ---------------------------
+    def _song_tables(self) -> Tuple[StepTable, ...]:
+        """
+        Compiled per-step triggers for every bar of the arrangement, from the
+        Track's current snapshot (one atomic reference read, no lock). Rebuilt
+        only when a new snapshot has been published, and then only for the
+        patterns whose step tables changed. Bars share their pattern's table,
+        so a switch is an index lookup.
+        """
+        return self._compiled_song()[1]
+
+    def _compiled_song(self) -> Tuple[TrackSnapshot, Tuple[StepTable, ...]]:
+        """(snapshot, _song_tables()) as one consistent pair."""
+        snapshot = self.track.snapshot
+        compiled_for, song = self._song_state
+        if snapshot is not compiled_for:
+            compiled = {}
+            for name in dict.fromkeys(snapshot.song):
+                names = snapshot.tables[name]
+                entry = self._compiled.get(name)
+                if entry is None or entry[0] is not names:
+                    entry = (names, compile_step_table(names, self._play_fns, previous=entry))
+                compiled[name] = entry
+            self._compiled = compiled
+            song = tuple(compiled[name][1] for name in snapshot.song)
+            self._song_state = (snapshot, song)
+        return snapshot, song
+
+    def _on_track_change(self, changes):
+        if self.running:
+            self._song_tables()
+        log = self._event_log
+        if log is not None:
+            # For reference only: replays use the logged triggers
+            for change in changes:
+                if change.kind == "bpm":
+                    log.log(self._event_frame, EV_BPM, value=change.new)
+                elif change.kind == "step" and change.old[0] != change.new[0]:
+                    log.log(self._event_frame, EV_STEP, change.instrument, str(change.start),
+                            float(change.new[0]))
+
+    def _next_bar_table(self) -> Tuple[TrackSnapshot, StepTable]:
+        """The next bar's compiled table (the song loops), with the snapshot it came from."""
+        snapshot, song = self._compiled_song()
+        table = song[self._song_bar % len(song)]
+        self._song_bar += 1
+        return snapshot, table
+
+    def _edited_bar_table(self, compiled_from: Optional[TrackSnapshot]
+                          ) -> Optional[Tuple[TrackSnapshot, StepTable]]:
+        """
+        The playing bar's table (and its snapshot) if the Track has published
+        an edit since `compiled_from`, the snapshot the playing table came from.
+        """
+        if self.track.snapshot is compiled_from:
+            return None
+        snapshot, song = self._compiled_song()
+        return snapshot, song[(self._song_bar - 1) % len(song)]
+
+    @staticmethod
+    def _trigger_step(table: StepTable, i: int, delay: float = 0.0):
+        """Triggers the instruments that have an "X" at step i (optionally delayed on the audio side)."""
+        for play in table[i]:
+            play(delay)
+
+    def _on_audio_block(self):
+        """Server callback: runs on the audio thread at the start of every buffer."""
+        if self.capture is not None:
+            self.capture.write(self._output)
+        recorder = self._recorder
+        if recorder is not None:
+            recorder.push(self._output)
+        self._apply_params()
+        if self._clock.running:
+            try:
+                self._clock.tick(self._on_clock_step)
+            except Exception:
+                self._clock.running = False
+        self._event_frame += self._clock.bufsize
+
+    def _on_clock_step(self):
+        """One 16th note from the audio clock; mirrors _run_loop's bar handling."""
+        i = self._bar_step
+        if i:
+            # Edits land from the next step on, not at the next bar
+            edited = self._edited_bar_table(self._bar_snapshot)
+            if edited is not None:
+                self._bar_snapshot, self._bar_table = edited
+                if i >= len(self._bar_table):
+                    i = 0  # the bar got shorter than where we are; start the next one
+        if i == 0:
+            # Fetch current tempo and this bar's pattern at the top of each bar
+            # (precompiled by the playhead thread; only edits recompile here)
+            self.bpm = int(self.track.get_bpm())
+            self._clock.set_bpm(self.bpm)
+            self._bar_snapshot, self._bar_table = self._next_bar_table()
+            if self.capture is not None:
+                self.capture.mark()  # this buffer is the next one written to the ring
+
+        self.step = i
+        self._trigger_step(self._bar_table, i)
+        self._publish_playhead(i)
+        self._bar_step = (i + 1) % len(self._bar_table)
+
+    def _publish_playhead(self, step: int):
+        """Stepping thread: post `step` to the mailbox and return (nothing waits on readers)."""
+        self._playhead = (self._playhead[0] + 1, step)
+        self._playhead_event.set()
+
+    def _playhead_loop(self):
+        """Forwards published steps to playhead_callback off the stepping thread."""
+        seen = self._playhead[0]
+        while self.running:
+            self._playhead_event.wait(timeout=0.1)
+            self._playhead_event.clear()
+            count, step = self._playhead
+            if self.running and self.playhead_callback and count != seen:
+                seen = count
+                try:
+                    self.playhead_callback(step)
+                except Exception:
+                    pass
+            # Compile edits here, ahead of the audio thread's next bar boundary
+            self._song_tables()
+
     def _run_loop(self):
         """
-        Simple 16th-note stepper. At each step, checks the current patterns and
-        triggers the appropriate synths/players.
+        Thread-transport 16th-note stepper. Steps are timed against absolute
+        deadlines from the transport start (see _DeadlineScheduler), so there
+        is no cumulative drift. Switches to the song's next pattern at each bar.
         """
+        self.scheduler.start(int(self.track.get_bpm()))
+        self._song_bar = 0
+        i = 0
+        table: StepTable = ()
+        compiled_from: Optional[TrackSnapshot] = None  # snapshot `table` came from
         while self.running:
-            # Fetch current tempo and patterns at the top of each bar chunk
-            bpm = int(self.track.get_bpm())
-            beat_duration = 60.0 / bpm / 4.0  # 16th note in seconds
-
-            patterns: Dict[str, str] = self.track.get_patterns().copy()
-            # Determine number of steps from the longest pattern (fallback 16)
-            steps = max((len(p) for p in patterns.values()), default=16)
-
-            for i in range(steps):
-                if not self.running:
-                    break
-
-                self.step = i
-                if self.playhead_callback:
-                    try:
-                        self.playhead_callback(i)
-                    except Exception:
-                        pass
-
-                start_time = time.time()
-
-                # Trigger instruments that have an "X" at this step
-                for name, pattern in patterns.items():
-                    if i < len(pattern) and pattern[i].upper() == "X":
-                        if name == "bass":
-                            self.bass_synth.play()
-                        elif name == "kick":
-                            self.kick_synth.play()
-                        elif name == "hihat":
-                            self.hihat_synth.play()
-                        elif name == "clap":
-                            self.clap_synth.play()
-                        elif name == "snare":
-                            self.snare_synth.play()
-                        # else: ignore unknown instruments in live mode
-
-                # Tight timing to next 16th
-                elapsed = time.time() - start_time
-                wait_time = max(0.0, beat_duration - elapsed)
-                time.sleep(wait_time)
+            if i == 0:
+                # Fetch current tempo and this bar's pattern at the top of each bar
+                bpm = int(self.track.get_bpm())
+                self.scheduler.set_bpm(bpm)
+                # Compiled once per edit; one entry per step
+                compiled_from, table = self._next_bar_table()
+
+            delay = self.scheduler.wait_next()
+            if not self.running:
+                break
+
+            if i:
+                # Edits land from the next step on, not at the next bar
+                edited = self._edited_bar_table(compiled_from)
+                if edited is not None:
+                    compiled_from, table = edited
+                    if i >= len(table):
+                        # The bar got shorter than where we are; this step starts the next one
+                        i = 0
+                        compiled_from, table = self._next_bar_table()
+
+            # Trigger first; the playhead is only posted, never drawn from here
+            self.step = i
+            self._trigger_step(table, i, delay)
+            if i == 0 and self.capture is not None:
+                # pyo plays the hit `delay` after the buffer being computed
+                self.capture.mark(self.capture.written + int(delay * self.capture.sr))
+
+            self._publish_playhead(i)
+            i = (i + 1) % len(table)
+
+
+def render_track(track, path: str, bars: Optional[int] = None, tail: float = 0.0) -> str:
+    """
+    One-shot headless render of `track` through the live synth graph.
+    Uses a small buffer so audio-clock steps land within ~1.5 ms of their sample.
+    """
+    sequencer = LiveSequencer(track, audio="offline", buffersize=64)
+    try:
+        return sequencer.render_offline(path, bars=bars, tail=tail)
+    finally:
+        sequencer.shutdown()
+
+
+def render_event_log(log_path: str, path: str, sr: Optional[int] = None,
+                     start: float = 0.0, end: Optional[float] = None) -> str:
+    """
+    Re-render a session recorded with LiveSequencer(event_log=...) through
+    the live synth graph into a 32-bit float WAV, faster than real time.
+    The log's triggers and parameter changes are replayed on their frames
+    (pyo driven one buffer at a time), so at the session's sample rate the
+    file matches a float recording of the session sample for sample
+    (audio-clock transport). `sr` re-renders at another rate; `start`/`end`
+    (seconds) select a span of the session.
+    """
+    header, events = read_event_log(log_path)
+    log_sr, bufsize = int(header["sr"]), int(header["bufsize"])
+    sr = log_sr if sr is None else int(sr)
+    scale = sr / log_sr
+    replay = [(int(round(e.frame * scale)), e) for e in events if e.kind in ("trigger", "param")]
+    replay.sort(key=lambda fe: fe[0])  # stable: same-frame events keep their log order
+    last = max((e.frame for e in events), default=0)
+    stop = int(round(last * scale))
+    if end is not None:
+        stop = min(stop, int(round(float(end) * sr)))
+    first = max(0, int(round(float(start) * sr)))
+
+    sequencer = LiveSequencer(Track(), audio="manual", buffersize=bufsize, sr=sr,
+                              sample_voices=int(header.get("voices", DEFAULT_VOICES)), capture_seconds=0)
+    try:
+        server = sequencer.server
+        server.setAmp(float(header.get("amp", AMP)))
+        # Boot settings, touching only what differs from the defaults
+        defaults = sequencer.synth_settings()
+        for instrument, params in header.get("synths", {}).items():
+            for param, value in params.items():
+                if instrument in sequencer.synths and defaults[instrument].get(param) != value:
+                    sequencer.synths[instrument].update(param, value)
+
+        def blocks():
+            i = 0
+            pos = 0
+            while pos < stop:
+                block_end = pos + bufsize
+                while i < len(replay) and replay[i][0] < block_end:
+                    frame, event = replay[i]
+                    i += 1
+                    synth = sequencer.synths.get(event.instrument)
+                    if synth is None:
+                        continue
+                    if event.kind == "trigger":
+                        synth.play(max(0, frame - pos) / sr)
+                    else:
+                        synth.update(event.param, event.value)
+                server.process()
+                # Right after process() the output buffer holds this block
+                lo, hi = max(first, pos), min(stop, block_end)
+                if hi > lo:
+                    yield sequencer._output[lo - pos:hi - pos]
+                pos = block_end
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        frames = write_float_wav_stream(path, blocks(), frame_rate=sr,
+                                        channels=int(server.getNchnls()))
+    finally:
+        sequencer.shutdown()
+    print(f"[replay] {len(replay)} events, {frames / sr:.2f}s @ {sr} Hz -> {path}")
+    return path
@@ -0,0 +1,490 @@
+# engine/offline_renderer.py
+"""
+Offline NumPy mixdown backend.
+- Decodes each sample once into a float32 (frames, channels) array.
+- Sums every hit into one preallocated buffer with slice-adds, so cost grows
+  with the number of hits x sample length, not hits x bar length.
+- Hit positions match the pydub path exactly: int(i * step_ms) milliseconds,
+  converted to frames the same way pydub slices (int(ms * sr / 1000)).
+- Uses the stdlib `wave` module for decode/encode; pydub is not needed.
+- stream_patterns() renders any number of bars block by block, carrying
+  sample tails across block edges, so peak memory is one block plus the
+  longest sample no matter how long the output is. stream_song() does the
+  same for an arrangement (a different pattern per bar).
+- stream_song_stems() renders every lane as its own stem plus the mix in the
+  same pass; write_wav_streams() writes them on a small thread pool.
+- write_float_wav_stream() writes unclipped 32-bit float WAV (what pyo
+  records), which `wave` can't.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import struct
+import wave
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from engine.step_matrix import StepMatrix
+
+DEFAULT_SR = 44100
+STREAM_BLOCK = 65536  # frames per streamed block (a multiple of the synth voices' 512)
+
+
+class Sample:
+    """A decoded WAV: float32 frames in [-1, 1] plus the source format."""
+
+    def __init__(self, data: np.ndarray, frame_rate: int, sample_width: int):
+        self.data = data  # shape (frames, channels), float32
+        self.frame_rate = int(frame_rate)
+        self.sample_width = int(sample_width)
+
+    @property
+    def channels(self) -> int:
+        return int(self.data.shape[1])
+
+    def __len__(self) -> int:
+        return int(self.data.shape[0])
+
+
+# ---------------------------
+# WAV decode / encode
+# ---------------------------
+
+def _pcm_to_float(raw: bytes, sample_width: int, channels: int) -> np.ndarray:
+    if sample_width == 1:
+        ints = np.frombuffer(raw, dtype=np.uint8).astype(np.int32) - 128
+    elif sample_width == 2:
+        ints = np.frombuffer(raw, dtype="<i2").astype(np.int32)
+    elif sample_width == 3:
+        b = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        ints = b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)
+        ints = np.where(ints & 0x800000, ints - (1 << 24), ints)
+    elif sample_width == 4:
+        ints = np.frombuffer(raw, dtype="<i4")
+    else:
+        raise ValueError(f"Unsupported sample width: {sample_width}")
+
+    scale = float(1 << (8 * sample_width - 1))
+    return (ints.astype(np.float32) / scale).reshape(-1, channels)
+
+
+def _float_to_pcm(data: np.ndarray, sample_width: int) -> bytes:
+    scale = float(1 << (8 * sample_width - 1))
+    ints = np.clip(np.round(data * scale), -scale, scale - 1).astype(np.int32)
+    if sample_width == 1:
+        return (ints + 128).astype(np.uint8).tobytes()
+    if sample_width == 2:
+        return ints.astype("<i2").tobytes()
+    if sample_width == 3:
+        return ints.astype("<i4").view(np.uint8).reshape(-1, 4)[:, :3].tobytes()
+    if sample_width == 4:
+        return ints.astype("<i4").tobytes()
+    raise ValueError(f"Unsupported sample width: {sample_width}")
+
+
+def decode_wav(path) -> Sample:
+    """Decode a PCM WAV file into a float32 Sample."""
+    with wave.open(str(path), "rb") as w:
+        channels = w.getnchannels()
+        width = w.getsampwidth()
+        rate = w.getframerate()
+        raw = w.readframes(w.getnframes())
+    return Sample(_pcm_to_float(raw, width, channels), rate, width)
+
+
+def write_wav_stream(path, blocks: Iterable[np.ndarray], frame_rate: int = DEFAULT_SR,
+                     sample_width: int = 2, channels: int = 2) -> int:
+    """Encode (frames, channels) blocks to a PCM WAV as they arrive; returns the frame count."""
+    frames = 0
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(int(channels))
+        w.setsampwidth(int(sample_width))
+        w.setframerate(int(frame_rate))
+        for block in blocks:
+            w.writeframes(_float_to_pcm(block, sample_width))
+            frames += len(block)
+    return frames
+
+
+def write_wav_streams(paths: Sequence[Any], blocks: Iterable[Sequence[np.ndarray]],
+                      frame_rate: int = DEFAULT_SR, sample_width: int = 2, channels: int = 2,
+                      workers: int = 4) -> int:
+    """
+    write_wav_stream() for several files fed in lockstep: each item of
+    `blocks` holds one block per path. Encoding and writing run on a pool of
+    `workers` threads while the next blocks render; each file's blocks are
+    written in order, with at most one in flight. Returns the frame count.
+    """
+    frames = 0
+    with contextlib.ExitStack() as stack:
+        files = []
+        for path in paths:
+            w = stack.enter_context(wave.open(str(path), "wb"))
+            w.setnchannels(int(channels))
+            w.setsampwidth(int(sample_width))
+            w.setframerate(int(frame_rate))
+            files.append(w)
+        # Entered last, so it drains before the files are closed
+        pool = stack.enter_context(ThreadPoolExecutor(max_workers=max(1, int(workers))))
+        pending: List[Optional[Future]] = [None] * len(files)
+        for group in blocks:
+            for i, (w, block) in enumerate(zip(files, group)):
+                if pending[i] is not None:
+                    pending[i].result()
+                pending[i] = pool.submit(_write_block, w, block, sample_width)
+            frames += len(group[0]) if len(group) else 0
+        for future in pending:
+            if future is not None:
+                future.result()
+    return frames
+
+
+def _write_block(w, block: np.ndarray, sample_width: int):
+    w.writeframes(_float_to_pcm(block, sample_width))
+
+
+def _float_wav_header(frames: int, frame_rate: int, channels: int) -> bytes:
+    data = frames * channels * 4
+    return (b"RIFF" + struct.pack("<I", 4 + 26 + 12 + 8 + data) + b"WAVE"
+            + b"fmt " + struct.pack("<IHHIIHHH", 18, 3, channels, frame_rate,
+                                    frame_rate * channels * 4, channels * 4, 32, 0)
+            + b"fact" + struct.pack("<II", 4, frames)
+            + b"data" + struct.pack("<I", data))
+
+
+def write_float_wav_stream(path, blocks: Iterable[np.ndarray], frame_rate: int = DEFAULT_SR,
+                           channels: int = 2) -> int:
+    """Write (frames, channels) blocks to a 32-bit float WAV as they arrive; returns the frame count."""
+    frames = 0
+    with open(str(path), "wb") as f:
+        f.write(_float_wav_header(0, int(frame_rate), int(channels)))
+        for block in blocks:
+            f.write(np.ascontiguousarray(block, dtype="<f4").tobytes())
+            frames += len(block)
+        f.seek(0)
+        f.write(_float_wav_header(frames, int(frame_rate), int(channels)))
+    return frames
+
+
+def write_wav(path, data: np.ndarray, frame_rate: int = DEFAULT_SR, sample_width: int = 2):
+    """Encode a (frames, channels) float array to a PCM WAV file (clipped to [-1, 1])."""
+    if data.ndim == 1:
+        data = data[:, None]
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(int(data.shape[1]))
+        w.setsampwidth(int(sample_width))
+        w.setframerate(int(frame_rate))
+        w.writeframes(_float_to_pcm(data, sample_width))
+
+
+def conform(sample: Sample, frame_rate: int, channels: int) -> np.ndarray:
+    """
+    Return sample data at the given rate/channel count.
+    Mono is duplicated to every channel (as pydub does); rate changes use
+    linear interpolation, which is only hit for mismatched assets.
+    """
+    data = sample.data
+    if sample.frame_rate != frame_rate and len(sample):
+        n_out = int(round(len(sample) * frame_rate / sample.frame_rate))
+        src_t = np.arange(len(sample), dtype=np.float64)
+        dst_t = np.arange(n_out, dtype=np.float64) * (sample.frame_rate / frame_rate)
+        data = np.stack([np.interp(dst_t, src_t, data[:, c]) for c in range(data.shape[1])], axis=1)
+        data = data.astype(np.float32)
+    if data.shape[1] != channels:
+        data = np.repeat(data[:, :1], channels, axis=1) if data.shape[1] == 1 else data[:, :channels]
+    return np.ascontiguousarray(data, dtype=np.float32)
+
+
+# ---------------------------
+# Timing
+# ---------------------------
+
+def step_duration_ms(bpm) -> float:
+    """16th note duration in ms (same formula as the pydub exporter)."""
+    return 60_000 / bpm / 4
+
+
+def ms_to_frames(ms, frame_rate: int) -> int:
+    """Millisecond position -> frame index, matching pydub's slicing."""
+    return int(ms * frame_rate / 1000.0)
+
+
+def step_offsets(steps: int, bpm, frame_rate: int = DEFAULT_SR) -> np.ndarray:
+    """Frame offset of every 16th-note step in a bar."""
+    step_ms = step_duration_ms(bpm)
+    return np.array([ms_to_frames(int(i * step_ms), frame_rate) for i in range(steps)], dtype=np.int64)
+
+
+def bar_frames(steps: int, bpm, frame_rate: int = DEFAULT_SR) -> int:
+    return ms_to_frames(int(step_duration_ms(bpm) * steps), frame_rate)
+
+
+# ---------------------------
+# Mixdown
+# ---------------------------
+
+def mix_hits(out: np.ndarray, data: np.ndarray, offsets) -> None:
+    """Add `data` into `out` at every frame offset; tails past the end are cut."""
+    total = out.shape[0]
+    for pos in offsets:
+        pos = int(pos)
+        if pos >= total:
+            continue
+        n = min(len(data), total - pos)
+        out[pos:pos + n] += data[:n]
+
+
+def hit_steps(pattern: str) -> np.ndarray:
+    """Indices of the "X" steps in a pattern string."""
+    return np.array([i for i, ch in enumerate(pattern) if ch.upper() == "X"], dtype=np.int64)
+
+
+def render_patterns(
+    patterns: Mapping[str, str],
+    bpm,
+    samples: Mapping[str, Sample],
+    steps: Optional[int] = None,
+    frame_rate: int = DEFAULT_SR,
+    channels: int = 2,
+    voices: Optional[Mapping[str, Any]] = None,
+) -> np.ndarray:
+    """
+    Render one bar of `patterns` into a (frames, channels) float32 buffer.
+    Lanes in `voices` (engine.offline_synths) are synthesized and take
+    precedence over samples; instruments with neither are skipped.
+    """
+    if steps is None:
+        steps = max([len(p) for p in patterns.values()] + [16])
+
+    out = np.zeros((bar_frames(steps, bpm, frame_rate), channels), dtype=np.float32)
+    offsets = step_offsets(steps, bpm, frame_rate)
+
+    for instrument, pattern in patterns.items():
+        hits = hit_steps(pattern[:steps])
+        if not hits.size:
+            continue
+        voice = (voices or {}).get(instrument)
+        if voice is not None:
+            out += voice.render_hits(offsets[hits], out.shape[0])[:, None]
+            continue
+        sample = samples.get(instrument)
+        if sample is not None:
+            mix_hits(out, conform(sample, frame_rate, channels), offsets[hits])
+    return out
+
+
+def pattern_hits(patterns, steps: int) -> Dict[str, np.ndarray]:
+    """
+    {instrument: hit step indices} for the lanes that play, read straight from
+    a StepMatrix's gates or parsed from a {instrument: "X"/"-"} mapping.
+    """
+    if isinstance(patterns, StepMatrix):
+        hits = (patterns.hit_steps(name) for name in patterns.names)
+        return {name: h[h < steps] for name, h in zip(patterns.names, hits) if h.size}
+    hits = {}
+    for instrument, pattern in patterns.items():
+        h = hit_steps(pattern[:steps])
+        if h.size:
+            hits[instrument] = h
+    return hits
+
+
+class SongLayout(NamedTuple):
+    """Where every lane of an arrangement hits (see song_layout())."""
+    bar_len: int                            # frames per bar
+    total: int                              # frames to render, tail included
+    bar_lanes: List[Dict[str, np.ndarray]]  # per bar: {instrument: hit frames within the bar}
+    instruments: Tuple[str, ...]            # lanes with at least one hit, in first-hit order
+
+    def hits(self, instrument: str, start: int = 0, end: Optional[int] = None) -> np.ndarray:
+        """Absolute frames in [start, end) where `instrument` hits, bar by bar."""
+        end = self.total if end is None else end
+        bar_len, bar_lanes = self.bar_len, self.bar_lanes
+        first = start // bar_len
+        last = min((end - 1) // bar_len, len(bar_lanes) - 1)
+        parts = [b * bar_len + bar_lanes[b][instrument]
+                 for b in range(first, last + 1) if instrument in bar_lanes[b]]
+        if not parts:
+            return np.zeros(0, dtype=np.int64)
+        hits = np.concatenate(parts) if len(parts) > 1 else parts[0]
+        return hits[(hits >= start) & (hits < end)]
+
+
+def song_layout(bar_patterns: Sequence[Any], bpm, steps: Optional[int] = None,
+                frame_rate: int = DEFAULT_SR, tail: float = 0.0) -> SongLayout:
+    """
+    Hit frames of an arrangement, one pattern per bar (a StepMatrix or an
+    {instrument: "X"/"-"} mapping). Repeated patterns should be the same
+    object: hit offsets are worked out once per distinct pattern.
+    """
+    distinct = list({id(p): p for p in bar_patterns}.values())
+    if steps is None:
+        steps = max([_pattern_steps(p) for p in distinct] + [16])
+    bar_len = bar_frames(steps, bpm, frame_rate)
+    offsets = step_offsets(steps, bpm, frame_rate)
+    total = bar_len * len(bar_patterns) + int(round(max(0.0, float(tail)) * frame_rate))
+
+    compiled: Dict[int, Dict[str, np.ndarray]] = {}
+    for pats in distinct:
+        compiled[id(pats)] = {i: offsets[h] for i, h in pattern_hits(pats, steps).items()}
+    instruments = tuple(dict.fromkeys(i for hits in compiled.values() for i in hits))
+    return SongLayout(bar_len, total, [compiled[id(p)] for p in bar_patterns], instruments)
+
+
+def stream_song(
+    bar_patterns: Sequence[Any],
+    bpm,
+    samples: Mapping[str, Sample],
+    steps: Optional[int] = None,
+    frame_rate: int = DEFAULT_SR,
+    channels: int = 2,
+    voices: Optional[Mapping[str, Any]] = None,
+    tail: float = 0.0,
+    block: int = STREAM_BLOCK,
+) -> Iterator[np.ndarray]:
+    """
+    Yield an arrangement, one pattern per bar (see song_layout()) plus `tail`
+    seconds, as (frames, channels) float32 blocks of at most `block` frames.
+    Bars are tiled at the one-bar length of render_patterns(), so a single bar
+    renders identically, and tails ring on into the next bar (and pattern)
+    instead of being cut.
+    """
+    layout = song_layout(bar_patterns, bpm, steps, frame_rate, tail)
+    bar_len, total = layout.bar_len, layout.total
+    lanes = _song_lanes(layout, samples, frame_rate, channels, voices)
+    longest = max([len(data) for _, data, _ in lanes if data is not None] + [0])
+
+    # acc[:block] is the block being built; acc[block:] holds tails that spill past it
+    acc = np.zeros((block + longest, channels), dtype=np.float32)
+    pos = 0
+    while pos < total and bar_len > 0:
+        n = min(block, total - pos)
+        for instrument, data, voice in lanes:
+            starts = layout.hits(instrument, pos, pos + n) - pos
+            if voice is not None:
+                acc[:n] += voice.render_block(starts, n)[:, None]
+            elif starts.size:
+                mix_hits(acc, data, starts)
+        yield acc[:n].copy()
+
+        acc[:longest] = acc[n:n + longest]
+        acc[longest:] = 0.0
+        pos += n
+
+
+def stream_song_stems(
+    bar_patterns: Sequence[Any],
+    bpm,
+    samples: Mapping[str, Sample],
+    steps: Optional[int] = None,
+    frame_rate: int = DEFAULT_SR,
+    channels: int = 2,
+    voices: Optional[Mapping[str, Any]] = None,
+    tail: float = 0.0,
+    block: int = STREAM_BLOCK,
+) -> Tuple[Tuple[str, ...], Iterator[List[np.ndarray]]]:
+    """
+    stream_song() split by lane, in one pass: returns the lane names and an
+    iterator of [mix, stem, stem, ...] block lists (stems in name order).
+    The layout, samples and synth voices are shared by every stem, and the
+    mix is the sum of the stems (equal to stream_song() up to float32
+    rounding).
+    """
+    layout = song_layout(bar_patterns, bpm, steps, frame_rate, tail)
+    lanes = _song_lanes(layout, samples, frame_rate, channels, voices)
+    return tuple(lane[0] for lane in lanes), _stream_stems(layout, lanes, channels, block)
+
+
+def _stream_stems(layout: SongLayout, lanes, channels: int, block: int) -> Iterator[List[np.ndarray]]:
+    # Per lane: acc[:block] is the block being built, acc[block:] its spilled tail
+    accs = [np.zeros((block + (len(data) if data is not None else 0), channels), dtype=np.float32)
+            for _, data, _ in lanes]
+    pos = 0
+    while pos < layout.total and layout.bar_len > 0:
+        n = min(block, layout.total - pos)
+        mix = np.zeros((n, channels), dtype=np.float32)
+        stems = [mix]
+        for (instrument, data, voice), acc in zip(lanes, accs):
+            starts = layout.hits(instrument, pos, pos + n) - pos
+            if voice is not None:
+                acc[:n] += voice.render_block(starts, n)[:, None]
+            elif starts.size:
+                mix_hits(acc, data, starts)
+            stem = acc[:n].copy()
+            mix += stem
+            stems.append(stem)
+
+            spill = len(acc) - block
+            acc[:spill] = acc[n:n + spill]
+            acc[spill:] = 0.0
+        yield stems
+        pos += n
+
+
+def _song_lanes(layout: SongLayout, samples: Mapping[str, Sample], frame_rate: int, channels: int,
+                voices: Optional[Mapping[str, Any]]) -> List[Tuple[str, Optional[np.ndarray], Any]]:
+    """(instrument, conformed sample or None, voice or None) per playable lane, in first-hit order."""
+    lanes = []
+    for instrument in layout.instruments:
+        voice = (voices or {}).get(instrument)
+        if voice is not None:
+            lanes.append((instrument, None, voice))
+            continue
+        sample = samples.get(instrument)
+        if sample is not None:
+            lanes.append((instrument, conform(sample, frame_rate, channels), None))
+    return lanes
+
+
+def _pattern_steps(patterns) -> int:
+    if isinstance(patterns, StepMatrix):
+        return patterns.steps if len(patterns) else 0
+    return max((len(p) for p in patterns.values()), default=0)
+
+
+def stream_patterns(
+    patterns: Mapping[str, str],
+    bpm,
+    samples: Mapping[str, Sample],
+    bars: int = 1,
+    steps: Optional[int] = None,
+    frame_rate: int = DEFAULT_SR,
+    channels: int = 2,
+    voices: Optional[Mapping[str, Any]] = None,
+    tail: float = 0.0,
+    block: int = STREAM_BLOCK,
+) -> Iterator[np.ndarray]:
+    """`bars` loops of one pattern through stream_song()."""
+    return stream_song([patterns] * max(1, int(bars)), bpm, samples, steps=steps,
+                       frame_rate=frame_rate, channels=channels, voices=voices,
+                       tail=tail, block=block)
+
+
+def load_samples(paths: Mapping[str, Path], names=None) -> Dict[str, Sample]:
+    """Decode each existing sample once; unreadable files are skipped."""
+    bank: Dict[str, Sample] = {}
+    for name, path in paths.items():
+        if names is not None and name not in names:
+            continue
+        if not path or not Path(path).exists():
+            continue
+        try:
+            bank[name] = decode_wav(path)
+        except Exception:
+            continue
+    return bank
+
+
+def output_format(samples: Mapping[str, Sample]) -> Tuple[int, int, int]:
+    """(frame_rate, channels, sample_width) the pydub path would end up with."""
+    if not samples:
+        return DEFAULT_SR, 2, 2
+    return (
+        max(s.frame_rate for s in samples.values()),
+        max(s.channels for s in samples.values()),
+        max(s.sample_width for s in samples.values()),
+    )
@@ -0,0 +1,407 @@
+# engine/offline_synths.py
+"""
+Offline NumPy ports of KickSynth and BassSynth.
+- Block-based: each voice renders the next N frames and keeps its oscillator,
+  envelope and filter state between blocks, like the pyo objects they mirror.
+- Follows pyo 1.0.5's Linseg / Adsr / Sine / Osc(SquareTable) / SuperSaw maths,
+  so an export sounds like the live synth without a real-time recording.
+- Oscillators free-run from t=0 (as they do from server start in live mode).
+
+Checked against a pyo offline render by benchmarks/check_offline_synths.py.
+"""
+
+from __future__ import annotations
+
+import abc
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from engine.offline_renderer import DEFAULT_SR
+
+TWO_PI = 2.0 * np.pi
+
+# Lanes the exporter synthesizes instead of reading assets/<name>.wav
+SYNTH_LANES = ("kick", "bass")
+
+# pyo's SuperSaw tables at its defaults (detune=0.5 -> row 63, bal=0.7 -> row 88)
+_SUPERSAW_DETUNES = np.array([
+    0.9983605263020577, 0.9990629475672279, 0.999709075114393, 1.0,
+    1.0002967154882902, 1.0009263384767009, 1.001601162736803,
+])
+_SUPERSAW_BALANCES = np.array([
+    0.5424931383222766, 0.5424931383222766, 0.5424931383222766, 0.6142074173228347,
+    0.5799797524955049, 0.5799797524955049, 0.5799797524955049,
+])
+_SUPERSAW_START = np.array([-0.75, -0.5, -0.25, 0.0, 0.25, 0.5, 0.75])
+_SUPERSAW_GAIN = 0.2
+
+_SQUARE_TABLE: Optional[np.ndarray] = None
+
+
+def _square_table(size: int = 8192, order: int = 10) -> np.ndarray:
+    """SquareTable(order=10): odd harmonics 1/k, plus a guard point for interpolation."""
+    global _SQUARE_TABLE
+    if _SQUARE_TABLE is None:
+        x = np.arange(size + 1) / size
+        table = np.zeros(size + 1)
+        for k in range(1, order * 2, 2):
+            table += np.sin(TWO_PI * k * x) / k
+        _SQUARE_TABLE = table
+    return _SQUARE_TABLE
+
+
+def _advance_phase(phase: float, incs: np.ndarray):
+    """Per-sample phases (value before each increment) and the carried phase."""
+    acc = np.cumsum(incs)
+    pos = phase + np.concatenate(([0.0], acc[:-1]))
+    return pos, (phase + acc[-1]) % 1.0
+
+
+# ---------------------------
+# Envelopes
+# ---------------------------
+
+class _Linseg:
+    """Two-point Linseg [(0, start), (time, end)]; outputs 0 until first play."""
+
+    def __init__(self, start: float, end: float, time: float, sr: int):
+        self.sr = sr
+        self.set_points(start, end, time)
+        self.playing = False
+        self.index = 0
+
+    def set_points(self, start: float, end: float, time: float):
+        self.start, self.end, self.time = float(start), float(end), float(time)
+
+    def play(self):
+        self.playing = True
+        self.index = 0
+
+    def render(self, n: int) -> np.ndarray:
+        if not self.playing:
+            return np.zeros(n)
+        k = self.index + np.arange(n)
+        ramp_len = self.time * self.sr
+        inc = (self.end - self.start) / ramp_len if ramp_len > 1 else self.end - self.start
+        out = np.where(k < ramp_len, self.start + inc * k, self.end)
+        self.index += n
+        return out
+
+
+class _Adsr:
+    """
+    pyo Adsr. dur=0 holds sustain until stop; dur>0 releases from the sustain
+    level and stops the stream once past dur (checked at block start).
+    Retriggers ramp up from the current value.
+    """
+
+    def __init__(self, attack: float, decay: float, sustain: float, release: float,
+                 dur: float, sr: int):
+        self.attack = max(float(attack), 1e-6)
+        self.decay = max(float(decay), 1e-6)
+        self.sustain = min(max(float(sustain), 0.0), 1.0)
+        self.release = max(float(release), 1e-6)
+        self.dur = float(dur)
+        self.sr = sr
+
+        self.active = False
+        self.index = 0
+        self.offset = 0.0
+        self.current = 0.0
+
+    def play(self):
+        self.active = True
+        self.index = 0
+        self.offset = self.current
+
+    def render(self, n: int) -> np.ndarray:
+        if self.active and self.dur > 0 and self.index / self.sr > self.dur:
+            self.active = False
+        if not self.active:
+            return np.zeros(n)
+
+        t = (self.index + np.arange(n)) / self.sr
+        a, d, s = self.attack, self.decay, self.sustain
+
+        out = np.full(n, s)
+        if self.dur > 0:
+            rel = t >= self.dur - self.release
+            out[rel] = (self.dur - t[rel]) / self.release * s
+            out[t > self.dur] = 0.0
+        in_decay = t <= a + d
+        out[in_decay] = (d - (t[in_decay] - a)) / d * (1.0 - s) + s
+        in_attack = t <= a
+        out[in_attack] = t[in_attack] / a * (1.0 - self.offset) + self.offset
+
+        self.current = float(out[-1])
+        self.index += n
+        return out
+
+
+class _Biquad:
+    """
+    RBJ high-pass (Q=1) as used inside pyo's SuperSaw, with pyo's DF1 state.
+    Fixed-frequency blocks are vectorized: the two-pole recursion is split into
+    complex one-poles and the previous outputs are folded into the first inputs.
+    """
+
+    _CHUNK = 64  # keeps |p|^-n well inside float64 range
+
+    def __init__(self, sr: int):
+        self.sr = sr
+        self.freq: Optional[float] = None
+        self.x1 = self.x2 = self.y1 = self.y2 = 0.0
+
+    def set_freq(self, freq: float):
+        if freq == self.freq:
+            return
+        self.freq = freq
+        w0 = TWO_PI * freq / self.sr
+        c, alpha = np.cos(w0), np.sin(w0) * 0.5
+        a0 = 1 + alpha
+        self.b0 = self.b2 = (1 + c) * 0.5 / a0
+        self.b1 = -(1 + c) / a0
+        self.a1, self.a2 = -2 * c / a0, (1 - alpha) / a0
+
+        # 1/(1 + a1 w + a2 w^2) = p/(p-q) / (1 - p w) + conj
+        self.p = complex(np.roots([1.0, self.a1, self.a2])[0])
+        self.gain = self.p / (self.p - self.p.conjugate())
+
+    def _tick(self, x: float) -> float:
+        y = (self.b0 * x + self.b1 * self.x1 + self.b2 * self.x2
+             - self.a1 * self.y1 - self.a2 * self.y2)
+        self.x2, self.x1 = self.x1, x
+        self.y2, self.y1 = self.y1, y
+        return y
+
+    def process_sweep(self, x: np.ndarray, freqs: np.ndarray) -> np.ndarray:
+        """Per-sample coefficients (pyo recomputes them whenever freq moves)."""
+        out = np.empty_like(x)
+        for i in range(len(x)):
+            self.set_freq(float(freqs[i]))
+            out[i] = self._tick(float(x[i]))
+        return out
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        out = np.empty_like(x)
+        for i in range(0, len(x), self._CHUNK):
+            seg = x[i:i + self._CHUNK]
+            if len(seg) < 2:
+                out[i:i + len(seg)] = [self._tick(float(v)) for v in seg]
+                continue
+
+            hist = np.concatenate(([self.x2, self.x1], seg))
+            v = self.b0 * hist[2:] + self.b1 * hist[1:-1] + self.b2 * hist[:-2]
+            v[0] -= self.a1 * self.y1 + self.a2 * self.y2
+            v[1] -= self.a2 * self.y1
+
+            powers = self.p ** np.arange(len(seg))
+            y = 2.0 * (self.gain * np.cumsum(v / powers) * powers).real
+
+            self.x2, self.x1 = float(seg[-2]), float(seg[-1])
+            self.y2, self.y1 = float(y[-2]), float(y[-1])
+            out[i:i + len(seg)] = y
+        return out
+
+
+# ---------------------------
+# Voices
+# ---------------------------
+
+class _OfflineVoice(abc.ABC):
+    sr: int
+
+    @abc.abstractmethod
+    def trigger(self):
+        """Start a hit at the next rendered frame."""
+
+    @abc.abstractmethod
+    def render(self, n: int) -> np.ndarray:
+        """The next n frames, continuing from the current state."""
+
+    @abc.abstractmethod
+    def params(self) -> tuple:
+        """Every setting that shapes the output (part of the render cache key)."""
+
+    def render_hits(self, offsets, frames: int, block: int = 512) -> np.ndarray:
+        """Render `frames` samples with a trigger at every frame offset."""
+        return self.render_block(offsets, frames, block)
+
+    def render_block(self, offsets, frames: int, block: int = 512) -> np.ndarray:
+        """
+        Continue from the current state for `frames` samples, triggering at
+        every offset (relative to this call). Consecutive calls render one
+        continuous stream; keep `frames` a multiple of `block` for output
+        identical to a single render_hits() call.
+        """
+        return _render_triggered(self.trigger, self.render, offsets, frames, block)
+
+
+def _render_triggered(trigger, render, offsets, frames: int, block: int) -> np.ndarray:
+    out = np.zeros(frames, dtype=np.float32)
+    hits = sorted(int(o) for o in offsets if 0 <= int(o) < frames)
+    h = 0
+    pos = 0
+    while pos < frames:
+        end = min(pos + block, frames)
+        while pos < end:
+            while h < len(hits) and hits[h] <= pos:
+                trigger()
+                h += 1
+            seg_end = min(end, hits[h]) if h < len(hits) else end
+            out[pos:seg_end] = render(seg_end - pos)
+            pos = seg_end
+    return out
+
+
+class KickVoice(_OfflineVoice):
+    """KickSynth: Sine swept by Linseg(2f -> f over decay), shaped by Adsr * volume."""
+
+    def __init__(self, base_freq: float = 50, decay: float = 0.3, volume: float = 1.5,
+                 sr: int = DEFAULT_SR):
+        self.sr = sr
+        self.base_freq = float(base_freq)
+        self.decay = float(decay)
+        self.volume = float(volume)
+        self.pitch_env = _Linseg(self.base_freq * 2, self.base_freq, self.decay, sr)
+        self.env = _Adsr(attack=0.001, decay=self.decay, sustain=0, release=0.05, dur=0, sr=sr)
+        self.phase = 0.0
+
+    @classmethod
+    def from_synth(cls, synth, sr: int = DEFAULT_SR) -> "KickVoice":
+        return cls(synth.base_freq, synth.decay, synth.volume.value, sr=sr)
+
+    def params(self) -> tuple:
+        return ("kick", self.base_freq, self.decay, self.volume, self.sr)
+
+    def trigger(self):
+        self.pitch_env.play()
+        self.env.play()
+
+    def render(self, n: int) -> np.ndarray:
+        freq = self.pitch_env.render(n)
+        pos, self.phase = _advance_phase(self.phase, freq / self.sr)
+        return np.sin(TWO_PI * pos) * self.env.render(n) * self.volume
+
+
+class BassVoice(_OfflineVoice):
+    """
+    BassSynth: saw (SuperSaw) / square / sine oscillator * Adsr(dur=0.5).
+    The freq SigTo starts at 0 and ramps to `freq` over its 50 ms time, which
+    sets the oscillator phases for the rest of the render.
+    """
+
+    FREQ_RAMP = 0.05  # BassSynth's SigTo time
+
+    def __init__(self, freq: float = 60, wave: str = "saw", decay: float = 0.2,
+                 volume: float = 1.0, sr: int = DEFAULT_SR):
+        self.sr = sr
+        self.freq = float(freq)
+        self.wave = str(wave)
+        self.decay = float(decay)
+        self.volume = float(volume)
+        self.env = _Adsr(attack=0.01, decay=self.decay, sustain=0.3, release=0.05, dur=0.5, sr=sr)
+
+        self.index = 0
+        self._ramp_len = int(self.FREQ_RAMP * sr)
+        self.phase = 0.0
+        self.phase2 = 0.0
+        self._saw_pos = _SUPERSAW_START.copy()
+        self._hpf = _Biquad(sr)
+
+    @classmethod
+    def from_synth(cls, synth, sr: int = DEFAULT_SR) -> "BassVoice":
+        return cls(synth.freq.value, synth.wave, synth.decay, synth.volume.value, sr=sr)
+
+    def params(self) -> tuple:
+        return ("bass", self.freq, self.wave, self.decay, self.volume, self.sr)
+
+    def trigger(self):
+        self.env.play()
+
+    def _freqs(self, n: int) -> Optional[np.ndarray]:
+        """Per-sample SigTo output while ramping, None once settled."""
+        if self.index + 1 >= self._ramp_len:
+            return None
+        k = self.index + np.arange(n)
+        return self.freq * np.minimum(k + 1, self._ramp_len) / self._ramp_len
+
+    def _saw(self, n: int, freqs: Optional[np.ndarray]) -> np.ndarray:
+        nyquist = self.sr * 0.49
+        if freqs is None:
+            fr = min(max(self.freq, 1.0), nyquist)
+            steps = np.arange(n + 1)[:, None] * (fr * _SUPERSAW_DETUNES * 2.0 / self.sr)
+        else:
+            fr = np.clip(freqs, 1.0, nyquist)
+            acc = np.concatenate(([0.0], np.cumsum(fr * 2.0 / self.sr)))
+            steps = acc[:, None] * _SUPERSAW_DETUNES
+
+        pos = (self._saw_pos + steps + 1.0) % 2.0 - 1.0
+        self._saw_pos = pos[-1]
+        raw = pos[:-1] @ _SUPERSAW_BALANCES
+
+        if freqs is None:
+            self._hpf.set_freq(fr)
+            return self._hpf.process(raw) * _SUPERSAW_GAIN
+        return self._hpf.process_sweep(raw, fr) * _SUPERSAW_GAIN
+
+    def _osc(self, n: int) -> np.ndarray:
+        freqs = self._freqs(n)
+        amp = self.volume * 2
+        if self.wave == "saw":
+            return self._saw(n, freqs) * amp
+
+        incs = (freqs if freqs is not None else np.full(n, self.freq)) / self.sr
+        pos, self.phase = _advance_phase(self.phase, incs)
+        if self.wave == "square":
+            # Osc advances its pointer before reading the table
+            table = _square_table()
+            size = len(table) - 1
+            return np.interp(((pos + incs) % 1.0) * size, np.arange(size + 1), table) * amp
+
+        pos2, self.phase2 = _advance_phase(self.phase2, incs * 2)
+        return np.sin(TWO_PI * pos) * amp + np.sin(TWO_PI * pos2) * self.volume * 0.5
+
+    def render(self, n: int) -> np.ndarray:
+        # The oscillator free-runs; the envelope gates it.
+        out = self._osc(n) * self.env.render(n)
+        self.index += n
+        return out
+
+    def render_osc(self, frames: int, block: int = 512) -> np.ndarray:
+        """The free-running oscillator alone: the same whatever the hits."""
+        out = np.empty(frames, dtype=np.float32)
+        for pos in range(0, frames, block):
+            n = min(block, frames - pos)
+            out[pos:pos + n] = self._osc(n)
+            self.index += n
+        return out
+
+    def render_env(self, offsets, frames: int, block: int = 512) -> np.ndarray:
+        """
+        The envelope alone, triggered at every offset. render_osc() *
+        render_env() is render_hits() up to rounding (the oscillator isn't
+        split at the hits).
+        """
+        return _render_triggered(self.env.play, self.env.render, offsets, frames, block)
+
+
+def make_voices(track, sr: int = DEFAULT_SR) -> Dict[str, Any]:
+    """
+    Fresh offline voices for the synthesized lanes, using the live synths'
+    current settings when the track is attached to a LiveSequencer.
+    """
+    seq = getattr(track, "sequencer", None)
+    kick_synth = getattr(seq, "kick_synth", None)
+    bass_synth = getattr(seq, "bass_synth", None)
+
+    kick = KickVoice.from_synth(kick_synth, sr) if kick_synth is not None else KickVoice(sr=sr)
+    if bass_synth is not None:
+        bass = BassVoice.from_synth(bass_synth, sr)
+    else:
+        # DSL mode stores bass settings on the track itself
+        settings = dict(getattr(track, "bass_synth_settings", {}) or {})
+        bass = BassVoice(sr=sr, **{k: v for k, v in settings.items()
+                                        if k in ("freq", "wave", "decay", "volume")})
+    return {"kick": kick, "bass": bass}
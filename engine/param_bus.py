@@ -0,0 +1,43 @@
+# engine/param_bus.py
+"""
+Coalescing parameter bus between control sources and the audio thread.
+- Any thread (Tk sliders, a remote control, scripts) set()s synth parameters;
+  set() only queues and never blocks or touches pyo.
+- The audio thread drain()s the bus once per buffer and gets the latest value
+  of each (instrument, parameter) changed since the last drain, so a fast
+  slider drag costs at most one synth update per parameter per buffer
+  however many values the UI sent.
+- Smoothing is the synths' job (SigTo volumes / frequency), so applied
+  values glide instead of stepping.
+"""
+
+from __future__ import annotations
+
+import queue
+from typing import Any, Dict, Tuple
+
+ParamKey = Tuple[str, str]  # (instrument, parameter)
+
+
+class ParamBus:
+    def __init__(self):
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self.received = 0  # set() calls (writers)
+        self.applied = 0   # values handed out by drain() (audio thread)
+
+    def set(self, instrument: str, param: str, value: Any):
+        """Queue a change (any thread, never blocks); only the latest per buffer is applied."""
+        self.received += 1
+        self._queue.put((instrument, param, value))
+
+    def drain(self) -> Dict[ParamKey, Any]:
+        """Audio thread: {(instrument, param): latest value} queued since the last drain."""
+        latest: Dict[ParamKey, Any] = {}
+        while True:
+            try:
+                instrument, param, value = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            latest[(instrument, param)] = value  # later values win; order of first change kept
+        self.applied += len(latest)
+        return latest
@@ -15,6 +15,12 @@ Format:
     "clap":  "----X-------X---"
   }
 }
+
+Song mode adds the whole pattern bank and the arrangement ("instruments" is
+still the pattern being edited, so older readers load that one):
+  "current": "A",
+  "patterns": {"A": {...}, "B": {...}},
+  "song": [["A", 3], ["B", 1]]
 """
 
 from __future__ import annotations
@@ -24,16 +30,26 @@ import os
 from typing import Dict, Any
 
 
-def save_preset(track, steps: int, file_path: str, name: str | None = None) -> str:
-    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
-
+def preset_data(track, steps: int, name: str) -> Dict[str, Any]:
+    """The preset dict save_preset() writes."""
     patterns = track.get_patterns().copy()
     data: Dict[str, Any] = {
-        "name": name or os.path.splitext(os.path.basename(file_path))[0],
+        "name": name,
         "bpm": int(track.get_bpm()),
         "steps": int(steps),
         "instruments": patterns,
     }
+    if len(track.get_pattern_names()) > 1 or track.get_song():
+        data["current"] = track.current
+        data["patterns"] = {name: dict(track.get_pattern(name)) for name in track.get_pattern_names()}
+        data["song"] = [[name, int(repeats)] for name, repeats in track.get_song()]
+    return data
+
+
+def save_preset(track, steps: int, file_path: str, name: str | None = None) -> str:
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+
+    data = preset_data(track, steps, name or os.path.splitext(os.path.basename(file_path))[0])
 
     with open(file_path, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=2)
@@ -53,9 +69,41 @@ def load_preset(file_path: str) -> Dict[str, Any]:
     # Coerce instrument values to strings
     instruments = {k: str(v) for k, v in instruments.items()}
 
-    return {
+    result = {
         "name": data.get("name") or os.path.splitext(os.path.basename(file_path))[0],
         "bpm": bpm,
         "steps": steps,
         "instruments": instruments,
     }
+    if data.get("patterns"):
+        result["patterns"] = {str(name): {k: str(v) for k, v in (pats or {}).items()}
+                              for name, pats in data["patterns"].items()}
+        result["song"] = [(str(name), int(repeats)) for name, repeats in data.get("song") or []]
+        result["current"] = str(data.get("current") or next(iter(result["patterns"])))
+    return result
+
+
+def apply_preset(track, data: Dict[str, Any]) -> None:
+    """
+    Apply a load_preset() result to a Track (BPM, length, patterns, song),
+    as one batch: a single snapshot / change notification for the whole preset.
+    The preset's bank replaces the track's: bank slots and lanes it doesn't
+    have are cleared (a preset without a bank is just the current pattern).
+    """
+    with track.batch():
+        track.set_bpm(int(data["bpm"]))
+        track.set_steps(int(data["steps"]))
+        bank = data.get("patterns") or {track.current: data["instruments"]}
+        blank = "-" * track.get_steps()
+        for name, patterns in bank.items():
+            track.select_pattern(name)
+            for instrument in track.get_matrix().names:
+                if instrument not in patterns:
+                    track.add_pattern(instrument, blank)
+            for instrument, pattern in patterns.items():
+                track.add_pattern(instrument, pattern)
+        track.select_pattern(data.get("current", track.current))
+        track.set_song(data.get("song", []))
+        for name in track.get_pattern_names():
+            if name not in bank:
+                track.remove_pattern(name)
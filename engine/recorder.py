@@ -0,0 +1,121 @@
+# engine/recorder.py
+"""
+Background recording writer for the live output.
+- The audio thread only copies each output buffer into a preallocated slot
+  and queues it (push() never blocks, allocates or touches the disk); a
+  writer thread encodes and writes the slots in order.
+- Formats: "wav24" (24-bit PCM WAV, stdlib `wave`) or "flac" (24-bit FLAC,
+  needs the optional `soundfile` package), about 3/4 and roughly 1/3 of
+  the bandwidth of pyo's 32-bit float recordings.
+- When the writer falls more than the slot pool behind, blocks are dropped
+  and counted (RecordStats), never waited for.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+from typing import Iterator, NamedTuple
+
+import numpy as np
+
+from engine.offline_renderer import write_wav_stream
+
+FORMATS = {"wav24": ".wav", "flac": ".flac"}
+POOL_SECONDS = 4.0  # how far the writer may fall behind before blocks are dropped
+
+
+class RecordStats(NamedTuple):
+    blocks: int       # blocks pushed by the audio thread
+    dropped: int      # of those, lost because every slot was queued (writer too slow)
+    written: int      # blocks written to the file
+    max_queued: int   # most blocks waiting for the writer at once
+    error: str = ""   # why the writer stopped early, if it did
+
+
+class BlockRecorder:
+    def __init__(self, path, sr: int, channels: int, block: int, fmt: str = "wav24",
+                 pool_seconds: float = POOL_SECONDS):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown recording format: {fmt} (use {', '.join(FORMATS)})")
+        self.path = str(path)
+        self.sr, self.channels, self.block, self.fmt = int(sr), int(channels), int(block), fmt
+        if fmt == "flac":
+            import soundfile  # only needed for FLAC recordings
+
+            self._file = soundfile.SoundFile(self.path, "w", self.sr, self.channels,
+                                             format="FLAC", subtype="PCM_24")
+        else:
+            self._file = None
+
+        slots = max(2, int(pool_seconds * self.sr / self.block))
+        self._free: queue.SimpleQueue = queue.SimpleQueue()
+        for _ in range(slots):
+            self._free.put(np.zeros((self.block, self.channels), dtype=np.float32))
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self.blocks = self.dropped = self.written = self.max_queued = 0
+        self.error = ""
+        self._lost = 0  # queued blocks discarded after a write error (writer thread)
+        self._closed = False
+        self._drained = False
+        self._thread = threading.Thread(target=self._run, name="RecordWriter", daemon=True)
+        self._thread.start()
+
+    def push(self, block: np.ndarray):
+        """Queue a copy of one (frames, channels) block; audio thread, never blocks."""
+        if self._closed:
+            return
+        self.blocks += 1
+        try:
+            slot = self._free.get_nowait()
+        except queue.Empty:
+            self.dropped += 1
+            return
+        n = len(block)
+        slot[:n] = block
+        self._queue.put((slot, n))
+        self.max_queued = max(self.max_queued, self._queue.qsize())
+
+    def close(self) -> RecordStats:
+        """Stop accepting blocks, let the writer drain the queue and close the file."""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join()
+        return self.stats()
+
+    def stats(self) -> RecordStats:
+        return RecordStats(self.blocks, self.dropped + self._lost, self.written, self.max_queued,
+                           self.error)
+
+    def _drain(self) -> Iterator[np.ndarray]:
+        # Blocks in push order until close(); slots go back to the pool once encoded
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._drained = True
+                return
+            slot, n = item
+            yield slot[:n]
+            self.written += 1
+            self._free.put(slot)
+
+    def _run(self):
+        try:
+            if self._file is not None:
+                with self._file as f:
+                    for data in self._drain():
+                        f.write(data)
+            else:
+                write_wav_stream(self.path, self._drain(), frame_rate=self.sr, sample_width=3,
+                                 channels=self.channels)
+        except Exception as e:
+            self.error = str(e)
+            print(f"[warning] Recording write failed: {e}")
+            # Keep recycling slots (counted as dropped) so nothing piles up
+            while not self._drained:
+                item = self._queue.get()
+                if item is None:
+                    break
+                self._lost += 1
+                self._free.put(item[0])
@@ -0,0 +1,250 @@
+# engine/render_cache.py
+"""
+Per-lane, per-chunk render cache for the offline exporter.
+- An export is split into instrument lanes, and each lane into chunks of the
+  stream's block size; chunks are rendered on their own at the output
+  rate/channels and summed block by block, so memory doesn't grow with the
+  length of the export.
+- Sample chunks are cached under a content hash of the hits that sound in
+  them (relative to the chunk, tails ringing in from earlier chunks
+  included), the chunk length and format, and the sample data: an edit only
+  re-renders the chunks it is heard in, and identical chunks are shared.
+- Synth voices carry state (phases, envelopes, filters) from chunk to chunk,
+  so a voice chunk's key also covers every chunk before it (chunk_key()
+  chains them) and the voice state after each rendered chunk is
+  checkpointed in memory: an edit re-renders the voice from the edited chunk
+  on, resuming from the checkpoint before it instead of from t=0.
+- Voices whose oscillator free-runs (BassVoice.render_osc/render_env) cache
+  the oscillator chunks separately, so a pattern edit only re-renders the
+  envelope.
+- Unchanged chunks come from memory (LRU, byte budget) or cache/lanes/*.npy
+  (LRU by mtime, byte budget, memory-mapped); only changed chunks are rendered.
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Iterator, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from engine.offline_renderer import (
+    DEFAULT_SR,
+    STREAM_BLOCK,
+    Sample,
+    conform,
+    song_layout,
+)
+from engine.sample_store import CACHE_DIR as SAMPLE_CACHE_DIR
+from engine.sample_store import ArrayCache
+
+CACHE_DIR = SAMPLE_CACHE_DIR.parent / "lanes"
+
+DISK_BUDGET = 256 * 1024 * 1024
+MEMORY_BUDGET = 64 * 1024 * 1024
+MAX_CHECKPOINTS = 4096  # voice states kept in memory (a few KB each)
+
+# Bump when lane rendering changes so stale entries are never read
+LANE_VERSION = 2
+
+_NO_HITS = np.empty(0, dtype=np.int64)
+
+
+class LaneCache(ArrayCache):
+    label = "Lane"
+
+    def __init__(self, cache_dir=CACHE_DIR, disk_budget: int = DISK_BUDGET,
+                 memory_budget: int = MEMORY_BUDGET):
+        super().__init__(cache_dir, disk_budget, memory_budget)
+        self.renders = 0
+        self._states: "OrderedDict[str, Any]" = OrderedDict()
+
+    def lane(self, key: str, render) -> np.ndarray:
+        """The cached lane chunk for `key`, or render() it (and cache the result)."""
+        data, created = self.get_or_create(key, render)
+        if created:
+            self.renders += 1
+        return data
+
+    def keep_state(self, key: str, state):
+        """Checkpoint a voice as it is after rendering chunk `key` (memory only, LRU)."""
+        state = copy.deepcopy(state)
+        with self._lock:
+            self._states[key] = state
+            self._states.move_to_end(key)
+            while len(self._states) > MAX_CHECKPOINTS:
+                self._states.popitem(last=False)
+
+    def state(self, key: str):
+        """A copy of the voice checkpointed after chunk `key`, or None."""
+        with self._lock:
+            state = self._states.get(key)
+        return None if state is None else copy.deepcopy(state)
+
+    def _entry_path(self, key: str) -> Optional[Path]:
+        if self.cache_dir is None or self.disk_budget <= 0:
+            return None
+        return self.cache_dir / f"{key}-v{LANE_VERSION}.npy"
+
+
+def lane_key(instrument: str, frame_rate: int, channels: int, source: bytes) -> str:
+    """Content hash of what a lane plays and the output it fills."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((LANE_VERSION, instrument, int(frame_rate), int(channels))).encode())
+    h.update(source)
+    return h.hexdigest()
+
+
+def chunk_key(prev: str, frames: int, hits: np.ndarray) -> str:
+    """Hash of one chunk: `prev` (the lane's key, or the previous chunk's), its length and hits."""
+    h = hashlib.blake2b(prev.encode(), digest_size=16)
+    h.update(repr(int(frames)).encode())
+    h.update(np.ascontiguousarray(hits, dtype=np.int64).tobytes())
+    return h.hexdigest()
+
+
+def stream_song_cached(
+    bar_patterns: Sequence[Any],
+    bpm,
+    samples: Mapping[str, Sample],
+    cache: LaneCache,
+    steps: Optional[int] = None,
+    frame_rate: int = DEFAULT_SR,
+    channels: int = 2,
+    voices: Optional[Mapping[str, Any]] = None,
+    tail: float = 0.0,
+    block: int = STREAM_BLOCK,
+) -> Iterator[np.ndarray]:
+    """
+    stream_song() with every lane chunk taken from `cache` when nothing that
+    shapes it has changed. Same blocks, up to float32 rounding (lanes are
+    summed after each is mixed, rather than hit by hit into one buffer).
+    `voices` are not advanced; the cache renders copies of them.
+    """
+    layout = song_layout(bar_patterns, bpm, steps, frame_rate, tail)
+    total = layout.total
+    spans = [(pos, min(block, total - pos)) for pos in range(0, total, block)] if layout.bar_len > 0 else []
+
+    lanes = []
+    for instrument in layout.instruments:
+        voice = (voices or {}).get(instrument)
+        if voice is not None:
+            lanes.append(_voice_chunks(cache, instrument, layout, spans, voice, frame_rate))
+            continue
+        sample = samples.get(instrument)
+        if sample is not None:
+            data = conform(sample, frame_rate, channels)
+            lanes.append(_sample_chunks(cache, instrument, layout, spans, data, frame_rate, channels))
+
+    for _, n in spans:
+        out = np.zeros((n, channels), dtype=np.float32)
+        for lane in lanes:
+            chunk = next(lane)
+            out += chunk if chunk.ndim == 2 else chunk[:, None]  # mono synth lanes play on every channel
+        yield out
+
+
+def _sample_chunks(cache: LaneCache, instrument: str, layout, spans, data: np.ndarray,
+                   frame_rate: int, channels: int) -> Iterator[np.ndarray]:
+    digest = hashlib.blake2b(np.ascontiguousarray(data).tobytes(), digest_size=16).digest()
+    base = lane_key(instrument, frame_rate, channels, digest)
+    for pos, n in spans:
+        # Hits starting in this chunk or ringing into it, relative to its start
+        starts = layout.hits(instrument, max(0, pos - len(data) + 1), pos + n) - pos
+        yield cache.lane(chunk_key(base, n, starts),
+                         lambda s=starts, n=n: _sample_chunk(data, s, n, channels))
+
+
+def _sample_chunk(data: np.ndarray, starts: np.ndarray, frames: int, channels: int) -> np.ndarray:
+    out = np.zeros((frames, channels), dtype=np.float32)
+    for start in starts:
+        start = int(start)
+        skip = max(0, -start)  # rang in from an earlier chunk
+        n = min(len(data) - skip, frames - start - skip)
+        if n > 0:
+            out[start + skip:start + skip + n] += data[skip:skip + n]
+    return out
+
+
+def _voice_chunks(cache: LaneCache, instrument: str, layout, spans, voice,
+                  frame_rate: int) -> Iterator[np.ndarray]:
+    source = repr(voice.params()).encode()
+    hits = [layout.hits(instrument, pos, pos + n) - pos for pos, n in spans]
+    if hasattr(voice, "render_osc"):
+        # The oscillator doesn't depend on the hits: its chunks survive any
+        # pattern edit, so an edit only re-renders the envelope
+        osc = _chained(cache, _chain_keys(lane_key(instrument + "/osc", frame_rate, 1, source),
+                                          spans, [_NO_HITS] * len(spans)),
+                       voice, lambda v, i: v.render_osc(spans[i][1]))
+        env = _chained(cache, _chain_keys(lane_key(instrument, frame_rate, 1, source), spans, hits),
+                       voice, lambda v, i: v.render_env(hits[i], spans[i][1]))
+        for o, e in zip(osc, env):
+            yield o * e
+    else:
+        yield from _chained(cache, _chain_keys(lane_key(instrument, frame_rate, 1, source), spans, hits),
+                            voice, lambda v, i: v.render_block(hits[i], spans[i][1]))
+
+
+def _chain_keys(base: str, spans, hits) -> List[str]:
+    """Chunk keys that each cover every chunk before them too (voices carry state)."""
+    keys = []
+    prev = base
+    for (_, n), h in zip(spans, hits):
+        prev = chunk_key(prev, n, h)
+        keys.append(prev)
+    return keys
+
+
+def _chained(cache: LaneCache, keys: List[str], voice, render) -> Iterator[np.ndarray]:
+    """
+    Chunks of a voice lane; render(state, i) renders chunk i from `state` (a
+    copy of `voice`) and advances it. After cached chunks the state is
+    unknown, so a changed chunk resumes from the nearest checkpoint before it,
+    replaying any chunks in between.
+    """
+    state = copy.deepcopy(voice)  # the voice at the start of chunk i; None after a cached chunk
+    for i, key in enumerate(keys):
+        rendered = False
+
+        def make():
+            nonlocal state, rendered
+            if state is None:
+                state, start = _resume(cache, keys, i, voice)
+                for j in range(start, i):
+                    render(state, j)
+                    cache.keep_state(keys[j], state)
+            out = render(state, i)
+            cache.keep_state(key, state)
+            rendered = True
+            return out
+
+        chunk = cache.lane(key, make)
+        if not rendered:
+            state = None
+        yield chunk
+
+
+def _resume(cache: LaneCache, keys: List[str], i: int, voice):
+    """(voice state, chunk it is at) from the last checkpoint before chunk i, or t=0."""
+    for j in range(i - 1, -1, -1):
+        state = cache.state(keys[j])
+        if state is not None:
+            return state, j + 1
+    return copy.deepcopy(voice), 0
+
+
+_default_cache: Optional[LaneCache] = None
+_default_lock = threading.Lock()
+
+
+def default_lane_cache() -> LaneCache:
+    """Process-wide LaneCache under cache/lanes/ (created on first use)."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = LaneCache()
+        return _default_cache
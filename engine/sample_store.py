@@ -0,0 +1,345 @@
+# engine/sample_store.py
+"""
+Shared sample store for the live synths and the offline exporter.
+- Each WAV is decoded once and converted (rate/channels, see
+  offline_renderer.conform) to the format the caller asks for.
+- Converted float32 arrays are persisted under cache/samples/ as .npy files
+  keyed by the file's content hash and the target format, so a warm cache
+  skips decoding and resampling entirely. The directory is kept under a byte
+  budget by evicting the least recently used entries.
+- Recently used arrays are also kept in memory under a separate budget, so
+  large user sample packs don't grow memory without limit.
+- SampleBank packs a whole set of converted samples into one float32 file
+  (index in its header) opened with numpy.memmap, so the exporter and any
+  worker processes share one copy through the OS page cache.
+- ArrayCache is the memory + disk LRU underneath SampleStore; the exporter's
+  per-lane render cache (engine.render_cache) builds on it too.
+"""
+
+from __future__ import annotations
+
+import abc
+import hashlib
+import json
+import os
+import threading
+import wave
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Hashable, Mapping, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from engine.offline_renderer import Sample, conform, decode_wav, output_format
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+CACHE_DIR = BASE_DIR / "cache" / "samples"
+
+DISK_BUDGET = 512 * 1024 * 1024
+MEMORY_BUDGET = 128 * 1024 * 1024
+
+# Bump when the on-disk layout or conversion changes so stale entries are never read
+CACHE_VERSION = 1
+BANK_VERSION = 2
+BANK_MAGIC = b"SMPLBANK"
+
+
+class SampleInfo(NamedTuple):
+    """WAV header fields (same names as Sample, so output_format() accepts either)."""
+    frame_rate: int
+    channels: int
+    sample_width: int
+
+
+def read_info(path) -> SampleInfo:
+    """Read only the WAV header."""
+    with wave.open(str(path), "rb") as w:
+        return SampleInfo(w.getframerate(), w.getnchannels(), w.getsampwidth())
+
+
+def file_digest(path) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ArrayCache(abc.ABC):
+    """
+    Read-only float32 arrays cached in memory (LRU, byte budget) and as .npy
+    files in `cache_dir` (LRU by mtime, byte budget, memory-mapped on load).
+    Subclasses name the disk entry for a key (_entry_path) and produce the
+    array on a miss; see SampleStore and engine.render_cache.LaneCache.
+    """
+
+    label = "Array"  # for warnings
+
+    def __init__(self, cache_dir, disk_budget: int, memory_budget: int):
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.disk_budget = int(disk_budget)
+        self.memory_budget = int(memory_budget)
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[Hashable, np.ndarray]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes: Optional[int] = None  # cache_dir size as of the last scan, plus writes since
+
+        # Counters, handy for benchmarks and debugging
+        self.disk_hits = 0
+        self.memory_hits = 0
+
+    def get_or_create(self, key: Hashable, create: Callable[[], np.ndarray]) -> Tuple[np.ndarray, bool]:
+        """(array for `key`, True if it was created now); `create` runs on a miss."""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return data, False
+
+        created = False
+        data = self._read_disk(key)
+        if data is None:
+            data = create()
+            data.setflags(write=False)
+            created = True
+            self._write_disk(key, data)
+        else:
+            self.disk_hits += 1
+
+        self._remember(key, data)
+        return data, created
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._memory_bytes
+
+    def clear_memory(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+
+    @abc.abstractmethod
+    def _entry_path(self, key) -> Optional[Path]:
+        """The .npy file for `key` in cache_dir, or None to keep it in memory only."""
+
+    def _read_disk(self, key) -> Optional[np.ndarray]:
+        entry = self._entry_path(key)
+        if entry is None or not entry.exists():
+            return None
+        try:
+            # Mapped read-only: processes loading the same entry share its pages
+            data = np.load(entry, mmap_mode="r", allow_pickle=False)
+        except (OSError, ValueError):
+            return None  # truncated/corrupt entry; it is rewritten below
+        try:
+            os.utime(entry)  # mtime doubles as the LRU clock
+        except OSError:
+            pass
+        data.setflags(write=False)
+        return data
+
+    def _write_disk(self, key, data: np.ndarray):
+        entry = self._entry_path(key)
+        if entry is None or data.nbytes > self.disk_budget:
+            return
+        try:
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            tmp = entry.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp, "wb") as f:
+                np.save(f, data, allow_pickle=False)
+            os.replace(tmp, entry)  # readers never see a half-written file
+            # Only rescan the directory once this process's writes may have filled it
+            if self._disk_bytes is not None:
+                self._disk_bytes += entry.stat().st_size
+            if self._disk_bytes is None or self._disk_bytes > self.disk_budget:
+                self._evict_disk()
+        except OSError as e:
+            print(f"[warning] {self.label} cache write failed: {e}")
+
+    def _evict_disk(self):
+        entries = []
+        for p in self.cache_dir.glob("*.npy"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime_ns, st.st_size, p))
+        total = sum(size for _, size, _ in entries)
+        for _, size, p in sorted(entries, key=lambda e: e[0]):
+            if total <= self.disk_budget:
+                break
+            try:
+                p.unlink()
+                total -= size
+            except OSError:
+                pass
+        self._disk_bytes = total
+
+    def _remember(self, key, data: np.ndarray):
+        if data.nbytes > self.memory_budget:
+            return
+        with self._lock:
+            if key in self._memory:
+                return
+            self._memory[key] = data
+            self._memory_bytes += data.nbytes
+            while self._memory_bytes > self.memory_budget:
+                _, old = self._memory.popitem(last=False)
+                self._memory_bytes -= old.nbytes
+
+
+class SampleStore(ArrayCache):
+    label = "Sample"
+
+    def __init__(self, cache_dir=CACHE_DIR, disk_budget: int = DISK_BUDGET,
+                 memory_budget: int = MEMORY_BUDGET):
+        super().__init__(cache_dir, disk_budget, memory_budget)
+        # path -> (size, mtime_ns, digest); avoids re-hashing unchanged files
+        self._digests: Dict[str, Tuple[int, int, str]] = {}
+        self.decodes = 0
+
+    def get(self, path, frame_rate: int, channels: int) -> np.ndarray:
+        """(frames, channels) float32 data of `path` at the given rate/channel count."""
+        path = os.path.abspath(str(path))
+        key = (self._digest(path), int(frame_rate), int(channels))
+        data, created = self.get_or_create(key, lambda: conform(decode_wav(path), key[1], key[2]))
+        if created:
+            self.decodes += 1
+        return data
+
+    def _digest(self, path: str) -> str:
+        st = os.stat(path)
+        known = self._digests.get(path)
+        if known is not None and known[0] == st.st_size and known[1] == st.st_mtime_ns:
+            return known[2]
+        digest = file_digest(path)
+        self._digests[path] = (st.st_size, st.st_mtime_ns, digest)
+        return digest
+
+    def _entry_path(self, key: Tuple[str, int, int]) -> Optional[Path]:
+        if self.cache_dir is None or self.disk_budget <= 0:
+            return None
+        digest, rate, channels = key
+        return self.cache_dir / f"{digest}-{rate}-{channels}-v{CACHE_VERSION}.npy"
+
+
+def load_bank(paths: Mapping[str, Path], names=None,
+              store: Optional[SampleStore] = None) -> Dict[str, Sample]:
+    """
+    Like offline_renderer.load_samples, but every sample comes back already
+    converted to the common output format (highest rate/channel count).
+    Missing or unreadable files are skipped.
+    """
+    store = store or default_store()
+    infos: Dict[str, SampleInfo] = {}
+    for name, path in paths.items():
+        if names is not None and name not in names:
+            continue
+        if not path or not Path(path).exists():
+            continue
+        try:
+            infos[name] = read_info(path)
+        except (OSError, EOFError, wave.Error):
+            continue
+
+    frame_rate, channels, _ = output_format(infos)
+    bank: Dict[str, Sample] = {}
+    for name, info in infos.items():
+        try:
+            data = store.get(paths[name], frame_rate, channels)
+        except Exception:
+            continue
+        bank[name] = Sample(data, frame_rate, info.sample_width)
+    return bank
+
+
+class SampleBank:
+    """
+    Converted samples stored back to back as raw little-endian float32
+    (frames x channels) in one file whose header holds the JSON index:
+    BANK_MAGIC, the index length (uint32 LE), the index, then the data at a
+    16-byte aligned offset. Data and index are replaced together in one
+    rename, so a reader never pairs new samples with old offsets.
+    Opening maps the file read-only; each Sample's data is a view into the
+    map, so nothing is decoded or copied per process. Pickling sends only the
+    path, and the receiving process maps the same file again.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            head = f.read(len(BANK_MAGIC) + 4)
+            if len(head) < len(BANK_MAGIC) + 4 or head[:len(BANK_MAGIC)] != BANK_MAGIC:
+                raise ValueError(f"Not a sample bank: {self.path}")
+            size = int.from_bytes(head[len(BANK_MAGIC):], "little")
+            meta = json.loads(f.read(size))
+        if meta.get("version") != BANK_VERSION:
+            raise ValueError(f"Unsupported sample bank version in {self.path}")
+
+        self.frame_rate = int(meta["frame_rate"])
+        self.channels = int(meta["channels"])
+        frames = int(meta["frames"])
+        if frames:
+            self.data = np.memmap(self.path, dtype="<f4", mode="r", offset=int(meta["data_offset"]),
+                                  shape=(frames, self.channels))
+        else:
+            self.data = np.zeros((0, self.channels), dtype=np.float32)
+
+        self.samples: Dict[str, Sample] = {}
+        for name, entry in meta["samples"].items():
+            start = int(entry["offset"])
+            view = self.data[start:start + int(entry["frames"])]
+            self.samples[name] = Sample(view, self.frame_rate, int(entry["sample_width"]))
+
+    def __reduce__(self):
+        return (SampleBank, (str(self.path),))
+
+    @classmethod
+    def build(cls, path, paths: Mapping[str, Path], names=None,
+              store: Optional[SampleStore] = None) -> "SampleBank":
+        """Convert `paths` (see load_bank) into a bank file at `path` and open it."""
+        samples = load_bank(paths, names=names, store=store)
+        frame_rate, channels, _ = output_format(samples)
+
+        index: Dict[str, Dict[str, int]] = {}
+        offset = 0
+        for name, sample in samples.items():
+            index[name] = {"offset": offset, "frames": len(sample),
+                           "sample_width": sample.sample_width}
+            offset += len(sample)
+        meta = {"version": BANK_VERSION, "frame_rate": frame_rate, "channels": channels,
+                "frames": offset, "samples": index, "data_offset": 0}
+        # The data offset is part of the index: grow it until the header fits
+        head = b""
+        while True:
+            meta["data_offset"] = -(-(len(BANK_MAGIC) + 4 + len(head)) // 16) * 16
+            text = json.dumps(meta).encode()
+            if text == head:
+                break
+            head = text
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(BANK_MAGIC + len(head).to_bytes(4, "little") + head)
+            f.write(b"\0" * (meta["data_offset"] - f.tell()))
+            for sample in samples.values():
+                f.write(np.ascontiguousarray(sample.data, dtype="<f4").tobytes())
+        os.replace(tmp, path)  # data and index land together
+        return cls(path)
+
+
+_default: Optional[SampleStore] = None
+_default_lock = threading.Lock()
+
+
+def default_store() -> SampleStore:
+    """The process-wide store shared by the live synths and the exporter."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = SampleStore()
+        return _default
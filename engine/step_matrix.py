@@ -0,0 +1,136 @@
+# engine/step_matrix.py
+"""
+Array-backed pattern storage.
+- One StepMatrix per pattern: a (lanes, steps) NumPy structured array with
+  typed per-step fields (STEP_DTYPE: gate, velocity, pitch, offset), 4 bytes
+  per cell, so 128 lanes x 256 steps is 128 KiB.
+- Lanes are rows addressed by instrument name; rows grow by doubling, so
+  adding lanes doesn't copy on every insert.
+- "X"/"-" pattern strings are parsed into / formatted from the gate field;
+  the other fields keep their values when a string is applied.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# gate: step plays; velocity: 0-127 (MIDI scale); pitch: semitones from the
+# instrument's base note; offset: micro-timing in 1/128ths of a step
+STEP_DTYPE = np.dtype([("gate", np.bool_), ("velocity", np.uint8), ("pitch", np.int8), ("offset", np.int8)])
+DEFAULT_VELOCITY = 127
+OFFSET_RESOLUTION = 128
+
+
+def _blank(lanes: int, steps: int) -> np.ndarray:
+    cells = np.zeros((lanes, steps), dtype=STEP_DTYPE)
+    cells["velocity"] = DEFAULT_VELOCITY
+    return cells
+
+
+def parse_gates(pattern: str, steps: int) -> np.ndarray:
+    """Gate row for a pattern string ("X"/"x" = on), clamped/padded to `steps`."""
+    gates = np.zeros(steps, dtype=np.bool_)
+    for i, ch in enumerate(pattern[:steps]):
+        if ch == "X" or ch == "x":
+            gates[i] = True
+    return gates
+
+
+def format_gates(gates: np.ndarray) -> str:
+    """"X"/"-" string for a gate row."""
+    return np.where(gates, b"X", b"-").tobytes().decode("ascii")
+
+
+class StepMatrix:
+    def __init__(self, steps: int = 16, lanes: int = 8):
+        self.names: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._cells = _blank(max(1, lanes), max(1, int(steps)))
+
+    @property
+    def steps(self) -> int:
+        return self._cells.shape[1]
+
+    @property
+    def cells(self) -> np.ndarray:
+        """(lanes, steps) structured view of the used rows, in lane order."""
+        return self._cells[:len(self.names)]
+
+    @property
+    def gates(self) -> np.ndarray:
+        return self.cells["gate"]
+
+    def __contains__(self, name) -> bool:
+        return name in self._rows
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def lane(self, name: str) -> Optional[np.ndarray]:
+        """Structured row view for `name` (writes go straight into the matrix)."""
+        row = self._rows.get(name)
+        return None if row is None else self._cells[row]
+
+    def add_lane(self, name: str) -> np.ndarray:
+        row = self._rows.get(name)
+        if row is None:
+            row = len(self.names)
+            if row == self._cells.shape[0]:
+                self._cells = np.concatenate([self._cells, _blank(row, self.steps)])
+            self._rows[name] = row
+            self.names.append(name)
+        return self._cells[row]
+
+    def set_lane(self, name: str, pattern: str) -> bool:
+        """Apply a pattern string to the lane's gates; True if anything changed."""
+        gates = parse_gates(str(pattern), self.steps)
+        new = name not in self._rows
+        lane = self.add_lane(name)
+        if new or not np.array_equal(lane["gate"], gates):
+            lane["gate"] = gates
+            return True
+        return False
+
+    def lane_string(self, name: str) -> str:
+        return format_gates(self._cells[self._rows[name]]["gate"])
+
+    def strings(self) -> Dict[str, str]:
+        return {name: self.lane_string(name) for name in self.names}
+
+    def resize(self, steps: int) -> bool:
+        """Truncate or pad (with empty steps) every lane; True if the length changed."""
+        steps = max(1, int(steps))
+        if steps == self.steps:
+            return False
+        cells = _blank(self._cells.shape[0], steps)
+        keep = min(steps, self.steps)
+        cells[:, :keep] = self._cells[:, :keep]
+        self._cells = cells
+        return True
+
+    def copy(self) -> "StepMatrix":
+        other = StepMatrix.__new__(StepMatrix)
+        other.names = list(self.names)
+        other._rows = dict(self._rows)
+        other._cells = self._cells.copy()
+        return other
+
+    def step_names(self) -> Tuple[Tuple[str, ...], ...]:
+        """Per-step tuples of the lanes whose gate is on, in lane order."""
+        steps, rows = np.nonzero(self.gates.T)  # sorted by step, then lane
+        table: List[List[str]] = [[] for _ in range(self.steps)]
+        names = self.names
+        for step, row in zip(steps.tolist(), rows.tolist()):
+            table[step].append(names[row])
+        return tuple(tuple(t) for t in table)
+
+    def step_names_at(self, step: int) -> Tuple[str, ...]:
+        """One entry of step_names()."""
+        names = self.names
+        return tuple(names[row] for row in np.flatnonzero(self.gates[:, step]).tolist())
+
+    def hit_steps(self, name: str) -> np.ndarray:
+        """Indices of the steps where lane `name` plays."""
+        return np.flatnonzero(self._cells[self._rows[name]]["gate"])
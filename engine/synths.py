@@ -1,23 +1,27 @@
 # engine/synths.py
 from __future__ import annotations
 
+import math
 import os
 from pathlib import Path
-from typing import Optional, Deque, Any, cast
-from collections import deque
+from typing import Dict, Optional, List, Any, cast
 
 from pyo import (
     Adsr,
+    DataTable,
     Linseg,
     Osc,
-    SfPlayer,
-    Sig,
     SigTo,
+    Sin,
     Sine,
     SquareTable,
     SuperSaw,
+    Trig,
+    TrigEnv,
 )
 
+from engine.sample_store import default_store
+
 # NOTE for static type checkers:
 # pyo is a realtime audio DSP lib with dynamic, signal-rate objects (Sig, SigTo, Linseg, Adsr, etc.).
 # The type stubs are conservative (often "int" or "float"), so we cast to `Any` where we pass
@@ -32,44 +36,66 @@ def _asset(file_name: str) -> str:
     return str((ASSETS_DIR / file_name).resolve())
 
 
+# Volume changes glide over this long (seconds) instead of stepping (zipper noise)
+VOLUME_SMOOTH = 0.02
+
+# BassSynth waveforms; every one runs all the time and `wave` only moves gains
+WAVES = ("saw", "square", "sine")
+WAVE_FADE = 0.01  # seconds of equal-power crossfade on a wave change (under one 512 buffer)
+
+
 class BassSynth:
     def __init__(self, server, freq: float = 60, wave: str = "saw", decay: float = 0.2, volume: float = 1.0):
         self.server = server
         self.wave = wave
         self.decay = float(decay)
         self.freq = SigTo(value=float(freq), time=0.05)
-        self.volume = Sig(float(volume))
+        self.volume = SigTo(value=float(volume), time=VOLUME_SMOOTH)
 
         # Predeclare for linters
         self.osc: Any = None
         self.env: Optional[Adsr] = None
         self.output: Any = None
+        self._wave_gains: Dict[str, SigTo] = {}
+        self._sources: Dict[str, Any] = {}
+        self._wave_voices: List[Any] = []
 
         self._build_synth()
 
-    def _build_synth(self):
-        # Stop previous output if rebuilding
-        try:
-            if self.output is not None:
-                self.output.stop()
-        except Exception:
-            pass
+    def _wave_key(self) -> str:
+        return self.wave if self.wave in WAVES else "sine"
 
-        if self.wave == "saw":
-            self.osc = SuperSaw(
+    def _build_synth(self):
+        """
+        Build the whole graph once. Parameters only ever set signal values:
+        nothing is allocated or restarted on the audio path while playing.
+        """
+        sources = {
+            "saw": SuperSaw(
                 freq=cast(Any, self.freq),
                 mul=cast(Any, self.volume) * 2,
-            )
-        elif self.wave == "square":
-            self.osc = Osc(
+            ),
+            "square": Osc(
                 SquareTable(),
                 freq=cast(Any, self.freq),
                 mul=cast(Any, self.volume) * 2,
-            )
-        else:  # sine (+ small harmonic for presence)
-            base = Sine(freq=cast(Any, self.freq), mul=cast(Any, self.volume) * 2)
-            harmonic = Sine(freq=cast(Any, self.freq) * 2, mul=cast(Any, self.volume) * 0.5)
-            self.osc = base + harmonic
+            ),
+            # sine (+ small harmonic for presence)
+            "sine": Sine(freq=cast(Any, self.freq), mul=cast(Any, self.volume) * 2)
+            + Sine(freq=cast(Any, self.freq) * 2, mul=cast(Any, self.volume) * 0.5),
+        }
+        # Each source's gain ramps linearly 0 <-> 1 and is shaped by sin(g * pi/2),
+        # so the outgoing and incoming waves always sum to constant power
+        # (sources and shapers are kept here: pyo frees whatever Python drops,
+        # even if the graph still reads it)
+        self._sources = sources
+        self.osc = None
+        for name in WAVES:
+            gain = self._wave_gains[name] = SigTo(value=float(name == self._wave_key()), time=WAVE_FADE)
+            shape = Sin(gain * (math.pi / 2))
+            voice = sources[name] * shape
+            self._wave_voices += [shape, voice]
+            self.osc = voice if self.osc is None else self.osc + voice
 
         self.env = Adsr(
             attack=0.01,
@@ -87,7 +113,8 @@ class BassSynth:
             self.freq.value = float(value)
         elif param == "wave":
             self.wave = str(value)
-            self._build_synth()
+            for name, gain in self._wave_gains.items():
+                gain.value = float(name == self._wave_key())
         elif param == "decay":
             self.decay = float(value)
             if self.env:
@@ -97,9 +124,10 @@ class BassSynth:
         else:
             print(f"Unknown parameter: {param}")
 
-    def play(self):
+    def play(self, delay: float = 0.0):
+        # delay (seconds) lets a lookahead scheduler trigger early; pyo rounds it to buffers
         if self.env:
-            self.env.play()
+            self.env.play(delay=delay)
 
     def stop(self):
         if self.env:
@@ -111,7 +139,7 @@ class KickSynth:
         self.server = server
         self.base_freq = float(base_freq)
         self.decay = float(decay)
-        self.volume = Sig(float(volume))
+        self.volume = SigTo(value=float(volume), time=VOLUME_SMOOTH)
 
         self.pitch_env = Linseg([(0, self.base_freq * 2), (self.decay, self.base_freq)])
         self.env = Adsr(attack=0.001, decay=self.decay, sustain=0, release=0.05, mul=cast(Any, self.volume))
@@ -132,25 +160,64 @@ class KickSynth:
         else:
             print(f"Unknown parameter: {param}")
 
-    def play(self):
-        self.pitch_env.play()
-        self.env.play()
+    def play(self, delay: float = 0.0):
+        self.pitch_env.play(delay=delay)
+        self.env.play(delay=delay)
 
     def stop(self):
         self.env.stop()
 
 
-# ---------- One-shot sample player base (keeps refs so sounds don't get GC'd) ----------
+# ---------- One-shot sample player base (fixed voice pool, sample loaded once) ----------
+
+DEFAULT_VOICES = 16
+
 
 class _OneShotSample:
-    def __init__(self, server, filename: str, volume: float = 1.0):
+    def __init__(self, server, filename: str, volume: float = 1.0, voices: int = DEFAULT_VOICES):
         self.server = server
-        self.volume = Sig(float(volume))
+        self.volume = SigTo(value=float(volume), time=VOLUME_SMOOTH)
         self.file_path = _asset(filename)
+
+        # Decoded into RAM once; hits never touch the disk or allocate pyo objects
+        self.table: Optional[DataTable] = None
+        self._trigs: List[Any] = []
+        self._voices: List[Any] = []
+        self._next = 0
+
         if not os.path.exists(self.file_path):
             print(f"[warning] Sample not found: {self.file_path}")
-        # Keep recent players so they aren't garbage-collected mid-play
-        self._players: Deque[Any] = deque(maxlen=64)
+            return
+        try:
+            self.table, dur = self._load(self.file_path)
+        except Exception as e:
+            print(f"[warning] Could not load sample {self.file_path}: {e}")
+            return
+
+        # Each voice reads the whole table at its native speed when its Trig fires
+        for _ in range(max(1, int(voices))):
+            trig = Trig().stop()  # a fresh Trig fires once on its own; arm it only via play()
+            voice = TrigEnv(trig, table=self.table, dur=dur, mul=cast(Any, self.volume)).out()
+            self._trigs.append(trig)
+            self._voices.append(voice)
+
+    def _load(self, path: str):
+        """
+        Return (table, dur) at the server's rate/channel count (engine.sample_store).
+        TrigEnv reads up to the table's guard point (a copy of sample 0), so each
+        channel gets one leading zero to keep the tail click-free. dur is a hair
+        long (0.3 ppm) so pyo's float32 read increment lands just below 1 and
+        never interpolates past the guard point.
+        """
+        sr = int(self.server.getSamplingRate())
+        data = default_store().get(path, sr, int(self.server.getNchnls()))
+        chans = [[0.0] + data[:, c].tolist() for c in range(data.shape[1])]
+        size = len(chans[0])
+        return DataTable(size, chnls=len(chans), init=chans), size / sr * (1.0 + 3e-7)
+
+    @property
+    def voices(self) -> int:
+        return len(self._voices)
 
     def update(self, param: str, value):
         if param == "volume":
@@ -159,10 +226,12 @@ class _OneShotSample:
         # elif param == "speed":
         #     self._speed = float(value)
 
-    def play(self):
-        # Create a fresh player per hit so transients are clean.
-        p = SfPlayer(self.file_path, speed=1, loop=False, mul=cast(Any, self.volume)).out()
-        self._players.append(p)  # keep a reference until the deque rolls over
+    def play(self, delay: float = 0.0):
+        # Round-robin over the pool; when every voice is busy the oldest hit is cut off
+        if not self._trigs:
+            return
+        self._trigs[self._next].play(delay=delay)
+        self._next = (self._next + 1) % len(self._trigs)
 
     def stop(self):
         # One-shots finish on their own; nothing persistent to stop.
@@ -170,15 +239,15 @@ class _OneShotSample:
 
 
 class HatSynth(_OneShotSample):
-    def __init__(self, server, volume: float = 1.0):
-        super().__init__(server, "hihat.wav", volume)
+    def __init__(self, server, volume: float = 1.0, voices: int = DEFAULT_VOICES):
+        super().__init__(server, "hihat.wav", volume, voices)
 
 
 class ClapSynth(_OneShotSample):
-    def __init__(self, server, volume: float = 1.0):
-        super().__init__(server, "clap.wav", volume)
+    def __init__(self, server, volume: float = 1.0, voices: int = DEFAULT_VOICES):
+        super().__init__(server, "clap.wav", volume, voices)
 
 
 class SnareSynth(_OneShotSample):
-    def __init__(self, server, volume: float = 1.0):
-        super().__init__(server, "snare.wav", volume)
+    def __init__(self, server, volume: float = 1.0, voices: int = DEFAULT_VOICES):
+        super().__init__(server, "snare.wav", volume, voices)
@@ -1,31 +1,312 @@
 # engine/track.py
+import contextlib
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+
+from engine.step_matrix import StepMatrix, format_gates
+
+DEFAULT_PATTERN = "A"
+
+StepNames = Tuple[Tuple[str, ...], ...]
+
+
+class TrackSnapshot(NamedTuple):
+    """
+    Immutable view of what the sequencer plays, republished on every edit.
+    Unchanged patterns share their step tables with the previous snapshot.
+    """
+    version: int
+    steps: int
+    current: str
+    song: Tuple[str, ...]               # pattern name per bar (Track.song_bars())
+    tables: Mapping[str, StepNames]     # pattern name -> per-step instrument names
+
+
+class TrackChange(NamedTuple):
+    """
+    One edit, as passed to Track.on_change() listeners.
+    kind:
+      "lane"   add_pattern(); old/new are the lane's "X"/"-" strings (old None for a new lane)
+      "step"   set_step()/toggle_step(); old/new are (gate, velocity, pitch, offset)
+      "length" set_steps(); every lane of every pattern; old/new are step counts
+      "select" select_pattern(); old/new are pattern names
+      "remove" remove_pattern()
+      "song"   set_song(); old/new are the (name, repeats) lists
+      "bpm"    set_bpm(); old/new are tempos
+    [start, stop) is the step range that changed (empty if no gate moved).
+    """
+    kind: str
+    pattern: Optional[str] = None
+    instrument: Optional[str] = None
+    start: int = 0
+    stop: int = 0
+    old: Any = None
+    new: Any = None
+
+
+ChangeListener = Callable[[List[TrackChange]], None]
+
 
 class Track:
     def __init__(self, bpm=120, steps=16):
         self.bpm = bpm
         self.steps = steps
-        self.patterns = {}
+        # Pattern bank: name -> StepMatrix (instrument x step, typed fields);
+        # `current` is the one add_pattern()/set_step() edit
+        self.current = DEFAULT_PATTERN
+        self.bank: Dict[str, StepMatrix] = {self.current: StepMatrix(steps)}
+        # Song: (pattern name, repeats) entries played in order; empty -> loop `patterns`
+        self.song: List[Tuple[str, int]] = []
+        self._views: Dict[str, Mapping[str, str]] = {}
+        # Replaced (never mutated) on every pattern/length/song change; other
+        # threads read it with one attribute load and need no lock
+        self.snapshot = TrackSnapshot(0, self.steps, self.current, self.song_bars(),
+                                      MappingProxyType({self.current: self.bank[self.current].step_names()}))
+        # Change notification: listeners get a list of TrackChange per edit, or
+        # one list per batch() block; snapshots are coalesced the same way
+        self._listeners: List[ChangeListener] = []
+        self._batch_depth = 0
+        self._pending: List[TrackChange] = []
+        self._dirty: Dict[str, Optional[Set[int]]] = {}  # pattern -> edited steps (None: all)
+        self._stale = False
+
+    @property
+    def version(self) -> int:
+        return self.snapshot.version
+
+    # ---------------------------
+    # Change notification
+    # ---------------------------
+    def on_change(self, callback: ChangeListener) -> ChangeListener:
+        """
+        Call `callback(changes)` after every edit, on the editing thread, once the
+        new snapshot is published. Returns the callback (usable as a decorator).
+        """
+        self._listeners.append(callback)
+        return callback
+
+    def off_change(self, callback: ChangeListener):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Coalesce a burst of edits: one snapshot and one listener call carrying
+        every change when the outermost block exits.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self._flush()
+
+    def _edit(self, change: TrackChange, *names, steps: Optional[Iterable[int]] = None):
+        """Record an edit: rebuild the named patterns' tables (only `steps` of them if given)."""
+        for name in names:
+            self._views.pop(name, None)  # right away: get_pattern() inside a batch sees the edit
+            if steps is None:
+                self._dirty[name] = None
+            elif name not in self._dirty:
+                self._dirty[name] = set(steps)
+            elif self._dirty[name] is not None:
+                self._dirty[name].update(steps)
+        self._stale = True
+        self._pending.append(change)
+        if not self._batch_depth:
+            self._flush()
+
+    def _flush(self):
+        if self._stale:
+            self._publish()
+        changes, self._pending = self._pending, []
+        if not changes:
+            return
+        for callback in list(self._listeners):
+            try:
+                callback(changes)
+            except Exception:
+                pass
+
+    def _publish(self):
+        """Publish a new snapshot; only the dirty patterns' tables are rebuilt (views drop in _edit)."""
+        prev = self.snapshot
+        tables = dict(prev.tables)
+        for name, steps in self._dirty.items():
+            old = tables.pop(name, None)
+            matrix = self.bank.get(name)
+            if matrix is None:
+                continue
+            if steps is not None and old is not None and len(old) == matrix.steps:
+                if steps:
+                    table = list(old)
+                    for step in steps:
+                        table[step] = matrix.step_names_at(step)
+                    old = tuple(table)
+                tables[name] = old
+            else:
+                tables[name] = matrix.step_names()
+        self._dirty = {}
+        self._stale = False
+        self.snapshot = TrackSnapshot(prev.version + 1, self.steps, self.current, self.song_bars(),
+                                      MappingProxyType(tables))
+
+    @property
+    def patterns(self) -> Dict[str, str]:
+        return self.get_patterns()
 
     def set_bpm(self, bpm):
-        self.bpm = bpm
+        old, self.bpm = self.bpm, bpm
+        if bpm != old:
+            self._pending.append(TrackChange("bpm", old=old, new=bpm))
+            if not self._batch_depth:
+                self._flush()
 
     def get_bpm(self):
         return self.bpm
 
     def set_steps(self, steps: int):
         steps = max(1, int(steps))
+        old = self.steps
+        changed = steps != old
         self.steps = steps
-        # Normalize existing patterns to this length
-        for inst, pat in list(self.patterns.items()):
-            self.patterns[inst] = pat[:steps].ljust(steps, "-")
+        # Truncate/pad every bank slot to this length
+        for matrix in self.bank.values():
+            changed = matrix.resize(steps) or changed
+        if changed:
+            self._edit(TrackChange("length", start=0, stop=max(old, steps), old=old, new=steps),
+                       *self.bank)
 
     def get_steps(self):
         return self.steps
 
     def add_pattern(self, instrument, pattern):
-        # Clamp/pad to current steps length
-        pat = str(pattern)[:self.steps].ljust(self.steps, "-")
-        self.patterns[instrument] = pat
+        # Gates from the "X"/"-" string, clamped/padded to the current steps length
+        matrix = self.bank[self.current]
+        lane = matrix.lane(instrument)
+        old = None if lane is None else lane["gate"].copy()
+        if matrix.set_lane(instrument, str(pattern)):
+            new = matrix.lane(instrument)["gate"]
+            diff = np.flatnonzero(new) if old is None else np.flatnonzero(old != new)
+            start, stop = (int(diff[0]), int(diff[-1]) + 1) if diff.size else (0, 0)
+            change = TrackChange("lane", self.current, instrument, start, stop,
+                                 None if old is None else format_gates(old), format_gates(new))
+            self._edit(change, self.current, steps=diff.tolist())
 
     def get_patterns(self):
-        return self.patterns
+        """The current pattern as {instrument: "X"/"-" string} (a read-only view)."""
+        return self.get_pattern()
+
+    def set_step(self, instrument: str, step: int, gate: Optional[bool] = None,
+                 velocity: Optional[int] = None, pitch: Optional[int] = None,
+                 offset: Optional[int] = None):
+        """Set any of a step's fields in the current pattern (the lane is created if needed)."""
+        matrix = self.bank[self.current]
+        if instrument not in matrix:
+            self._views.pop(self.current, None)  # the lane set changed, even if no field does
+        lane = matrix.add_lane(instrument)
+        step = step % matrix.steps
+        before = lane[step].item()
+        if gate is not None:
+            lane["gate"][step] = bool(gate)
+        if velocity is not None:
+            lane["velocity"][step] = min(127, max(0, int(velocity)))
+        if pitch is not None:
+            lane["pitch"][step] = min(127, max(-128, int(pitch)))
+        if offset is not None:
+            lane["offset"][step] = min(127, max(-128, int(offset)))
+        after = lane[step].item()
+        if after != before:
+            change = TrackChange("step", self.current, instrument, step, step + 1, before, after)
+            # Only a gate flip changes who plays on that step
+            self._edit(change, self.current, steps=(step,) if after[0] != before[0] else ())
+
+    def toggle_step(self, instrument: str, step: int) -> bool:
+        """Flip a step's gate in the current pattern (step wraps like set_step); returns the new state."""
+        matrix = self.bank[self.current]
+        step = step % matrix.steps
+        lane = matrix.lane(instrument)
+        gate = not (lane is not None and lane["gate"][step])
+        self.set_step(instrument, step, gate=gate)
+        return gate
+
+    def get_matrix(self, name: Optional[str] = None) -> StepMatrix:
+        """Bank slot `name` (default: the current one); read it, edit through Track."""
+        return self.bank[self.current if name is None else name]
+
+    # ---------------------------
+    # Pattern bank / song
+    # ---------------------------
+    def select_pattern(self, name: str, copy: bool = False):
+        """
+        Make bank slot `name` the one add_pattern() edits, creating it if needed
+        (empty, or a copy of the current pattern with copy=True).
+        """
+        name = str(name)
+        created = name not in self.bank
+        if created:
+            self.bank[name] = self.bank[self.current].copy() if copy else StepMatrix(self.steps)
+        if name != self.current:
+            old, self.current = self.current, name
+            self._edit(TrackChange("select", name, old=old, new=name), *((name,) if created else ()))
+
+    def remove_pattern(self, name: str):
+        """Drop a bank slot (and its song entries); the current pattern can't be removed."""
+        if name == self.current:
+            raise ValueError(f"Can't remove the pattern being edited: {name}")
+        if self.bank.pop(name, None) is not None:
+            old = self.song
+            self.song = [entry for entry in self.song if entry[0] != name]
+            self._edit(TrackChange("remove", name, old=old, new=self.song), name)
+
+    def get_pattern(self, name: Optional[str] = None) -> Mapping[str, str]:
+        """Bank slot `name` as a read-only {instrument: "X"/"-" string} view; cached per edit."""
+        if name is None:
+            name = self.current
+        view = self._views.get(name)
+        if view is None:
+            view = self._views[name] = MappingProxyType(self.bank[name].strings())
+        return view
+
+    def get_pattern_names(self) -> List[str]:
+        return list(self.bank)
+
+    def set_song(self, entries: Iterable[Tuple[str, int]]):
+        """Arrange bank patterns as (name, repeats) entries; an empty song loops `patterns`."""
+        song = []
+        for name, repeats in entries:
+            name, repeats = str(name), int(repeats)
+            if name not in self.bank:
+                raise ValueError(f"Unknown pattern in song: {name}")
+            if repeats < 1:
+                raise ValueError(f"Repeat count must be at least 1: {name} x {repeats}")
+            song.append((name, repeats))
+        if song != self.song:
+            old, self.song = self.song, song
+            self._edit(TrackChange("song", old=old, new=song))
+
+    def get_song(self) -> List[Tuple[str, int]]:
+        return self.song
+
+    def song_bars(self, bars: Optional[int] = None) -> Tuple[str, ...]:
+        """
+        Pattern name for each bar: one pass of the song (or just the current
+        pattern without one), or `bars` bars cycling through it.
+        """
+        order = [name for name, repeats in self.song for _ in range(repeats)] or [self.current]
+        if bars is None:
+            return tuple(order)
+        return tuple(order[i % len(order)] for i in range(max(1, int(bars))))
+
+    def get_step_table(self, name: Optional[str] = None) -> StepNames:
+        """
+        Per-step tuples of the instruments gated on that step, for bank
+        pattern `name` (default: the current one), from the latest snapshot.
+        Compiled from the matrix once per edit of that pattern; one entry per step.
+        """
+        snapshot = self.snapshot
+        return snapshot.tables[snapshot.current if name is None else name]
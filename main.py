@@ -1,9 +1,142 @@
 # main.py
-from engine.live_sequencer import LiveSequencer
+import time
+
+_T0 = time.perf_counter()  # startup timing reference (--startup-times)
+
+import argparse
+import os
+import sys
+import threading
+from concurrent.futures import Future
+
+# pyo (via engine.live_sequencer) and Tk are imported where they're used, so
+# headless commands skip Tk and the UI shows its window before pyo has loaded
+from engine.pattern_exporter import apply_preset, load_preset
 from engine.track import Track
-from mixer import MixerUI
+
+
+def render_headless(args):
+    """Render a preset (or an empty track) to WAV without a sound card or UI."""
+    from engine.live_sequencer import render_track
+
+    track = Track()
+    if args.preset:
+        apply_preset(track, load_preset(args.preset))
+    render_track(track, args.render, bars=args.bars, tail=args.tail)
+
+
+def replay_headless(args):
+    """Re-render a session event log (--event-log) to WAV, offline."""
+    from engine.live_sequencer import render_event_log
+
+    out = args.render or os.path.splitext(args.replay)[0] + ".wav"
+    render_event_log(args.replay, out, sr=args.sr, start=args.start, end=args.end)
+
+
+def boot_sequencer(track, args, mark=None) -> Future:
+    """Import pyo and build the LiveSequencer on a background thread; the Future resolves to it."""
+    ready: Future = Future()
+
+    def boot():
+        try:
+            from engine.live_sequencer import LiveSequencer  # imports pyo
+
+            if mark:
+                mark("pyo imported")
+            event_log = args.event_log
+            if event_log == "":
+                event_log = os.path.join("exports", "sessions",
+                                         time.strftime("session_%Y%m%d_%H%M%S.evlog"))
+            sequencer = LiveSequencer(track, record_format=args.record_format, event_log=event_log)
+            if mark:
+                mark("server booted", sequencer.boot_times["server"])
+                mark("synths built", sequencer.boot_times["synths"])
+        except BaseException as e:
+            ready.set_exception(e)
+        else:
+            ready.set_result(sequencer)
+
+    threading.Thread(target=boot, name="AudioBoot", daemon=True).start()
+    return ready
+
+
+def startup_marker():
+    """mark(label, took=None): print seconds since launch (and the step's own time)."""
+    lock = threading.Lock()
+
+    def mark(label, took=None):
+        line = f"[startup] {label:14s} {time.perf_counter() - _T0:6.3f}s"
+        if took is not None:
+            line += f"  ({took:.3f}s)"
+        with lock:
+            # __stdout__: pyo's boot silences sys.stdout process-wide while it runs
+            print(line, file=sys.__stdout__, flush=True)
+    return mark
+
+
+def stems_headless(args):
+    """Export a preset's mix plus one WAV per instrument to a folder, in one pass."""
+    from engine.audio_exporter import render_stems
+
+    track = Track()
+    if args.preset:
+        apply_preset(track, load_preset(args.preset))
+    render_stems(track, args.stems, bars=args.bars, tail=args.tail)
+
+
+def batch_headless(args) -> int:
+    """Render every preset in a folder/glob with the offline exporter, in parallel."""
+    from engine.batch_export import batch_export, print_summary
+
+    t0 = time.perf_counter()
+    results = batch_export(args.batch, out_dir=args.out_dir, jobs=args.jobs, force=args.force,
+                           bars=args.bars)
+    print_summary(results, time.perf_counter() - t0)
+    return 1 if any(r.status == "failed" for r in results) else 0
+
 
 def main():
+    parser = argparse.ArgumentParser(description="Beat grid step sequencer")
+    parser.add_argument("--render", metavar="WAV",
+                        help="render headlessly to WAV (offline pyo server) instead of opening the UI")
+    parser.add_argument("--preset", metavar="JSON", help="preset to render (see engine/pattern_exporter.py)")
+    parser.add_argument("--bars", type=int,
+                        help="number of bars to render (default: the preset's song once, else 1)")
+    parser.add_argument("--tail", type=float, default=0.0, help="seconds of tail after the last bar")
+    parser.add_argument("--stems", metavar="DIR",
+                        help="export master.wav plus one WAV per instrument to DIR (offline, one pass)")
+    parser.add_argument("--record-format", choices=("float", "wav24", "flac"), default="float",
+                        help="live recordings: 32-bit float WAV from pyo (default), or 24-bit WAV/FLAC "
+                             "written on a background thread (flac needs the soundfile package)")
+    parser.add_argument("--event-log", nargs="?", const="", metavar="PATH",
+                        help="log every trigger and synth change of the UI session to PATH "
+                             "(default: exports/sessions/session_<time>.evlog) for --replay")
+    parser.add_argument("--replay", metavar="LOG",
+                        help="re-render a session event log to --render WAV (default: next to the log)")
+    parser.add_argument("--sr", type=int, help="sample rate for --replay (default: the session's)")
+    parser.add_argument("--start", type=float, default=0.0, help="--replay from this many seconds in")
+    parser.add_argument("--end", type=float, help="--replay up to this many seconds in")
+    parser.add_argument("--startup-times", action="store_true",
+                        help="print how long the UI takes to show its window and to get audio ready")
+    parser.add_argument("--batch", metavar="DIR_OR_GLOB",
+                        help="export every preset in a folder (or matching a glob) to WAV (--bars each)")
+    parser.add_argument("--out-dir", help="where --batch writes WAVs (default: renders/ next to each preset)")
+    parser.add_argument("--jobs", type=int, help="worker processes for --batch (default: all cores)")
+    parser.add_argument("--force", action="store_true", help="re-render presets whose WAV is up to date")
+    args = parser.parse_args()
+
+    if args.batch:
+        raise SystemExit(batch_headless(args))
+    if args.replay:
+        replay_headless(args)
+        return
+    if args.render:
+        render_headless(args)
+        return
+    if args.stems:
+        stems_headless(args)
+        return
+
     print("\nwelcome to your cli music generator tool!\n")
     print("""
     ⠀⠀⠀⠀⠀⠀⠀⠀⣀⣤⣶⣶⣾⣿⣿⣿⣿⣷⣶⣶⣤⣀⠀⠀⠀⠀⠀⠀⠀⠀
@@ -24,12 +157,15 @@ def main():
     """)
     print("Launching Mixer UI...\n")
 
-    # Create track and sequencer
+    mark = startup_marker() if args.startup_times else None
+
+    # Boot audio in the background while the window is built
     track = Track()
-    sequencer = LiveSequencer(track)
+    ready = boot_sequencer(track, args, mark)
+
+    from mixer import MixerUI  # Tk only needed for the UI
 
-    # Start mixer in main thread
-    mixer = MixerUI(sequencer)
+    mixer = MixerUI(track, ready, on_startup=mark)
     mixer.start()  # Tk mainloop runs here (no CLI needed)
 
 if __name__ == "__main__":
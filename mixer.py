@@ -1,14 +1,37 @@
 import os
+import time
 import tkinter as tk
+from concurrent.futures import Future
 from tkinter import ttk, filedialog, messagebox
 
-from engine.pattern_exporter import save_preset, load_preset
+from engine.pattern_exporter import apply_preset, save_preset, load_preset
+
+CAPTURE_BARS = 8
+PLAYHEAD_POLL_MS = 16  # ~display rate; the sequencer never calls into Tk
+
+# Pad grid geometry (pixels) and colors; the whole grid is one Canvas
+PAD_SIZE = 20
+PAD_PITCH = 24        # pad + gap
+ROW_HEIGHT = 34       # fits the per-lane Clear button
+GRID_LEFT = 64        # lane labels sit left of the pads
+CLEAR_WIDTH = 64
+PAD_ON = "#ff7f50"
+PAD_OFF = "#2b2b2b"
+PAD_OUTLINE = "#555"
+PLAYHEAD_COLOR = "#ffeb3b"
 
 
 class MixerUI:
-    def __init__(self, sequencer):
-        self.sequencer = sequencer
-        self.track = sequencer.track
+    def __init__(self, track, sequencer, on_startup=None):
+        """
+        `sequencer` is a LiveSequencer for `track`, or a Future of one still
+        booting on another thread: the window is built right away and the
+        audio controls come up once it resolves. on_startup(label) is
+        called as the window and then the audio become ready (timing).
+        """
+        self.track = track
+        self.sequencer = None
+        self._on_startup = on_startup
 
         # ----- Window -----
         self.root = tk.Tk()
@@ -18,11 +41,11 @@ class MixerUI:
         # ----- State -----
         self.instruments = ["kick", "bass", "clap", "snare", "hihat"]
         self.steps = 16
-        self.pads = {instr: [] for instr in self.instruments}
         self.current_playhead = None
+        self._playhead_seen = 0  # sequencer.playhead() count last drawn
         self.recording_active = False
 
-        self.sequencer.playhead_callback = self.highlight_playhead
+        self.track.on_change(self._on_track_change)
 
         # ----- Styles -----
         style = ttk.Style()
@@ -45,13 +68,21 @@ class MixerUI:
         top = tk.Frame(self.root, bg="#1e1e1e")
         top.pack(pady=(12, 6), fill="x")
 
-        ttk.Button(top, text="Start", style="Dark.TButton", command=self.on_start).pack(side="left", padx=5)
-        ttk.Button(top, text="Stop", style="Dark.TButton", command=self.on_stop).pack(side="left", padx=5)
+        # Audio controls stay disabled until the sequencer has booted
+        self._audio_buttons = []
+        for text, command in (("Start", self.on_start), ("Stop", self.on_stop), ("Rec", self.on_record),
+                              (f"Capture {CAPTURE_BARS} bars", self.on_capture)):
+            button = ttk.Button(top, text=text, style="Dark.TButton", command=command)
+            button.state(["disabled"])
+            button.pack(side="left", padx=5)
+            self._audio_buttons.append(button)
         ttk.Button(top, text="Exit", style="Dark.TButton", command=self.exit_app).pack(side="left", padx=5)
 
         self.rec_label = tk.Label(top, text="●", fg="#555", bg="#1e1e1e", font=("Helvetica", 14, "bold"))
         self.rec_label.pack(side="left", padx=(12, 0))
         tk.Label(top, text="REC", fg="#aaa", bg="#1e1e1e").pack(side="left", padx=(4, 10))
+        self.status_label = tk.Label(top, text="starting audio...", fg="#aaa", bg="#1e1e1e")
+        self.status_label.pack(side="left", padx=(10, 0))
 
         # ===== GLOBAL CONTROLS: BPM & Steps =====
         globals_frame = tk.Frame(self.root, bg="#1e1e1e")
@@ -92,14 +123,37 @@ class MixerUI:
         ttk.Button(preset_frame, text="Load Track (JSON)", style="Dark.TButton",
                    command=self.load_track_preset).pack(side="left", padx=5)
 
-        # ===== SYNTH CONTROLS =====
-        synths_frame = tk.Frame(self.root, bg="#1e1e1e")
-        synths_frame.pack(pady=(6, 14))
+        # ===== SYNTH CONTROLS (built once the synths exist) =====
+        self.synths_frame = tk.Frame(self.root, bg="#1e1e1e")
+        self.synths_frame.pack(pady=(6, 14))
+
+        self._boot = sequencer
+        if isinstance(sequencer, Future):
+            self._poll_boot()
+        else:
+            self._on_audio_ready(sequencer)
+
+    def _poll_boot(self):
+        # The sequencer boots off the Tk thread; check back until it's ready
+        if not self._boot.done():
+            self.root.after(20, self._poll_boot)
+            return
+        error = self._boot.exception()
+        if error is not None:
+            self.status_label.configure(text="audio unavailable", fg="#ff5555")
+            messagebox.showerror("Audio", f"Could not start the audio engine:\n{error}")
+            return
+        self._on_audio_ready(self._boot.result())
+
+    def _on_audio_ready(self, sequencer):
+        self.sequencer = sequencer
+        synths_frame = self.synths_frame
 
         # Kick controls
         self._add_slider_group(
             parent=synths_frame,
             name="Kick",
+            instrument="kick",
             synth=self.sequencer.kick_synth,
             params=[
                 ("Volume", "volume", 0.0, 5.0, 0.1),
@@ -112,6 +166,7 @@ class MixerUI:
         self._add_slider_group(
             parent=synths_frame,
             name="Bass",
+            instrument="bass",
             synth=self.sequencer.bass_synth,
             params=[
                 ("Volume", "volume", 0.0, 5.0, 0.1),
@@ -121,98 +176,169 @@ class MixerUI:
             wave_control=True,  # adds a waveform combobox (saw/square/sine)
         )
 
+        for button in self._audio_buttons:
+            button.state(["!disabled"])
+        self.status_label.configure(text="")
+        self.root.after(PLAYHEAD_POLL_MS, self._poll_playhead)
+        if self._on_startup is not None:
+            self._on_startup("audio ready")
+
     # ---------------------------------------------------------------------
     # Grid building / updates
     # ---------------------------------------------------------------------
     def _build_pad_grid(self):
-        for child in self.pad_frame.winfo_children():
-            child.destroy()
-        self.pads = {instr: [] for instr in self.instruments}
-
+        """
+        The grid is one Canvas: a rectangle item per pad, lane labels, a
+        playhead column item and the Clear buttons as embedded windows.
+        Items are created once and reused; repaints only touch pads whose
+        color changed.
+        """
+        self.grid_canvas = tk.Canvas(self.pad_frame, bg="#1e1e1e", highlightthickness=0)
+        self.grid_canvas.pack()
+        self.grid_canvas.bind("<Button-1>", self._on_grid_click)
+        self._cells = []          # per lane: pad item ids, one per step (extras hidden)
+        self._cell_fill = {}      # pad item id -> fill it was last painted with
+        self._lane_items = []     # per lane: (label item, Clear button window item)
+        self._playhead_item = self.grid_canvas.create_rectangle(
+            0, 0, 0, 0, outline=PLAYHEAD_COLOR, width=2, state="hidden")
+        self._layout_pad_grid()
+
+    def _layout_pad_grid(self):
+        """Place the grid for the current step count; pads are added when it grows, hidden when it shrinks."""
+        canvas = self.grid_canvas
+        pad_top = (ROW_HEIGHT - PAD_SIZE) // 2
+        right = GRID_LEFT + self.steps * PAD_PITCH
         for row, instr in enumerate(self.instruments):
-            tk.Label(self.pad_frame, text=instr.upper(), fg="white", bg="#1e1e1e").grid(
-                row=row, column=0, padx=5, pady=2, sticky="w"
-            )
-            for col in range(self.steps):
-                pad = tk.Canvas(
-                    self.pad_frame,
-                    width=20, height=20,
-                    bg="#2b2b2b",
-                    highlightthickness=1,
-                    highlightbackground="#555",
-                )
-                pad.grid(row=row, column=col + 1, padx=1, pady=1)
-                pad.bind("<Button-1>", lambda e, i=instr, c=col: self.toggle_pad(i, c))
-                self.pads[instr].append(pad)
-
-            clear_btn = ttk.Button(
-                self.pad_frame, text="Clear", style="Dark.TButton",
-                command=lambda i=instr: self.clear_pattern(i)
-            )
-            clear_btn.grid(row=row, column=self.steps + 1, padx=5)
-
+            if row == len(self._cells):
+                self._cells.append([])
+                label = canvas.create_text(5, 0, anchor="w", fill="white", text=instr.upper())
+                clear_btn = ttk.Button(canvas, text="Clear", style="Dark.TButton",
+                                       command=lambda i=instr: self.clear_pattern(i))
+                window = canvas.create_window(0, 0, anchor="w", width=CLEAR_WIDTH, window=clear_btn)
+                self._lane_items.append((label, window))
+            cells = self._cells[row]
+            while len(cells) < self.steps:
+                item = canvas.create_rectangle(0, 0, 0, 0, fill=PAD_OFF, outline=PAD_OUTLINE)
+                self._cell_fill[item] = PAD_OFF
+                cells.append(item)
+            y = row * ROW_HEIGHT
+            for col, item in enumerate(cells):
+                if col < self.steps:
+                    x = GRID_LEFT + col * PAD_PITCH
+                    canvas.coords(item, x, y + pad_top, x + PAD_SIZE, y + pad_top + PAD_SIZE)
+                    canvas.itemconfigure(item, state="normal")
+                else:
+                    canvas.itemconfigure(item, state="hidden")
+            label, window = self._lane_items[row]
+            canvas.coords(label, 5, y + ROW_HEIGHT // 2)
+            canvas.coords(window, right + 8, y + ROW_HEIGHT // 2)
+        canvas.configure(width=right + 16 + CLEAR_WIDTH, height=len(self.instruments) * ROW_HEIGHT)
+        canvas.tag_raise(self._playhead_item)
+        self._place_playhead()
+        for instr in self.instruments:
             self.update_pad_colors(instr)
 
-    def _normalize_pattern(self, pattern: str, steps: int) -> str:
-        s = (pattern or "")
-        if len(s) < steps:
-            s = s + "-" * (steps - len(s))
-        elif len(s) > steps:
-            s = s[:steps]
-        return s
+    def _place_playhead(self):
+        step = self.current_playhead
+        if step is None or step >= self.steps:
+            self.grid_canvas.itemconfigure(self._playhead_item, state="hidden")
+            return
+        x = GRID_LEFT + step * PAD_PITCH
+        pad_top = (ROW_HEIGHT - PAD_SIZE) // 2
+        self.grid_canvas.coords(self._playhead_item, x - 1, pad_top - 1, x + PAD_SIZE + 1,
+                                (len(self.instruments) - 1) * ROW_HEIGHT + pad_top + PAD_SIZE + 1)
+        self.grid_canvas.itemconfigure(self._playhead_item, state="normal")
+
+    def _on_grid_click(self, event):
+        col = (event.x - GRID_LEFT) // PAD_PITCH
+        row = event.y // ROW_HEIGHT
+        if event.x >= GRID_LEFT and 0 <= col < self.steps and 0 <= row < len(self.instruments):
+            self.toggle_pad(self.instruments[row], col)
 
     def _on_length_change(self, _evt=None):
         new_steps = int(self.length_combo.get())
         self.set_steps(new_steps)
 
     def set_steps(self, new_steps: int):
-        for instr in self.instruments:
-            cur = self.track.get_patterns().get(instr, "-" * self.steps)
-            self.track.add_pattern(instr, self._normalize_pattern(cur, new_steps))
+        self.track.set_steps(new_steps)  # truncates/pads every lane of the step matrix
         self.steps = new_steps
-        self._build_pad_grid()
+        self._layout_pad_grid()
 
     # ---------------------------------------------------------------------
     # Pattern interactions
     # ---------------------------------------------------------------------
     def toggle_pad(self, instr, col):
-        pattern = list(self.track.get_patterns().get(instr, "-" * self.steps))
-        pattern[col] = "X" if pattern[col] == "-" else "-"
-        self.track.add_pattern(instr, "".join(pattern))
-        self.update_pad_colors(instr)
-
-    def update_pad_colors(self, instr):
-        pattern = self.track.get_patterns().get(instr, "-" * self.steps)
-        for col, pad in enumerate(self.pads[instr]):
-            if pad.winfo_exists():
-                pad.configure(bg="#ff7f50" if pattern[col] == "X" else "#2b2b2b")
-                if self.current_playhead is not None and col == self.current_playhead:
-                    pad.configure(highlightbackground="#ffeb3b")
-                else:
-                    pad.configure(highlightbackground="#555")
+        self.track.toggle_step(instr, col)  # repainted by _on_track_change
+
+    def _on_track_change(self, changes):
+        """Repaint only the pads an edit touched; whole rows on length/pattern switches."""
+        spans = {}
+        for change in changes:
+            if change.kind in ("length", "select", "remove"):
+                for instr in self.instruments:
+                    self.update_pad_colors(instr)
+                return
+            if change.kind in ("lane", "step") and change.pattern == self.track.current \
+                    and change.instrument in self.instruments and change.stop > change.start:
+                start, stop = spans.get(change.instrument, (change.start, change.stop))
+                spans[change.instrument] = (min(start, change.start), max(stop, change.stop))
+        for instr, (start, stop) in spans.items():
+            self.update_pad_colors(instr, start, stop)
+
+    def update_pad_colors(self, instr, start=0, stop=None):
+        lane = self.track.get_matrix().lane(instr)
+        gates = lane["gate"].tolist() if lane is not None else []
+        cells = self._cells[self.instruments.index(instr)]
+        for col in range(start, self.steps if stop is None else min(stop, self.steps)):
+            item = cells[col]
+            fill = PAD_ON if col < len(gates) and gates[col] else PAD_OFF
+            if self._cell_fill[item] != fill:
+                self.grid_canvas.itemconfigure(item, fill=fill)
+                self._cell_fill[item] = fill
 
     def clear_pattern(self, instr):
         self.track.add_pattern(instr, "-" * self.steps)
-        self.update_pad_colors(instr)
 
     def highlight_playhead(self, step):
+        # One item marks the playhead column: moving it costs the same at any grid size
         self.current_playhead = step
-        for instr in self.instruments:
-            self.update_pad_colors(instr)
+        self._place_playhead()
+
+    def _poll_playhead(self):
+        """Tk thread: draw the latest published step, if any (steps in between are skipped)."""
+        count, step = self.sequencer.playhead()
+        if count != self._playhead_seen:
+            self._playhead_seen = count
+            self.highlight_playhead(step)
+        self.root.after(PLAYHEAD_POLL_MS, self._poll_playhead)
 
     # ---------------------------------------------------------------------
     # Transport / Recording
     # ---------------------------------------------------------------------
     def on_start(self):
+        # Nothing is written to disk while playing: the last minute of output is
+        # kept in memory for on_capture(); Rec records deliberately
         self.track.set_bpm(int(self.bpm_slider.get()))
         self.sequencer.start()
 
+    def on_stop(self):
+        self.sequencer.stop()
+        if self.sequencer.recording:
+            self._finish_recording()
+
+    def on_record(self):
+        if self.sequencer.recording:
+            self._finish_recording()
+            return
         temp_path = self.sequencer.make_temp_record_path()
-        self.sequencer.start_recording(temp_path)
+        try:
+            self.sequencer.start_recording(temp_path)
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not start recording:\n{e}")
+            return
         self._set_rec_indicator(True)
 
-    def on_stop(self):
-        self.sequencer.stop()
+    def _finish_recording(self):
         temp_path = self.sequencer.stop_recording()
         self._set_rec_indicator(False)
 
@@ -221,17 +347,39 @@ class MixerUI:
 
         self._prompt_save_recording(temp_path)
 
+    def on_capture(self):
+        """Save the last CAPTURE_BARS bars that were played (written in the background)."""
+        exports_dir = os.path.join("exports")
+        path = os.path.join(exports_dir, time.strftime("capture_%Y%m%d-%H%M%S.wav"))
+        future = self.sequencer.save_capture(path, bars=CAPTURE_BARS)
+        if future is None:
+            messagebox.showinfo("Capture", "Nothing to capture yet: play at least one full bar.")
+            return
+        self._poll_capture(future)
+
+    def _poll_capture(self, future):
+        # The WAV is written off the Tk thread; check back until it's done
+        if not future.done():
+            self.root.after(100, self._poll_capture, future)
+            return
+        error = future.exception()
+        if error is not None:
+            messagebox.showerror("Error", f"Could not save capture:\n{error}")
+        else:
+            messagebox.showinfo("Captured", f"Capture saved to:\n{future.result()}")
+
     def _prompt_save_recording(self, temp_path: str):
         exports_dir = os.path.join("exports")
         os.makedirs(exports_dir, exist_ok=True)
         initial = os.path.join(exports_dir, os.path.basename(temp_path).replace("recording_", ""))
+        ext = os.path.splitext(temp_path)[1] or ".wav"
 
         dest = filedialog.asksaveasfilename(
             parent=self.root,
             title="Save Recording",
             initialfile=os.path.basename(initial),
-            defaultextension=".wav",
-            filetypes=[("WAV audio", "*.wav")],
+            defaultextension=ext,
+            filetypes=[(f"{ext[1:].upper()} audio", f"*{ext}")],
         )
         if dest:
             try:
@@ -292,30 +440,18 @@ class MixerUI:
             messagebox.showerror("Error", f"Could not load preset:\n{e}")
             return
 
-        # Apply BPM
-        self.track.set_bpm(int(data["bpm"]))
-        self.bpm_slider.set(int(data["bpm"]))
-
-        # Apply step length
-        steps = int(data.get("steps", 16))
-        self.length_combo.set(str(steps))
-        self.set_steps(steps)
-
-        # Apply patterns
-        instruments = data.get("instruments", {})
-        for instr in self.instruments:
-            pat = instruments.get(instr, "-" * self.steps)
-            self.track.add_pattern(instr, self._normalize_pattern(pat, self.steps))
-
-        for instr in self.instruments:
-            self.update_pad_colors(instr)
+        # Bank, song, BPM and length in one batch: one snapshot / repaint
+        apply_preset(self.track, data)
+        self.bpm_slider.set(int(self.track.get_bpm()))
+        self.length_combo.set(str(self.track.get_steps()))
+        self.set_steps(self.track.get_steps())
 
         messagebox.showinfo("Loaded", f"Preset loaded:\n{os.path.basename(src)}")
 
     # ---------------------------------------------------------------------
     # Synth control groups
     # ---------------------------------------------------------------------
-    def _add_slider_group(self, parent, name, synth, params, wave_control=False):
+    def _add_slider_group(self, parent, name, instrument, synth, params, wave_control=False):
         group = tk.LabelFrame(
             parent, text=f"{name} Controls", fg="white", bg="#1e1e1e",
             labelanchor="n", highlightbackground="#555"
@@ -330,7 +466,8 @@ class MixerUI:
                 orient="horizontal", length=200,
                 bg="#1e1e1e", fg="white", troughcolor="#333",
                 highlightthickness=0,
-                command=lambda v, p=param, s=synth: s.update(p, float(v)),
+                # Via the sequencer's parameter bus: applied once per buffer, latest value wins
+                command=lambda v, p=param: self.sequencer.update_synth(instrument, p, float(v)),
             )
             # Initialize to current synth value if available (handles Sig/SigTo/float)
             try:
@@ -347,13 +484,20 @@ class MixerUI:
                 wave_box.set(getattr(synth, "wave", "saw"))
             except Exception:
                 wave_box.set("saw")
-            wave_box.bind("<<ComboboxSelected>>", lambda e, s=synth, b=wave_box: s.update("wave", b.get()))
+            wave_box.bind("<<ComboboxSelected>>",
+                          lambda e, b=wave_box: self.sequencer.update_synth(instrument, "wave", b.get()))
             wave_box.pack(pady=(0, 8))
 
     # ---------------------------------------------------------------------
     # App lifecycle
     # ---------------------------------------------------------------------
     def exit_app(self):
+        if self.sequencer is None and isinstance(self._boot, Future):
+            # Let a boot in progress finish so its server can be shut down cleanly
+            try:
+                self.sequencer = self._boot.result(timeout=5.0)
+            except Exception:
+                pass
         try:
             self.sequencer.stop()
             temp = self.sequencer.stop_recording()
@@ -374,4 +518,6 @@ class MixerUI:
         self.root.destroy()
 
     def start(self):
+        if self._on_startup is not None:
+            self.root.after_idle(self._on_startup, "window shown")
         self.root.mainloop()